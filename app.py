@@ -1,4 +1,10 @@
+import multiprocessing
+
+from djapp import startup
 from djapp.ui import main
 
+startup.mark("ui module imported")
+
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
     main()
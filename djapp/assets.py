@@ -0,0 +1,146 @@
+from __future__ import annotations
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+from PyQt6.QtCore import QObject, QSize, Qt, pyqtSignal
+from PyQt6.QtGui import QImage, QImageReader, QPixmap
+
+CACHE_BYTES = 256 * 1024 * 1024
+VIDEO_WARM_BYTES = 4 * 1024 * 1024
+
+Key = Tuple[str, int, int]
+
+
+def decode_scaled(path: str, size: QSize) -> QImage:
+    """
+    Decode an image already fitted (aspect kept) inside size.
+
+    QImageReader can scale while decoding, which for large JPEGs skips most
+    of the work; other formats are decoded and scaled once here, off the
+    GUI thread.
+    """
+    reader = QImageReader(path)
+    reader.setAutoTransform(True)
+    src = reader.size()
+    if src.isValid() and not size.isEmpty() and (src.width() > size.width() or src.height() > size.height()):
+        reader.setScaledSize(src.scaled(size, Qt.AspectRatioMode.KeepAspectRatio))
+    img = reader.read()
+    if img.isNull() or size.isEmpty():
+        return img
+    if img.width() > size.width() or img.height() > size.height():
+        img = img.scaled(size, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation)
+    return img
+
+
+def image_path(bg: dict, size: QSize) -> str:
+    """
+    Best file for showing an image background at size (device pixels, like
+    the proxies): the smallest scan-time proxy that still covers it, else
+    the original.
+    """
+    path = (bg or {}).get("path", "")
+    best = None
+    for key, proxy in ((bg or {}).get("proxies") or {}).items():
+        try:
+            w, h = (int(v) for v in key.split("x"))
+        except ValueError:
+            continue
+        if w < size.width() or h < size.height():
+            continue  # would be upscaled in at least one dimension
+        if (best is None or w * h < best[0]) and os.path.exists(proxy):
+            best = (w * h, proxy)
+    return best[1] if best else path
+
+
+def _warm_file(path: str):
+    """Read the head of a video so opening it later hits the OS page cache."""
+    try:
+        with open(path, "rb") as f:
+            f.read(VIDEO_WARM_BYTES)
+    except OSError:
+        pass
+
+
+class BackgroundLoader(QObject):
+    """
+    Decodes backgrounds on worker threads and keeps ready pixmaps in an LRU
+    bounded by pixel memory. Lookups and QPixmap creation stay on the GUI
+    thread; workers only produce QImages. Sizes are in device pixels, and
+    pixmaps are tagged with device_pixel_ratio.
+    """
+
+    # (path, width, height) of a request that is now available via get()
+    ready = pyqtSignal(str, int, int)
+    _decoded = pyqtSignal(str, int, int, QImage)
+
+    def __init__(self, parent=None, max_bytes: int = CACHE_BYTES, workers: int = 2):
+        super().__init__(parent)
+        self.max_bytes = max_bytes
+        self.device_pixel_ratio = 1.0
+        self._cache: "OrderedDict[Key, QPixmap]" = OrderedDict()
+        self._bytes = 0
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bg-loader")
+        self._decoded.connect(self._store)
+
+    @staticmethod
+    def _key(path: str, size: QSize) -> Key:
+        return path, size.width(), size.height()
+
+    def get(self, path: str, size: QSize) -> Optional[QPixmap]:
+        key = self._key(path, size)
+        pm = self._cache.get(key)
+        if pm is not None:
+            self._cache.move_to_end(key)
+        return pm
+
+    def request(self, path: str, size: QSize):
+        """Decode path fitted to size in the background unless cached or queued."""
+        if not path:
+            return
+        key = self._key(path, size)
+        if key in self._cache:
+            return
+        with self._lock:
+            if key in self._pending:
+                return
+            self._pending.add(key)
+        self._pool.submit(self._work, path, QSize(size))
+
+    def prefetch_meta(self, meta: dict, size: QSize):
+        bg = (meta or {}).get("background") or {}
+        path = bg.get("path", "")
+        if not path:
+            return
+        if bg.get("type") == "video":
+            self._pool.submit(_warm_file, path)
+        else:
+            self.request(image_path(bg, size), size)
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _work(self, path: str, size: QSize):
+        img = decode_scaled(path, size) if os.path.exists(path) else QImage()
+        # Signal crosses to the GUI thread, where the QPixmap is made
+        self._decoded.emit(path, size.width(), size.height(), img)
+
+    def _store(self, path: str, w: int, h: int, img: QImage):
+        key = (path, w, h)
+        with self._lock:
+            self._pending.discard(key)
+        pm = QPixmap.fromImage(img) if not img.isNull() else QPixmap()
+        pm.setDevicePixelRatio(self.device_pixel_ratio)
+        old = self._cache.pop(key, None)
+        if old is not None:
+            self._bytes -= old.width() * old.height() * 4
+        self._cache[key] = pm
+        self._bytes += pm.width() * pm.height() * 4
+        while self._bytes > self.max_bytes and len(self._cache) > 1:
+            _k, ev = self._cache.popitem(last=False)
+            self._bytes -= ev.width() * ev.height() * 4
+        self.ready.emit(path, w, h)
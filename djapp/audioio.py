@@ -1,8 +1,15 @@
 from __future__ import annotations
-import sounddevice as sd
+import time
+import threading
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+import numpy as np
 
 
 def list_input_devices():
+    import sounddevice as sd
+
     devs = sd.query_devices()
     out = []
     for i, d in enumerate(devs):
@@ -25,6 +32,8 @@ def resolve_input_device(device_cfg):
         return device_cfg
 
     if isinstance(device_cfg, str):
+        import sounddevice as sd
+
         want = device_cfg.lower().strip()
         devs = sd.query_devices()
         for i, d in enumerate(devs):
@@ -33,3 +42,139 @@ def resolve_input_device(device_cfg):
         raise ValueError(f"Could not find input device containing name: {device_cfg}")
 
     raise TypeError("audio.device must be int, str, or null")
+
+
+class RealClock:
+    monotonic = staticmethod(time.monotonic)
+    sleep = staticmethod(time.sleep)
+
+
+class SimClock:
+    """
+    Simulated monotonic clock for as-fast-as-possible replay: sleep() just
+    advances time, and lets the source deliver whatever audio is now due.
+    """
+
+    def __init__(self, start: float = 0.0):
+        self.now = float(start)
+        self._on_advance: Optional[Callable[[float], None]] = None
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.now += max(0.0, float(seconds))
+        if self._on_advance is not None:
+            self._on_advance(self.now)
+
+
+class MicSource:
+    """
+    Live input through PortAudio; the default source for LiveMatcher.
+    Blocks are (frames,) for a mono stream and (frames, channels) otherwise.
+    """
+
+    clock = RealClock()
+    finished = False
+
+    def __init__(self, device, channels: int, sample_rate: int, block_n: int):
+        self.device = device
+        self.channels = channels
+        self.sample_rate = sample_rate
+        self.block_n = block_n
+
+    @contextmanager
+    def open(self, on_audio: Callable[[np.ndarray], None], on_status: Optional[Callable[[object], None]] = None):
+        """on_status(status) is called from the audio thread when PortAudio flags a problem."""
+        import sounddevice as sd
+
+        def callback(indata, frames, time_info, status):
+            if status and on_status is not None:
+                on_status(status)
+            on_audio(indata[:, 0] if indata.shape[1] == 1 else indata)
+
+        with sd.InputStream(
+            device=self.device,
+            channels=self.channels,
+            samplerate=self.sample_rate,
+            blocksize=self.block_n,
+            dtype="float32",
+            callback=callback,
+        ):
+            yield
+
+
+class FileSource:
+    """
+    Plays a decoded recording into the matcher in blocks, as a sound card
+    would. realtime=True paces blocks against the wall clock; otherwise a
+    SimClock is used and the whole file is replayed as fast as matching allows.
+    Block i (covering [i*B, (i+1)*B) of the file) is delivered at clock
+    time start + (i+1)*B; audio_time() maps a clock reading back to file time.
+    audio may be (samples, channels) to feed several matcher inputs.
+    """
+
+    def __init__(self, audio: np.ndarray, sample_rate: int, block_n: int, realtime: bool = False):
+        self.audio = audio.astype(np.float32, copy=False)
+        self.sample_rate = sample_rate
+        self.block_n = max(1, int(block_n))
+        self.realtime = realtime
+        self.clock = RealClock() if realtime else SimClock()
+        self.finished = False
+        self._start = 0.0
+        self._next_block = 0
+        self._on_audio: Optional[Callable[[np.ndarray], None]] = None
+
+    @classmethod
+    def from_file(
+        cls, path: str, sample_rate: int, block_n: int, realtime: bool = False, mono: bool = True
+    ) -> "FileSource":
+        from djapp.fingerprint import load_audio
+
+        return cls(load_audio(path, sample_rate, mono), sample_rate, block_n, realtime)
+
+    @property
+    def duration(self) -> float:
+        return self.audio.shape[0] / self.sample_rate
+
+    def audio_time(self, clock_time: float) -> float:
+        return clock_time - self._start
+
+    def _deliver_until(self, now: float):
+        n_blocks = -(-self.audio.shape[0] // self.block_n)
+        while self._next_block < n_blocks:
+            due = self._start + (self._next_block + 1) * self.block_n / self.sample_rate
+            if due > now:
+                return
+            i = self._next_block * self.block_n
+            self._on_audio(self.audio[i : i + self.block_n])
+            self._next_block += 1
+        self.finished = True
+
+    @contextmanager
+    def open(self, on_audio: Callable[[np.ndarray], None], on_status: Optional[Callable[[object], None]] = None):
+        self._on_audio = on_audio
+        self._next_block = 0
+        self.finished = False
+        self._start = self.clock.monotonic()
+        feeder = None
+        stop = threading.Event()
+        if self.realtime:
+
+            def run():
+                while not stop.is_set() and not self.finished:
+                    self._deliver_until(self.clock.monotonic())
+                    stop.wait(self.block_n / self.sample_rate / 4)
+
+            feeder = threading.Thread(target=run, name="file-source", daemon=True)
+            feeder.start()
+        else:
+            self.clock._on_advance = self._deliver_until
+        try:
+            yield
+        finally:
+            stop.set()
+            if feeder is not None:
+                feeder.join(timeout=1.0)
+            if isinstance(self.clock, SimClock):
+                self.clock._on_advance = None
@@ -0,0 +1,297 @@
+"""
+Tune the fingerprinting parameters on a sample of your own library.
+
+    python -m djapp.autotune MUSIC_ROOT [--tracks 20] [--queries 2] [--grid quick|full] [--json tune.json]
+    python -m djapp.autotune MUSIC_ROOT --from tune.json --apply N
+
+Sampled tracks are decoded once into a scratch directory. Every parameter
+set in the grid (plus the current one) then fingerprints them into its own
+index and identifies the same excerpts under simulated live conditions
+(noise, room reverb, EQ, level), one parameter set per worker process. The
+report lists accuracy, hash density, DB size and query latency per set and
+marks the Pareto front. --apply N writes set N to the config, drops the
+fingerprint caches and rebuilds the index.
+"""
+from __future__ import annotations
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import itertools
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List
+
+import numpy as np
+
+from djapp.db import FingerprintDB
+from djapp.fingerprint import Fingerprinter, load_audio
+from djapp.indexer import rebuild_db
+from djapp.scanlib import default_config_path, load_config, save_config
+from djapp.shards import ShardTable
+from djapp.synth import degrade
+
+PARAM_KEYS = ["fft_size", "hop_size", "peak_neighborhood", "max_peaks_per_frame", "fanout", "min_dt", "max_dt"]
+GRIDS: Dict[str, Dict[str, list]] = {
+    "quick": {
+        "fft_size": [2048, 4096],
+        "hop_size": [256, 512],
+        "fanout": [5, 8, 12],
+    },
+    "full": {
+        "fft_size": [2048, 4096],
+        "hop_size": [256, 512],
+        "fanout": [5, 8, 12],
+        "max_peaks_per_frame": [4, 6, 8],
+        "peak_neighborhood": [[8, 12], [12, 20], [20, 30]],
+    },
+}
+# name -> degrade() keyword arguments
+CONDITIONS: Dict[str, dict] = {
+    "clean": {},
+    "noise_10db": {"snr_db": 10.0},
+    "noise_0db": {"snr_db": 0.0},
+    "reverb": {"reverb_seconds": 0.8, "snr_db": 20.0},
+    "room": {"reverb_seconds": 0.5, "tilt_db": -6.0, "gain_db": 6.0, "snr_db": 5.0},
+    "level_-20db": {"gain_db": -20.0},
+}
+# Pareto objectives: (result key, True if larger is better)
+OBJECTIVES = [("accuracy", True), ("hashes_per_s", False), ("db_bytes", False), ("query_p50_ms", False)]
+
+
+def param_grid(base: dict, grid: Dict[str, list]) -> List[dict]:
+    """The current parameters first, then every grid combination over them (deduplicated)."""
+    current = {k: base[k] for k in PARAM_KEYS}
+    out = [current]
+    keys = list(grid)
+    for values in itertools.product(*(grid[k] for k in keys)):
+        p = dict(current, **dict(zip(keys, values)))
+        if p["hop_size"] >= p["fft_size"] or p in out:
+            continue
+        out.append(p)
+    return out
+
+
+def _prepare(cfg: dict, work: str, n_tracks: int, n_queries: int, seed: int) -> dict:
+    """Decode sampled tracks to .npy files and pick the query excerpts."""
+    sr = int(cfg["audio"]["sample_rate"])
+    listen = float(cfg["audio"]["listen_seconds"])
+    rng = random.Random(seed)
+    tracks = list(cfg.get("tracks") or [])
+    rng.shuffle(tracks)
+
+    files, ids, seconds = [], [], 0.0
+    queries = []
+    n = int(listen * sr)
+    for t in tracks:
+        if len(files) >= n_tracks:
+            break
+        try:
+            audio = load_audio(t["audio_file"], sr)
+        except Exception:
+            continue
+        if audio.shape[0] < n:
+            continue
+        path = os.path.join(work, f"track_{len(files):04d}.npy")
+        np.save(path, audio)
+        for _ in range(n_queries):
+            start = rng.randint(0, audio.shape[0] - n)
+            for name in CONDITIONS:
+                queries.append((len(files), start, name, seed + len(queries)))
+        files.append(path)
+        ids.append(t["id"])
+        seconds += audio.shape[0] / sr
+    return {"sr": sr, "window": n, "files": files, "ids": ids, "audio_seconds": seconds, "queries": queries}
+
+
+def evaluate_params(params: dict, sample: dict, min_conf: int, work: str) -> dict:
+    """Index the sample with params and run every query; runs in a worker process."""
+    fp = Fingerprinter(sample_rate=sample["sr"], **dict(params, peak_neighborhood=tuple(params["peak_neighborhood"])))
+    tracks = [np.load(p, mmap_mode="r") for p in sample["files"]]
+
+    t0 = time.perf_counter()
+    per_track = [fp.fingerprint_audio(np.asarray(a)) for a in tracks]
+    index_s = time.perf_counter() - t0
+
+    # Real SQLite file for the on-disk size, in-memory table for the queries
+    db_path = os.path.join(work, f"db_{os.getpid()}_{time.monotonic_ns()}.sqlite")
+    db = FingerprintDB(db_path)
+    db.init_schema()
+    for tid, hashes in zip(sample["ids"], per_track):
+        db.replace_hashes(tid, hashes)
+    db_bytes = os.path.getsize(db_path)
+    os.remove(db_path)
+
+    n_hashes = sum(len(h) for h in per_track)
+    h = np.fromiter((x[0] for hs in per_track for x in hs), np.uint32, n_hashes)
+    t = np.fromiter((x[1] for hs in per_track for x in hs), np.int32, n_hashes)
+    tid = np.repeat(np.arange(len(per_track), dtype=np.int32), [len(hs) for hs in per_track])
+    table = ShardTable(list(sample["ids"]), h, tid, t)
+
+    lat: List[float] = []
+    ok = {name: 0 for name in CONDITIONS}
+    top1 = 0
+    n = sample["window"]
+    for track_i, start, cond, qseed in sample["queries"]:
+        x = degrade(np.asarray(tracks[track_i][start : start + n]), sample["sr"], seed=qseed, **CONDITIONS[cond])
+        t1 = time.perf_counter()
+        hashes = fp.fingerprint_audio(x)
+        best, conf = -1, 0
+        if hashes:
+            arr = np.asarray(hashes, dtype=np.int64)
+            tids, _offs, counts = table.partial_votes(arr[:, 0].astype(np.uint32), arr[:, 1].astype(np.int32))
+            if counts.size:
+                i = int(np.argmax(counts))
+                best, conf = int(tids[i]), int(counts[i])
+        lat.append((time.perf_counter() - t1) * 1000.0)
+        if best == track_i:
+            top1 += 1
+            if conf >= min_conf:
+                ok[cond] += 1
+
+    n_q = len(sample["queries"]) or 1
+    per_cond = len(sample["queries"]) // len(CONDITIONS) or 1
+    return {
+        "params": params,
+        "accuracy": sum(ok.values()) / n_q,
+        "top1": top1 / n_q,
+        "conditions": {name: ok[name] / per_cond for name in CONDITIONS},
+        "hashes_per_s": n_hashes / (sample["audio_seconds"] or 1.0),
+        "db_bytes": db_bytes,
+        "index_x_realtime": sample["audio_seconds"] / index_s if index_s > 0 else 0.0,
+        "query_p50_ms": float(np.percentile(lat, 50)) if lat else 0.0,
+        "query_p95_ms": float(np.percentile(lat, 95)) if lat else 0.0,
+    }
+
+
+def pareto_front(results: List[dict]) -> List[int]:
+    """Indices of results no other result beats or ties on every objective."""
+
+    def at_least(a: dict, b: dict) -> bool:
+        return all((a[k] >= b[k]) if up else (a[k] <= b[k]) for k, up in OBJECTIVES)
+
+    front = []
+    for i, r in enumerate(results):
+        if not any(j != i and at_least(o, r) and not at_least(r, o) for j, o in enumerate(results)):
+            front.append(i)
+    return front
+
+
+def tune(cfg: dict, n_tracks: int, n_queries: int, grid: Dict[str, list], workers: int = 0, seed: int = 0) -> dict:
+    min_conf = int(cfg["audio"]["min_confidence"])
+    candidates = param_grid(cfg["fingerprinting"], grid)
+    work = tempfile.mkdtemp(prefix="djtune-")
+    try:
+        sample = _prepare(cfg, work, n_tracks, n_queries, seed)
+        if not sample["files"]:
+            raise ValueError("No decodable tracks in the library config")
+        print(
+            f"  {len(sample['files'])} tracks, {len(sample['queries'])} queries, {len(candidates)} parameter sets",
+            file=sys.stderr,
+            flush=True,
+        )
+        workers = workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futs = [pool.submit(evaluate_params, p, sample, min_conf, work) for p in candidates]
+            results = []
+            for k, fut in enumerate(futs):
+                results.append(fut.result())
+                print(f"  evaluated {k + 1}/{len(futs)}", file=sys.stderr, flush=True)
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+    # Scale the sample DB to the whole library for the report
+    scale = len(cfg.get("tracks") or []) / max(1, len(sample["files"]))
+    for r in results:
+        r["db_bytes_library"] = int(r["db_bytes"] * scale)
+    return {
+        "tracks": len(sample["files"]),
+        "queries": len(sample["queries"]),
+        "min_confidence": min_conf,
+        "results": results,
+        "pareto": pareto_front(results),
+    }
+
+
+def _describe(p: dict) -> str:
+    nb = p["peak_neighborhood"]
+    return (
+        f"fft {p['fft_size']} hop {p['hop_size']} nb {nb[0]}x{nb[1]} peaks {p['max_peaks_per_frame']} "
+        f"fan {p['fanout']} dt {p['min_dt']}-{p['max_dt']}"
+    )
+
+
+def format_report(report: dict) -> str:
+    front = set(report["pareto"])
+    lines = [
+        f"{report['tracks']} tracks, {report['queries']} queries, accuracy at min_confidence "
+        f"{report['min_confidence']} (* = Pareto front, #0 = current config)",
+        f"  {'#':>3}  {'parameters':<50}{'acc':>7}{'top1':>7}{'hash/s':>8}{'DB MB':>8}{'p50 ms':>8}{'p95 ms':>8}",
+    ]
+    order = sorted(range(len(report["results"])), key=lambda i: -report["results"][i]["accuracy"])
+    for i in order:
+        r = report["results"][i]
+        lines.append(
+            f"{'*' if i in front else ' '} {i:>3}  {_describe(r['params']):<50}{r['accuracy'] * 100:>6.1f}%"
+            f"{r['top1'] * 100:>6.1f}%{r['hashes_per_s']:>8.0f}{r['db_bytes_library'] / 1e6:>8.1f}"
+            f"{r['query_p50_ms']:>8.1f}{r['query_p95_ms']:>8.1f}"
+        )
+    return "\n".join(lines)
+
+
+def apply_params(music_root: str, params: dict):
+    """Write params to the config, drop stale fingerprint caches and rebuild the index."""
+    path = default_config_path(music_root)
+    cfg = load_config(path)
+    cfg["fingerprinting"] = dict(cfg.get("fingerprinting") or {}, **{k: params[k] for k in PARAM_KEYS})
+    save_config(cfg, path)
+    for t in cfg.get("tracks") or []:
+        cache = t.get("fingerprint_cache")
+        if cache and os.path.exists(cache):
+            os.remove(cache)
+
+    def progress(i, n):
+        if i % 50 == 0 or i == n:
+            print(f"  indexed {i}/{n}", file=sys.stderr, flush=True)
+
+    rebuild_db(cfg, progress)
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m djapp.autotune", description=__doc__.split("\n\n")[0].strip())
+    ap.add_argument("music_root")
+    ap.add_argument("--tracks", type=int, default=20, help="tracks to sample")
+    ap.add_argument("--queries", type=int, default=2, help="excerpts per track, each under every condition")
+    ap.add_argument("--grid", choices=sorted(GRIDS), default="quick")
+    ap.add_argument("--workers", type=int, default=0)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--json", help="write the report here")
+    ap.add_argument("--from", dest="from_json", help="reuse a saved report instead of sweeping")
+    ap.add_argument("--apply", type=int, default=None, metavar="N", help="write parameter set N to the config")
+    args = ap.parse_args(argv)
+
+    if args.from_json:
+        with open(args.from_json, "r", encoding="utf-8") as f:
+            report = json.load(f)
+    else:
+        cfg = load_config(default_config_path(args.music_root))
+        report = tune(cfg, args.tracks, args.queries, GRIDS[args.grid], args.workers, args.seed)
+        if args.json:
+            with open(args.json, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=1)
+    print(format_report(report))
+
+    if args.apply is not None:
+        if not 0 <= args.apply < len(report["results"]):
+            ap.error(f"--apply must be between 0 and {len(report['results']) - 1}")
+        params = report["results"][args.apply]["params"]
+        print(f"applying #{args.apply}: {_describe(params)}")
+        apply_params(args.music_root, params)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,217 @@
+"""
+Micro-benchmarks for the fingerprint, index and match hot paths.
+
+    python -m djapp.bench [--json results.json] [--baseline old.json] [--only NAME ...]
+
+Every stage runs on synthetic audio (djapp.synth), so results are
+comparable between machines and commits. Each benchmark is timed over a
+number of runs, then once more under tracemalloc for its peak and
+retained allocations.
+"""
+from __future__ import annotations
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import tracemalloc
+from dataclasses import dataclass, asdict
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from djapp.audioio import FileSource
+from djapp.db import FingerprintDB
+from djapp.fingerprint import fingerprinter_from_config, load_fp_cache, save_fp_cache
+from djapp.scanlib import write_config
+from djapp.synth import synth_audio
+
+LIBRARY_TRACKS = 20
+TRACK_SECONDS = 180.0
+
+
+@dataclass
+class Result:
+    name: str
+    runs: int
+    median_s: float
+    min_s: float
+    peak_bytes: int
+    retained_bytes: int  # still allocated after the call returned
+    throughput: float
+    unit: str
+
+
+@dataclass
+class Bench:
+    name: str
+    fn: Callable[[], object]
+    work: float  # units of work per call, for throughput
+    unit: str
+    runs: int = 5
+
+
+def _measure(b: Bench) -> Result:
+    b.fn()  # warm caches and lazy imports
+    times = []
+    for _ in range(b.runs):
+        t0 = time.perf_counter()
+        b.fn()
+        times.append(time.perf_counter() - t0)
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    tracemalloc.reset_peak()
+    b.fn()
+    _cur, peak = tracemalloc.get_traced_memory()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    own = [tracemalloc.Filter(False, tracemalloc.__file__)]
+    diff = after.filter_traces(own).compare_to(before.filter_traces(own), "filename")
+    retained = sum(s.size_diff for s in diff)
+
+    med = float(np.median(times))
+    return Result(
+        name=b.name,
+        runs=b.runs,
+        median_s=med,
+        min_s=float(min(times)),
+        peak_bytes=int(peak),
+        retained_bytes=int(max(0, retained)),
+        throughput=b.work / med if med > 0 else 0.0,
+        unit=b.unit,
+    )
+
+
+def build_benches(workdir: str) -> List[Bench]:
+    cfg = write_config(workdir, [], os.path.join(workdir, "config.yaml"), proxy_sizes=[])
+    cfg["index"]["shards"] = 1
+    sr = int(cfg["audio"]["sample_rate"])
+    listen = float(cfg["audio"]["listen_seconds"])
+    fp = fingerprinter_from_config(cfg)
+
+    track = synth_audio(1, TRACK_SECONDS, sr)
+    window = track[int(60 * sr) : int((60 + listen) * sr)]
+    S = fp._spectrogram(window)
+    track_hashes = fp.fingerprint_audio(track)
+
+    cache = os.path.join(workdir, "track.djfp.npz")
+    save_fp_cache(cache, track_hashes)
+
+    # A small library so queries and votes see realistic collisions
+    db = FingerprintDB(cfg["database"]["path"])
+    db.init_schema()
+    for i in range(LIBRARY_TRACKS):
+        tid = f"bench_{i:03d}"
+        db.upsert_track(tid, {"id": tid, "title": tid, "background": {}})
+        db.replace_hashes(tid, track_hashes if i == 0 else fp.fingerprint_audio(synth_audio(100 + i, 60.0, sr)))
+    window_hashes = fp.fingerprint_audio(window)
+    window_h = [h for h, _t in window_hashes]
+
+    from djapp.matcher import LiveMatcher
+
+    matcher = LiveMatcher(cfg, db, source=FileSource(window, sr, sr))
+    scratch = FingerprintDB(os.path.join(workdir, "scratch.sqlite"))
+    scratch.init_schema()
+
+    return [
+        Bench("spectrogram", lambda: fp._spectrogram(window), listen, "audio s/s", runs=20),
+        Bench("find_peaks", lambda: fp._find_peaks(S), listen, "audio s/s", runs=20),
+        Bench("fingerprint_audio", lambda: fp.fingerprint_audio(window), listen, "audio s/s", runs=10),
+        Bench("fingerprint_track", lambda: fp.fingerprint_audio(track), TRACK_SECONDS, "audio s/s", runs=3),
+        Bench("load_fp_cache", lambda: load_fp_cache(cache), len(track_hashes), "hashes/s", runs=10),
+        Bench(
+            "replace_hashes",
+            lambda: scratch.replace_hashes("bench", track_hashes),
+            len(track_hashes),
+            "hashes/s",
+            runs=5,
+        ),
+        Bench("query_hashes", lambda: db.query_hashes(window_h), len(window_h), "hashes/s", runs=10),
+        Bench("match_segment", lambda: matcher._match_segment(window), listen, "audio s/s", runs=10),
+    ]
+
+
+def run(only: Optional[List[str]] = None) -> dict:
+    results: Dict[str, dict] = {}
+    with tempfile.TemporaryDirectory(prefix="djbench_") as workdir:
+        for b in build_benches(workdir):
+            if only and b.name not in only:
+                continue
+            results[b.name] = asdict(_measure(b))
+    return {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": f"{platform.system()} {platform.machine()}",
+        },
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> List[str]:
+    """Names whose median time grew by more than tolerance (0.1 = 10%)."""
+    slower = []
+    base = baseline.get("results") or {}
+    for name, r in current["results"].items():
+        b = base.get(name)
+        if b and r["median_s"] > b["median_s"] * (1.0 + tolerance):
+            slower.append(name)
+    return slower
+
+
+def _fmt_bytes(n: int) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if n < 1024 or unit == "GB":
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024.0
+    return str(n)
+
+
+def format_table(current: dict, baseline: Optional[dict] = None) -> str:
+    base = (baseline or {}).get("results") or {}
+    lines = [f"{'benchmark':<20}{'median':>11}{'min':>11}{'peak mem':>11}{'retained':>11}  throughput"]
+    for name, r in current["results"].items():
+        line = (
+            f"{name:<20}{r['median_s'] * 1000:>9.2f}ms{r['min_s'] * 1000:>9.2f}ms"
+            f"{_fmt_bytes(r['peak_bytes']):>11}{_fmt_bytes(r['retained_bytes']):>11}  {r['throughput']:,.0f} {r['unit']}"
+        )
+        b = base.get(name)
+        if b and b["median_s"] > 0:
+            line += f"  ({(r['median_s'] / b['median_s'] - 1.0) * 100:+.1f}% vs baseline)"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m djapp.bench", description=__doc__.split("\n\n")[0].strip())
+    ap.add_argument("--json", help="write results here")
+    ap.add_argument("--baseline", help="earlier --json output to compare against")
+    ap.add_argument("--tolerance", type=float, default=0.10, help="allowed slowdown before failing (0.10 = 10%%)")
+    ap.add_argument("--only", nargs="*", help="run only these benchmarks")
+    args = ap.parse_args(argv)
+
+    current = run(args.only)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    print(format_table(current, baseline))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=1)
+
+    if baseline is not None:
+        slower = compare(current, baseline, args.tolerance)
+        if slower:
+            print(f"Slower than baseline by more than {args.tolerance:.0%}: {', '.join(slower)}", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
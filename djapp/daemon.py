@@ -0,0 +1,354 @@
+"""
+Headless matcher: capture and match without Qt, publishing state over a socket.
+
+    python -m djapp.daemon MUSIC_ROOT [--listen tcp:127.0.0.1:7770 | unix:/tmp/lyrics.sock] [--file set.wav]
+
+Clients receive newline-delimited JSON messages, and only when something
+changed:
+
+    hello  {"type": "hello", "version": 1, "stamp": s}
+    track  {"type": "track", "stamp", "track_id", "input", "title", "artist", "album",
+            "confidence", "lyrics_offset_ms", "lyrics": [[t, text], ...]}
+    time   {"type": "time", "stamp", "track_time", "rate", "confidence"}
+    line   {"type": "line", "stamp", "index", "text", "next"}
+
+stamp is the daemon's monotonic clock in seconds. A client anchors it once
+(local_now - stamp on receipt) and extrapolates between updates:
+track_time(now) = track_time + rate * (now - stamp); lyric times are
+compared against track_time + lyrics_offset_ms / 1000. A new client gets
+the current hello/track/time/line straight away.
+
+An HTTP client (e.g. EventSource in an OBS browser source) that sends a
+GET on connect gets the same messages as server-sent events instead.
+SIGHUP reloads the index; SIGINT/SIGTERM stop the daemon.
+"""
+from __future__ import annotations
+import os
+import sys
+import json
+import queue
+import signal
+import socket
+import argparse
+import threading
+from typing import List, Optional, Tuple
+
+from djapp.audioio import FileSource
+from djapp.db import FingerprintDB
+from djapp.matcher import LiveMatcher
+from djapp.metrics import METRICS_DUMP_SECONDS, MetricsDumper, metrics_dump_path
+from djapp.scanlib import default_config_path, load_config
+from djapp.settings import settings_store
+
+PROTOCOL_VERSION = 1
+DEFAULT_LISTEN = "tcp:127.0.0.1:7770"
+LINE_TICK_SECONDS = 0.02
+# A time model that predicts within this of the last one sent is not news
+TIME_EPSILON_SECONDS = 0.005
+RATE_EPSILON = 1e-4
+CLIENT_QUEUE = 256
+
+SSE_HEADERS = (
+    b"HTTP/1.1 200 OK\r\n"
+    b"Content-Type: text/event-stream\r\n"
+    b"Cache-Control: no-cache\r\n"
+    b"Access-Control-Allow-Origin: *\r\n"
+    b"Connection: keep-alive\r\n\r\n"
+)
+
+
+def parse_listen(spec: str) -> Tuple[int, object]:
+    """'unix:/path', 'tcp:host:port', 'host:port' or a bare path -> (family, address)."""
+    if spec.startswith("unix:"):
+        return socket.AF_UNIX, spec[5:]
+    if spec.startswith("tcp:"):
+        spec = spec[4:]
+    elif "/" in spec:
+        return socket.AF_UNIX, spec
+    host, _, port = spec.rpartition(":")
+    return socket.AF_INET, (host or "127.0.0.1", int(port))
+
+
+class _Client:
+    """One connection with its own writer thread; a client that falls behind is dropped."""
+
+    def __init__(self, conn: socket.socket, sse: bool, on_close):
+        self.conn = conn
+        self.sse = sse
+        self.q: queue.Queue = queue.Queue(maxsize=CLIENT_QUEUE)
+        self._on_close = on_close
+        self._thread = threading.Thread(target=self._run, name="daemon-client", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def send(self, line: str):
+        try:
+            self.q.put_nowait(line)
+        except queue.Full:
+            self.close()
+
+    def close(self):
+        try:
+            self.q.put_nowait(None)
+        except queue.Full:
+            pass
+        try:
+            self.conn.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+    def _run(self):
+        try:
+            if self.sse:
+                self.conn.sendall(SSE_HEADERS)
+            while True:
+                line = self.q.get()
+                if line is None:
+                    break
+                data = f"data: {line}\n\n" if self.sse else line + "\n"
+                self.conn.sendall(data.encode("utf-8"))
+        except OSError:
+            pass
+        finally:
+            self.conn.close()
+            self._on_close(self)
+
+
+class StatePublisher:
+    """
+    Turns LiveMatcher state into track/time/line messages and fans them out
+    to connected clients. The matcher listener only formats and queues, so
+    a slow client never stalls matching.
+    """
+
+    def __init__(self, matcher: LiveMatcher, settings=None):
+        self.matcher = matcher
+        self.clock = matcher.clock
+        self.settings = settings or settings_store()
+        self._lock = threading.Lock()
+        self._clients: List[_Client] = []
+        self._last = {}  # type -> last message sent, replayed to new clients
+        self._track_key = None
+        self._lrc = None
+        self._offset_s = 0.0
+        self._line_index = None
+        self._stop = threading.Event()
+        self._ticker = threading.Thread(target=self._tick, name="daemon-lines", daemon=True)
+
+    def start(self):
+        self.matcher.add_listener(self._on_state)
+        self._ticker.start()
+
+    def stop(self):
+        self.matcher.remove_listener(self._on_state)
+        self._stop.set()
+        self._ticker.join(timeout=1.0)
+        with self._lock:
+            clients = list(self._clients)
+        for c in clients:
+            c.close()
+
+    def add_client(self, conn: socket.socket, sse: bool):
+        c = _Client(conn, sse, self._remove_client)
+        with self._lock:
+            self._clients.append(c)
+            c.send(self._encode({"type": "hello", "version": PROTOCOL_VERSION, "stamp": self.clock.monotonic()}))
+            for kind in ("track", "time", "line"):
+                if kind in self._last:
+                    c.send(self._encode(self._last[kind]))
+        c.start()
+
+    def _remove_client(self, c: _Client):
+        with self._lock:
+            if c in self._clients:
+                self._clients.remove(c)
+
+    @staticmethod
+    def _encode(msg: dict) -> str:
+        return json.dumps(msg, ensure_ascii=False, separators=(",", ":"))
+
+    def _broadcast(self, msg: dict):
+        line = self._encode(msg)
+        with self._lock:
+            self._last[msg["type"]] = msg
+            clients = list(self._clients)
+        for c in clients:
+            c.send(line)
+
+    def _on_state(self, st: dict):
+        track_id = st["track_id"]
+        lrc = st["lrc"]
+        switched = (track_id, id(lrc)) != self._track_key
+        if switched:
+            self._track_key = (track_id, id(lrc))
+            meta = st["meta"] or {}
+            offset_ms = self.settings.lyrics_offset_ms(track_id)
+            with self._lock:
+                self._lrc = lrc
+                self._offset_s = offset_ms / 1000.0
+                self._line_index = None
+            self._broadcast(
+                {
+                    "type": "track",
+                    "stamp": st["stamp"],
+                    "track_id": track_id,
+                    "input": st.get("input"),
+                    "title": meta.get("title") or "",
+                    "artist": meta.get("artist") or "",
+                    "album": meta.get("album") or "",
+                    "confidence": st["confidence"],
+                    "lyrics_offset_ms": offset_ms,
+                    "lyrics": [[ln.t, ln.text] for ln in lrc.lines] if lrc else [],
+                }
+            )
+
+        if st["track_time"] is None:
+            return
+        msg = {
+            "type": "time",
+            "stamp": st["stamp"],
+            "track_time": st["track_time"],
+            "rate": st["beta"],
+            "confidence": st["confidence"],
+        }
+        prev = self._last.get("time")
+        if prev is not None and not switched:
+            predicted = prev["track_time"] + prev["rate"] * (msg["stamp"] - prev["stamp"])
+            if abs(predicted - msg["track_time"]) < TIME_EPSILON_SECONDS and abs(prev["rate"] - msg["rate"]) < RATE_EPSILON:
+                return
+        self._broadcast(msg)
+
+    def _tick(self):
+        while not self._stop.wait(LINE_TICK_SECONDS):
+            with self._lock:
+                lrc, tm, offset = self._lrc, self._last.get("time"), self._offset_s
+            if lrc is None or not lrc.lines or tm is None:
+                continue
+            now = self.clock.monotonic()
+            t = tm["track_time"] + tm["rate"] * (now - tm["stamp"]) + offset
+            idx = lrc.line_index(t)
+            if idx == self._line_index:
+                continue
+            self._line_index = idx
+            cur, nxt = lrc.current_line(t)
+            self._broadcast({"type": "line", "stamp": now, "index": idx, "text": cur, "next": nxt})
+
+
+def _is_http(conn: socket.socket) -> bool:
+    """Sniff a GET request line; plain socket clients send nothing and time out."""
+    conn.settimeout(0.25)
+    data = b""
+    try:
+        while b"\r\n\r\n" not in data and len(data) < 8192:
+            chunk = conn.recv(1024)
+            if not chunk:
+                break
+            data += chunk
+            if not data.startswith(b"GET"[: len(data)]):
+                break
+    except (socket.timeout, OSError):
+        pass
+    finally:
+        conn.settimeout(None)
+    return data.startswith(b"GET")
+
+
+class SocketServer:
+    def __init__(self, publisher: StatePublisher, listen: str = DEFAULT_LISTEN):
+        self.publisher = publisher
+        self.family, self.address = parse_listen(listen)
+        self._sock: Optional[socket.socket] = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        sock = socket.socket(self.family, socket.SOCK_STREAM)
+        if self.family == socket.AF_UNIX:
+            if os.path.exists(self.address):
+                os.unlink(self.address)  # stale socket from a previous run
+        else:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind(self.address)
+        sock.listen(16)
+        sock.settimeout(0.5)
+        self._sock = sock
+        self._thread = threading.Thread(target=self._run, name="daemon-accept", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=2.0)
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+        if self.family == socket.AF_UNIX and os.path.exists(self.address):
+            os.unlink(self.address)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                conn, _addr = self._sock.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+            threading.Thread(target=self._handshake, args=(conn,), daemon=True).start()
+
+    def _handshake(self, conn: socket.socket):
+        self.publisher.add_client(conn, sse=_is_http(conn))
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m djapp.daemon", description=__doc__.split("\n\n")[0].strip())
+    ap.add_argument("music_root")
+    ap.add_argument("--listen", default=DEFAULT_LISTEN, help="unix:/path or tcp:host:port")
+    ap.add_argument("--device", help="input device index or name substring (default: config)")
+    ap.add_argument("--file", help="play this recording in real time instead of capturing")
+    ap.add_argument("--shards", type=int, default=None, help="override index.shards")
+    args = ap.parse_args(argv)
+
+    cfg = load_config(default_config_path(args.music_root))
+    if args.shards is not None:
+        cfg = dict(cfg, index=dict(cfg.get("index") or {}, shards=args.shards))
+    if args.device is not None:
+        cfg["audio"]["device"] = int(args.device) if args.device.isdigit() else args.device
+    db = FingerprintDB(cfg["database"]["path"])
+    db.init_schema()
+
+    source = None
+    if args.file:
+        sr = int(cfg["audio"]["sample_rate"])
+        source = FileSource.from_file(args.file, sr, int(float(cfg["audio"]["block_seconds"]) * sr), realtime=True)
+    matcher = LiveMatcher(cfg, db, source=source)
+    publisher = StatePublisher(matcher)
+    server = SocketServer(publisher, args.listen)
+    dump_s = float((cfg.get("metrics") or {}).get("dump_seconds", METRICS_DUMP_SECONDS))
+    dumper = MetricsDumper(matcher.get_metrics, metrics_dump_path(args.music_root), dump_s)
+
+    done = threading.Event()
+    signal.signal(signal.SIGINT, lambda *_: done.set())
+    signal.signal(signal.SIGTERM, lambda *_: done.set())
+    if hasattr(signal, "SIGHUP"):
+        signal.signal(signal.SIGHUP, lambda *_: matcher.reload_index())
+
+    server.start()
+    publisher.start()
+    matcher.start()
+    dumper.start()
+    print(f"listening on {args.listen}", file=sys.stderr, flush=True)
+    try:
+        while not done.wait(0.5):
+            if source is not None and source.finished:
+                break
+    finally:
+        dumper.stop()
+        matcher.stop()
+        publisher.stop()
+        server.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,7 @@
 from __future__ import annotations
 import json
 import sqlite3
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 
 Hash = Tuple[int, int]  # (hash32, t_anchor_frame)
 
@@ -33,6 +33,30 @@ class FingerprintDB:
             )
             """
             )
+            c.execute(
+                """
+            CREATE TABLE IF NOT EXISTS aliases(
+              alias_id TEXT PRIMARY KEY,
+              canonical_id TEXT NOT NULL
+            )
+            """
+            )
+            c.execute(
+                """
+            CREATE TABLE IF NOT EXISTS meta(
+              key TEXT PRIMARY KEY,
+              value TEXT NOT NULL
+            )
+            """
+            )
+            c.execute(
+                """
+            CREATE TABLE IF NOT EXISTS lyrics(
+              track_id TEXT PRIMARY KEY,
+              timeline_json TEXT NOT NULL
+            )
+            """
+            )
             c.execute("CREATE INDEX IF NOT EXISTS idx_hash32 ON hashes(hash32)")
             c.execute("CREATE INDEX IF NOT EXISTS idx_hash32_track ON hashes(hash32, track_id)")
             c.commit()
@@ -58,6 +82,77 @@ class FingerprintDB:
             )
             c.commit()
 
+    def set_alias(self, alias_id: str, canonical_id: str):
+        """Mark alias_id as a duplicate of canonical_id; its hashes are dropped."""
+        with self._conn() as c:
+            c.execute("DELETE FROM hashes WHERE track_id=?", (alias_id,))
+            c.execute(
+                """
+              INSERT INTO aliases(alias_id, canonical_id) VALUES(?, ?)
+              ON CONFLICT(alias_id) DO UPDATE SET canonical_id=excluded.canonical_id
+            """,
+                (alias_id, canonical_id),
+            )
+            c.commit()
+
+    def clear_alias(self, track_id: str):
+        with self._conn() as c:
+            c.execute("DELETE FROM aliases WHERE alias_id=?", (track_id,))
+            c.commit()
+
+    def delete_track(self, track_id: str):
+        """Remove a track, its hashes and any alias record it had."""
+        with self._conn() as c:
+            c.execute("DELETE FROM hashes WHERE track_id=?", (track_id,))
+            c.execute("DELETE FROM aliases WHERE alias_id=?", (track_id,))
+            c.execute("DELETE FROM lyrics WHERE track_id=?", (track_id,))
+            c.execute("DELETE FROM tracks WHERE track_id=?", (track_id,))
+            c.commit()
+
+    def aliases(self) -> Dict[str, str]:
+        """alias_id -> canonical_id"""
+        with self._conn() as c:
+            return dict(c.execute("SELECT alias_id, canonical_id FROM aliases"))
+
+    def replace_lyrics(self, track_id: str, timeline_json: Optional[str]):
+        with self._conn() as c:
+            c.execute("DELETE FROM lyrics WHERE track_id=?", (track_id,))
+            if timeline_json is not None:
+                c.execute("INSERT INTO lyrics(track_id, timeline_json) VALUES(?, ?)", (track_id, timeline_json))
+            c.commit()
+
+    def all_lyrics(self) -> Dict[str, str]:
+        """track_id -> compiled timeline JSON"""
+        try:
+            with self._conn() as c:
+                return dict(c.execute("SELECT track_id, timeline_json FROM lyrics"))
+        except sqlite3.OperationalError:
+            return {}
+
+    def get_meta(self) -> Dict[str, str]:
+        try:
+            with self._conn() as c:
+                return dict(c.execute("SELECT key, value FROM meta"))
+        except sqlite3.OperationalError:
+            # DB from before the meta table existed
+            return {}
+
+    def set_meta(self, values: Dict[str, str]):
+        with self._conn() as c:
+            c.executemany(
+                """
+              INSERT INTO meta(key, value) VALUES(?, ?)
+              ON CONFLICT(key) DO UPDATE SET value=excluded.value
+            """,
+                [(k, str(v)) for k, v in values.items()],
+            )
+            c.commit()
+
+    def count_hashes(self) -> int:
+        with self._conn() as c:
+            row = c.execute("SELECT COUNT(*) FROM hashes").fetchone()
+        return int(row[0]) if row else 0
+
     def all_tracks_meta(self) -> Dict[str, dict]:
         out = {}
         with self._conn() as c:
@@ -1,43 +1,95 @@
 from __future__ import annotations
-from dataclasses import dataclass
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, List, Tuple
+
+BETA_MIN = 0.90
+BETA_MAX = 1.10
+IRLS_ITERATIONS = 5
 
 
 @dataclass
 class DriftModel:
+    """
+    track_time = alpha + beta * wall_time, fitted to recent match offsets.
+
+    Only the last `window` observations are kept, weighted down by age
+    (halving every `half_life` seconds) and fitted with a Huber loss, so
+    one bad offset barely moves the line. An observation more than `jump`
+    seconds off the line is held back; once `confirm` of them agree with
+    each other (a seek, a slipped beat, a wrong first lock) the model
+    re-anchors on them. beta stays at its prior (1.0, or whatever was set
+    after reset) until the kept points span `min_span` seconds.
+    """
+
     alpha: float = 0.0
     beta: float = 1.0
-    n: int = 0
-    sum_t: float = 0.0
-    sum_x: float = 0.0
-    sum_tt: float = 0.0
-    sum_tx: float = 0.0
+    window: int = 10
+    half_life: float = 8.0
+    huber: float = 0.04
+    jump: float = 0.25
+    confirm: int = 2
+    min_span: float = 6.0
+    points: Deque[Tuple[float, float]] = field(default_factory=deque)
+    pending: List[Tuple[float, float]] = field(default_factory=list)
+
+    def __post_init__(self):
+        self.points = deque(self.points, maxlen=max(2, self.window))
 
     def reset(self, initial_track_time: float, initial_wall_time: float):
-        self.alpha = initial_track_time
+        self.alpha = initial_track_time - initial_wall_time
         self.beta = 1.0
-        self.n = 0
-        self.sum_t = 0.0
-        self.sum_x = 0.0
-        self.sum_tt = 0.0
-        self.sum_tx = 0.0
+        self.points.clear()
+        self.pending = []
         self.update(wall_time=initial_wall_time, track_time=initial_track_time)
 
+    @property
+    def n(self) -> int:
+        return len(self.points)
+
     def update(self, wall_time: float, track_time: float):
-        self.n += 1
-        self.sum_t += wall_time
-        self.sum_x += track_time
-        self.sum_tt += wall_time * wall_time
-        self.sum_tx += wall_time * track_time
-
-        if self.n >= 2:
-            denom = (self.n * self.sum_tt - self.sum_t * self.sum_t)
-            if abs(denom) > 1e-9:
-                self.beta = (self.n * self.sum_tx - self.sum_t * self.sum_x) / denom
-                self.alpha = (self.sum_x - self.beta * self.sum_t) / self.n
-                if self.beta < 0.90:
-                    self.beta = 0.90
-                if self.beta > 1.10:
-                    self.beta = 1.10
+        if self.points and abs(track_time - self.predict(wall_time)) > self.jump:
+            self.pending.append((wall_time, track_time))
+            del self.pending[: -self.confirm]
+            if len(self.pending) < self.confirm or not self._consistent(self.pending):
+                return
+            self.points.clear()
+            self.points.extend(self.pending)
+        else:
+            self.points.append((wall_time, track_time))
+        self.pending = []
+        self._fit()
+
+    def _consistent(self, pts: List[Tuple[float, float]]) -> bool:
+        t_ref, x_ref = pts[-1]
+        return all(abs(x - x_ref - self.beta * (t - t_ref)) <= 2 * self.huber for t, x in pts)
+
+    def _fit(self):
+        # Centre on the newest point: alpha_c is the track time there
+        t_ref = self.points[-1][0]
+        ts = [t - t_ref for t, _x in self.points]
+        xs = [x for _t, x in self.points]
+        decay = [0.5 ** (-t / self.half_life) for t in ts]
+        fit_beta = ts[-1] - ts[0] >= self.min_span
+        beta = self.beta
+        alpha_c = self.predict(t_ref)
+        for _ in range(IRLS_ITERATIONS):
+            w = []
+            for t, x, d in zip(ts, xs, decay):
+                r = abs(x - alpha_c - beta * t)
+                w.append(d if r <= self.huber else d * self.huber / r)
+            sw = sum(w)
+            st = sum(wi * t for wi, t in zip(w, ts))
+            sx = sum(wi * x for wi, x in zip(w, xs))
+            if fit_beta:
+                stt = sum(wi * t * t for wi, t in zip(w, ts))
+                stx = sum(wi * t * x for wi, t, x in zip(w, ts, xs))
+                denom = sw * stt - st * st
+                if abs(denom) > 1e-9:
+                    beta = min(BETA_MAX, max(BETA_MIN, (sw * stx - st * sx) / denom))
+            alpha_c = (sx - beta * st) / sw
+        self.beta = beta
+        self.alpha = alpha_c - beta * t_ref
 
     def predict(self, wall_time: float) -> float:
         return self.alpha + self.beta * wall_time
@@ -1,10 +1,9 @@
 from __future__ import annotations
 import os
+import time
 import numpy as np
-import soundfile as sf
 from dataclasses import dataclass
-from scipy.signal import stft
-from scipy.ndimage import maximum_filter
+from typing import Callable, Iterable, Iterator, Optional, Tuple
 
 
 def _to_mono(x: np.ndarray) -> np.ndarray:
@@ -25,6 +24,8 @@ class Fingerprinter:
     max_dt: int = 60
 
     def _spectrogram(self, audio: np.ndarray):
+        from scipy.signal import stft
+
         _f, _t, Z = stft(
             audio,
             fs=self.sample_rate,
@@ -34,6 +35,8 @@ class Fingerprinter:
         return np.abs(Z)
 
     def _find_peaks(self, S: np.ndarray) -> np.ndarray:
+        from scipy.ndimage import maximum_filter
+
         eps = 1e-10
         logS = np.log(S + eps)
         neighborhood = (self.peak_neighborhood[0], self.peak_neighborhood[1])
@@ -70,12 +73,26 @@ class Fingerprinter:
         dt &= 0xFFF
         return (f1 << 22) | (f2 << 12) | dt
 
-    def fingerprint_audio(self, audio: np.ndarray):
+    def fingerprint_audio(self, audio: np.ndarray, observe: Optional[Callable[[str, float], None]] = None):
+        """observe(stage, seconds), if given, receives the stft/peaks/hashing timings."""
+        return self.hash_peaks(self.audio_peaks(audio, observe), observe)
+
+    def audio_peaks(self, audio: np.ndarray, observe: Optional[Callable[[str, float], None]] = None) -> np.ndarray:
+        """Constellation peaks as (t_frame, f_bin) rows."""
+        tm0 = time.perf_counter()
         audio = _to_mono(audio).astype(np.float32)
         audio = audio - np.mean(audio)
 
         S = self._spectrogram(audio)
+        tm1 = time.perf_counter()
         peaks = self._find_peaks(S)
+        if observe:
+            observe("stft", tm1 - tm0)
+            observe("peaks", time.perf_counter() - tm1)
+        return peaks
+
+    def hash_peaks(self, peaks: np.ndarray, observe: Optional[Callable[[str, float], None]] = None):
+        tm0 = time.perf_counter()
         if peaks.shape[0] < 10:
             return []
 
@@ -93,20 +110,158 @@ class Fingerprinter:
                     continue
                 h = self._hash_triplet(int(f1), int(f2), dt)
                 hashes.append((int(h), int(t1)))
+        if observe:
+            observe("hashing", time.perf_counter() - tm0)
         return hashes
 
     def fingerprint_file(self, path: str):
-        audio, sr = sf.read(path, always_2d=False)
-        x = _to_mono(audio).astype(np.float32)
-
-        if sr != self.sample_rate:
-            old_n = x.shape[0]
-            new_n = int(old_n * (self.sample_rate / sr))
-            xp = np.linspace(0, 1, old_n, endpoint=False)
-            xq = np.linspace(0, 1, new_n, endpoint=False)
+        return self.fingerprint_audio(load_audio(path, self.sample_rate))
+
+    def _hash_arrays(self, peaks: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Vectorized form of the pairing loop in fingerprint_audio (same hashes, other order)."""
+        peaks = peaks[np.argsort(peaks[:, 0], kind="stable")]
+        t = peaks[:, 0].astype(np.int64)
+        f = peaks[:, 1].astype(np.int64)
+        hs, ts = [], []
+        for j in range(1, self.fanout + 1):
+            if j >= t.size:
+                break
+            dt = t[j:] - t[:-j]
+            ok = (dt >= self.min_dt) & (dt <= self.max_dt)
+            h = ((f[:-j][ok] & 0x3FF) << 22) | ((f[j:][ok] & 0x3FF) << 12) | (dt[ok] & 0xFFF)
+            hs.append(h)
+            ts.append(t[:-j][ok])
+        if not hs:
+            return np.zeros(0, np.uint32), np.zeros(0, np.int32)
+        return np.concatenate(hs).astype(np.uint32), np.concatenate(ts).astype(np.int32)
+
+    def tempo_hashes(self, peaks: np.ndarray, ratio: float, pitch: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Hashes of peaks heard at ratio x the original speed, mapped back to
+        the original timeline: frames are scaled by ratio and, when the
+        playback also shifted pitch (turntable/vinyl mode), bins by 1/ratio.
+        Frames in the result are the original-speed frames.
+        """
+        if peaks.shape[0] < 10:
+            return np.zeros(0, np.uint32), np.zeros(0, np.int32)
+        scaled = np.empty_like(peaks)
+        scaled[:, 0] = np.rint(peaks[:, 0] * ratio)
+        scaled[:, 1] = np.rint(peaks[:, 1] / ratio) if pitch else peaks[:, 1]
+        return self._hash_arrays(scaled)
+
+    def fingerprint_stream(self, blocks: Iterable[np.ndarray], chunk_frames: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Fingerprint a recording of any length from consecutive mono blocks.
+
+        The spectrogram is computed once per chunk of chunk_frames frames
+        (plus a small margin so frames and peak neighbourhoods at chunk edges
+        match a whole-file STFT) and peaks are thresholded per chunk, like a
+        live window of the same length. Returns (hash32, frame) arrays with
+        frames counted from the start of the recording.
+        """
+        hop = self.hop_size
+        margin = self.fft_size // hop + self.peak_neighborhood[1]
+        chunk_frames = max(1, int(chunk_frames))
+        pending = np.zeros(0, np.float32)
+        base = 0  # recording sample index of pending[0]
+        next_frame = 0
+        peaks = []
+
+        def process(final: bool):
+            nonlocal pending, base, next_frame
+            avail = (base + pending.shape[0]) // hop
+            limit = avail if final else avail - margin
+            while next_frame < limit and (final or limit - next_frame >= chunk_frames):
+                f0 = next_frame
+                f1 = min(f0 + chunk_frames, limit)
+                lo = max(0, f0 - margin)
+                seg = pending[lo * hop - base : (f1 + margin) * hop - base]
+                p = self._find_peaks(self._spectrogram(seg - np.mean(seg)))
+                if p.size:
+                    p[:, 0] += lo
+                    peaks.append(p[(p[:, 0] >= f0) & (p[:, 0] < f1)])
+                next_frame = f1
+            keep_from = max(0, next_frame - margin) * hop
+            if keep_from > base:
+                pending = pending[keep_from - base :]
+                base = keep_from
+
+        for block in blocks:
+            pending = np.concatenate([pending, _to_mono(block).astype(np.float32)])
+            process(False)
+        process(True)
+
+        if not peaks:
+            return np.zeros(0, np.uint32), np.zeros(0, np.int32)
+        return self._hash_arrays(np.concatenate(peaks))
+
+
+def stream_audio(path: str, sample_rate: int, block_seconds: float = 60.0) -> Iterator[np.ndarray]:
+    """
+    Decode a file block by block as mono float32 at sample_rate, so long
+    recordings never sit in memory whole. Resampling is linear, like load_audio.
+    """
+    import soundfile as sf
+
+    with sf.SoundFile(path) as f:
+        sr = f.samplerate
+        ratio = sr / sample_rate
+        buf = np.zeros(0, np.float32)
+        pos = 0.0  # source position of the next output sample, relative to buf[0]
+        for block in f.blocks(blocksize=max(1, int(block_seconds * sr)), dtype="float32", always_2d=True):
+            x = block.mean(axis=1)
+            if sr == sample_rate:
+                yield x
+                continue
+            buf = np.concatenate([buf, x])
+            last = buf.shape[0] - 1
+            if last < pos:
+                continue
+            n_out = int((last - pos) // ratio) + 1
+            idx = pos + ratio * np.arange(n_out)
+            yield np.interp(idx, np.arange(buf.shape[0]), buf).astype(np.float32)
+            pos += ratio * n_out
+            drop = int(pos)
+            buf = buf[drop:]
+            pos -= drop
+
+
+def load_audio(path: str, sample_rate: int, mono: bool = True) -> np.ndarray:
+    """
+    Decode a file to float32 at sample_rate (linear resampling): mono, or
+    (samples, channels) with mono=False.
+    """
+    import soundfile as sf
+
+    audio, sr = sf.read(path, always_2d=not mono)
+    x = (_to_mono(audio) if mono else audio).astype(np.float32)
+
+    if sr != sample_rate:
+        old_n = x.shape[0]
+        new_n = int(old_n * (sample_rate / sr))
+        xp = np.linspace(0, 1, old_n, endpoint=False)
+        xq = np.linspace(0, 1, new_n, endpoint=False)
+        if mono:
             x = np.interp(xq, xp, x).astype(np.float32)
+        else:
+            x = np.stack([np.interp(xq, xp, x[:, c]) for c in range(x.shape[1])], axis=1).astype(np.float32)
+
+    return x
+
 
-        return self.fingerprint_audio(x)
+def fingerprinter_from_config(cfg: dict) -> Fingerprinter:
+    fp_cfg = cfg["fingerprinting"]
+    audio_cfg = cfg["audio"]
+    return Fingerprinter(
+        sample_rate=int(audio_cfg["sample_rate"]),
+        fft_size=int(fp_cfg["fft_size"]),
+        hop_size=int(fp_cfg["hop_size"]),
+        peak_neighborhood=tuple(fp_cfg["peak_neighborhood"]),
+        max_peaks_per_frame=int(fp_cfg["max_peaks_per_frame"]),
+        fanout=int(fp_cfg["fanout"]),
+        min_dt=int(fp_cfg["min_dt"]),
+        max_dt=int(fp_cfg["max_dt"]),
+    )
 
 
 def save_fp_cache(cache_path: str, hashes):
@@ -1,8 +1,6 @@
 from __future__ import annotations
 from dataclasses import dataclass
 from typing import Optional, Tuple
-from mutagen.mp3 import MP3
-from mutagen.id3 import ID3, APIC
 
 
 @dataclass
@@ -13,6 +11,8 @@ class TrackTags:
 
 
 def read_id3_tags(mp3_path: str) -> TrackTags:
+    from mutagen.mp3 import MP3
+
     audio = MP3(mp3_path)
     tags = audio.tags
     title = ""
@@ -39,6 +39,8 @@ def read_id3_tags(mp3_path: str) -> TrackTags:
 
 def extract_embedded_art(mp3_path: str) -> Optional[Tuple[bytes, str]]:
     """Return (image_bytes, mime) if embedded art exists, else None."""
+    from mutagen.id3 import ID3
+
     try:
         id3 = ID3(mp3_path)
     except Exception:
@@ -48,5 +50,5 @@ def extract_embedded_art(mp3_path: str) -> Optional[Tuple[bytes, str]]:
     if not apics:
         return None
 
-    apic: APIC = apics[0]
+    apic = apics[0]
     return apic.data, apic.mime
@@ -0,0 +1,255 @@
+from __future__ import annotations
+import os
+import json
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+import numpy as np
+
+from djapp.db import FingerprintDB
+from djapp.lrc import load_lrc
+from djapp.fingerprint import fingerprinter_from_config, load_fp_cache, save_fp_cache
+from djapp.scanlib import config_stamp, default_config_path, default_db_path
+
+DEDUP_SAMPLE = 400  # hashes per track used to look for a duplicate
+DEDUP_MIN_RATIO = 0.25
+DEDUP_MAX_LENGTH_DIFF = 0.02
+
+# Bump when the DB layout or hash format changes; older DBs are not "ready"
+INDEX_VERSION = 1
+
+# Held by anything that writes the index (full rebuilds, the library watcher)
+INDEX_LOCK = threading.RLock()
+
+
+def load_or_fingerprint(t: dict, finger) -> list:
+    cache_path = t.get("fingerprint_cache")
+    if cache_path and os.path.exists(cache_path):
+        # A cache older than its audio file belongs to a replaced mp3
+        if os.path.getmtime(cache_path) >= os.path.getmtime(t["audio_file"]):
+            return load_fp_cache(cache_path)
+    hashes = finger.fingerprint_file(t["audio_file"])
+    if cache_path:
+        save_fp_cache(cache_path, hashes)
+    return hashes
+
+
+def _sample(hashes: list, n: int) -> list:
+    if len(hashes) <= n:
+        return hashes
+    idx = np.linspace(0, len(hashes) - 1, n).astype(np.int64)
+    return [hashes[i] for i in idx.tolist()]
+
+
+def _overlap_ratio(a: list, b: list, off: int) -> float:
+    """Fraction of a's hashes found in b at b_t = a_t + off (+/- 1 frame)."""
+    if not a:
+        return 0.0
+    b_set = set((int(h), int(t)) for h, t in b)
+    hit = 0
+    for h, t in a:
+        h = int(h)
+        t = int(t) + off
+        if (h, t) in b_set or (h, t - 1) in b_set or (h, t + 1) in b_set:
+            hit += 1
+    return hit / len(a)
+
+
+def _length_frames(hashes: list) -> int:
+    return max(int(t) for _h, t in hashes) if hashes else 0
+
+
+def find_duplicate(
+    db,
+    hashes: list,
+    load_hashes: Callable[[str], Optional[list]],
+    min_ratio: float = DEDUP_MIN_RATIO,
+) -> Optional[Tuple[str, int]]:
+    """
+    Use the existing index to find a track that carries the same audio.
+
+    A sample of the new track's hashes is voted against the DB; the top
+    candidate is then verified in both directions on the full hash sets so a
+    radio edit or a track that merely contains the other is not aliased.
+    Returns (canonical_track_id, offset_frames) or None.
+    """
+    if not hashes:
+        return None
+    sample = _sample(hashes, DEDUP_SAMPLE)
+    rows = db.query_hashes([int(h) for h, _t in sample])
+    if not rows:
+        return None
+
+    live_t_by_hash: Dict[int, List[int]] = {}
+    for h, t in sample:
+        live_t_by_hash.setdefault(int(h), []).append(int(t))
+    votes: Dict[Tuple[str, int], int] = {}
+    for h, track_id, db_t in rows:
+        for live_t in live_t_by_hash.get(int(h), []):
+            key = (track_id, int(db_t) - live_t)
+            votes[key] = votes.get(key, 0) + 1
+
+    (cand, off), n = max(votes.items(), key=lambda kv: kv[1])
+    if n < min_ratio * len(sample):
+        return None
+
+    other = load_hashes(cand)
+    if not other:
+        return None
+    la, lb = _length_frames(hashes), _length_frames(other)
+    if abs(la - lb) > DEDUP_MAX_LENGTH_DIFF * max(la, lb):
+        return None
+    if _overlap_ratio(hashes, other, off) < min_ratio:
+        return None
+    if _overlap_ratio(other, hashes, -off) < min_ratio:
+        return None
+    return cand, off
+
+
+def compile_lyrics(t: dict) -> Optional[str]:
+    """Parse the track's .lrc once at index time; the matcher never reads the file."""
+    path = t.get("lrc_file")
+    if not path:
+        return None
+    try:
+        return load_lrc(path).to_json()
+    except (OSError, UnicodeDecodeError):
+        return None
+
+
+def _dedup_settings(cfg: dict) -> Tuple[bool, float]:
+    dedup_cfg = cfg.get("dedup") or {}
+    return bool(dedup_cfg.get("enabled", True)), float(dedup_cfg.get("min_match_ratio", DEDUP_MIN_RATIO))
+
+
+def index_track(
+    cfg: dict,
+    db,
+    t: dict,
+    hashes: list,
+    load_hashes: Callable[[str], Optional[list]],
+) -> Optional[str]:
+    """
+    Store one track's metadata and hashes, or record it as an alias of an
+    already indexed track carrying the same audio. Returns the canonical id
+    if it was aliased.
+    """
+    dedup, min_ratio = _dedup_settings(cfg)
+    db.upsert_track(track_id=t["id"], meta=t)
+    db.replace_lyrics(t["id"], compile_lyrics(t))
+
+    # Drop our own previous hashes first so we do not match ourselves
+    db.replace_hashes(track_id=t["id"], hashes=[])
+    dup = find_duplicate(db, hashes, load_hashes, min_ratio) if dedup else None
+    if dup:
+        db.set_alias(t["id"], dup[0])
+        return dup[0]
+    db.clear_alias(t["id"])
+    db.replace_hashes(track_id=t["id"], hashes=hashes)
+    return None
+
+
+def remove_track(cfg: dict, db, track_id: str, load_hashes: Callable[[str], Optional[list]]):
+    """
+    Delete a track from the index. If other folders were aliases of it, the
+    first one is promoted to canonical and the rest re-point to it.
+    """
+    orphans = sorted(a for a, c in db.aliases().items() if c == track_id)
+    db.delete_track(track_id)
+    if not orphans:
+        return
+    new_canonical = orphans[0]
+    db.clear_alias(new_canonical)
+    db.replace_hashes(track_id=new_canonical, hashes=load_hashes(new_canonical) or [])
+    for a in orphans[1:]:
+        db.set_alias(a, new_canonical)
+
+
+def build_index(cfg: dict, db, progress: Optional[Callable[[int, int], None]] = None) -> Dict[str, str]:
+    """
+    Fill the DB from the config's track list, fingerprinting tracks without a
+    cache. With dedup enabled, tracks carrying the same audio as an already
+    indexed track are stored once: the copy keeps its own metadata row (LRC,
+    background) but is recorded as an alias and gets no hashes.
+
+    Returns alias_id -> canonical_id for this build.
+    """
+    finger = fingerprinter_from_config(cfg)
+    by_id = {t["id"]: t for t in cfg["tracks"]}
+
+    def load_hashes(track_id: str) -> Optional[list]:
+        t = by_id.get(track_id)
+        return load_or_fingerprint(t, finger) if t else None
+
+    aliases: Dict[str, str] = {}
+    n = len(cfg["tracks"])
+    for i, t in enumerate(cfg["tracks"]):
+        canonical = index_track(cfg, db, t, load_or_fingerprint(t, finger), load_hashes)
+        if canonical:
+            aliases[t["id"]] = canonical
+        if progress:
+            progress(i + 1, n)
+    return aliases
+
+
+def rebuild_db(cfg: dict, progress: Optional[Callable[[int, int], None]] = None) -> Dict[str, str]:
+    """
+    Build a complete new DB next to the live one and atomically replace it.
+
+    Readers (a running LiveMatcher, shard workers loading) never see a
+    half-written index: they either open the old file or the new one.
+    """
+    db_path = cfg["database"]["path"]
+    staging = db_path + ".building"
+    for p in (staging, staging + "-journal"):
+        if os.path.exists(p):
+            os.remove(p)
+
+    with INDEX_LOCK:
+        db = FingerprintDB(staging)
+        db.init_schema()
+        aliases = build_index(cfg, db, progress)
+        mark_index_ready(db, cfg, n_hashes=db.count_hashes())
+        os.replace(staging, db_path)
+    return aliases
+
+
+def mark_index_ready(db, cfg: dict, n_hashes: Optional[int] = None):
+    """
+    Record in the DB that it matches cfg, and keep a copy of cfg there.
+
+    Startup then only needs this one small table instead of parsing the YAML
+    config and counting the hashes table. The YAML file's stamp ties the
+    copy to the file it came from, so a hand-edited config is still honored.
+    """
+    values = {
+        "index_version": INDEX_VERSION,
+        "n_tracks": len(cfg.get("tracks") or []),
+        "config_stamp": config_stamp(default_config_path(cfg["music_root"])),
+        "config_json": json.dumps(cfg, ensure_ascii=False),
+    }
+    if n_hashes is not None:
+        values["n_hashes"] = n_hashes
+    db.set_meta(values)
+
+
+def load_ready_config(music_root: str) -> Optional[dict]:
+    """
+    Fast startup path: the config stored by mark_index_ready, if the DB is
+    current and the YAML file has not changed since. Fingerprint caches are
+    not checked here; missing ones are regenerated when they are needed.
+    """
+    db_path = default_db_path(music_root)
+    if not os.path.exists(db_path):
+        return None
+    meta = FingerprintDB(db_path).get_meta()
+    try:
+        if int(meta.get("index_version", 0)) != INDEX_VERSION or int(meta.get("n_hashes", 0)) <= 0:
+            return None
+    except ValueError:
+        return None
+    if meta.get("config_stamp") != config_stamp(default_config_path(music_root)):
+        return None
+    try:
+        return json.loads(meta["config_json"])
+    except (KeyError, ValueError):
+        return None
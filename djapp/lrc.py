@@ -1,6 +1,8 @@
 from __future__ import annotations
 import re
-from dataclasses import dataclass
+import json
+from bisect import bisect_right
+from dataclasses import dataclass, field
 from typing import List, Optional, Tuple
 
 
@@ -13,22 +15,51 @@ class LRCLine:
 @dataclass
 class LRC:
     lines: List[LRCLine]
+    _times: List[float] = field(default_factory=list, init=False, repr=False, compare=False)
+    _cursor: int = field(default=-1, init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self._times = [ln.t for ln in self.lines]
+
+    def line_index(self, t: float) -> int:
+        """Index of the line showing at time t, -1 before the first line."""
+        times = self._times
+        c = self._cursor
+        # Playback is monotonic between seeks: try the cached line and the next one
+        if 0 <= c < len(times) and times[c] <= t:
+            if c + 1 >= len(times) or t < times[c + 1]:
+                return c
+            if c + 2 >= len(times) or t < times[c + 2]:
+                self._cursor = c + 1
+                return c + 1
+        c = bisect_right(times, t) - 1
+        self._cursor = c
+        return c
+
+    def next_time(self, t: float) -> Optional[float]:
+        """Start time of the first line after t, or None after the last line."""
+        i = self.line_index(t) + 1
+        return self._times[i] if i < len(self._times) else None
 
     def current_line(self, t: float) -> Tuple[Optional[str], Optional[str]]:
         if not self.lines:
             return None, None
-        idx = None
-        for i in range(len(self.lines)):
-            if self.lines[i].t <= t:
-                idx = i
-            else:
-                break
-        if idx is None:
+        idx = self.line_index(t)
+        if idx < 0:
             return None, self.lines[0].text
         cur = self.lines[idx].text
         nxt = self.lines[idx + 1].text if idx + 1 < len(self.lines) else None
         return cur, nxt
 
+    def to_json(self) -> str:
+        """Compact timeline for storing with the index."""
+        return json.dumps({"t": self._times, "text": [ln.text for ln in self.lines]}, ensure_ascii=False)
+
+    @classmethod
+    def from_json(cls, data: str) -> "LRC":
+        d = json.loads(data)
+        return cls(lines=[LRCLine(t=t, text=text) for t, text in zip(d["t"], d["text"])])
+
 
 _TIME_RE = re.compile(r"\[(\d+):(\d+(?:\.\d+)?)\]")
 
@@ -1,22 +1,224 @@
 from __future__ import annotations
+import os
+import sys
 import time
 import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from typing import Optional
 import numpy as np
-import sounddevice as sd
 
-from djapp.audioio import resolve_input_device
-from djapp.fingerprint import Fingerprinter
+from djapp.audioio import MicSource, resolve_input_device
+from djapp.fingerprint import fingerprinter_from_config
 from djapp.drift import DriftModel
-from djapp.lrc import load_lrc
+from djapp.lrc import LRC, load_lrc
+from djapp.metrics import Metrics
+from djapp.shards import IndexShardError, ShardedIndex, resolve_shard_count
+
+
+class IndexSnapshot:
+    """
+    One generation of the searchable index plus the track metadata it was
+    built with. LiveMatcher keeps an active snapshot and can load a new one
+    in the background, so both halves are always swapped together.
+    """
+
+    def __init__(self, db, n_shards: int):
+        self.db = db
+        self.meta_by_id = db.all_tracks_meta()
+        self.aliases_of = {}
+        for alias_id, canonical_id in db.aliases().items():
+            self.aliases_of.setdefault(canonical_id, []).append(alias_id)
+        self.index = ShardedIndex(db.path, n_shards) if n_shards > 1 else None
+
+        # Timelines compiled at index time; DBs built before that fall back
+        # to parsing the files here, still ahead of any track switch.
+        self.lrc_by_id = {}
+        for track_id, timeline in db.all_lyrics().items():
+            self.lrc_by_id[track_id] = LRC.from_json(timeline)
+        for track_id, meta in self.meta_by_id.items():
+            if track_id not in self.lrc_by_id and meta.get("lrc_file"):
+                try:
+                    self.lrc_by_id[track_id] = load_lrc(meta["lrc_file"])
+                except (OSError, UnicodeDecodeError):
+                    pass
+
+    def start(self):
+        if self.index is not None:
+            self.index.start()
+
+    def wait_ready(self):
+        if self.index is not None:
+            self.index.wait_ready()
+
+    def close(self):
+        if self.index is not None:
+            self.index.close()
+
+    def _vote_db(self, hashes, observe=None):
+        t0 = time.perf_counter()
+        hash32_vals = [h for (h, _t) in hashes]
+        rows = self.db.query_hashes(hash32_vals)
+        t1 = time.perf_counter()
+        if observe:
+            observe("db_query", t1 - t0)
+        if not rows:
+            return {}
+
+        live_t_by_hash = {}
+        for h, t in hashes:
+            live_t_by_hash.setdefault(int(h), []).append(int(t))
+
+        votes = {}
+        for h, track_id, db_t in rows:
+            h = int(h)
+            db_t = int(db_t)
+            for live_t in live_t_by_hash.get(h, []):
+                off = db_t - int(live_t)
+                d = votes.setdefault(track_id, {})
+                d[off] = d.get(off, 0) + 1
+        if observe:
+            observe("voting", time.perf_counter() - t1)
+        return votes
+
+    def vote(self, hashes, observe=None):
+        """
+        observe(stage, seconds) receives the query/voting split (one
+        "shard_vote" for shards). If a shard worker dies, this snapshot falls
+        back to querying SQLite until the next index reload starts new ones.
+        """
+        if self.index is not None and not self.index.failed:
+            t0 = time.perf_counter()
+            try:
+                votes = self.index.vote(hashes)
+            except IndexShardError as e:
+                print(f"{e}; querying the database directly until the index reloads", file=sys.stderr, flush=True)
+            else:
+                if observe:
+                    observe("shard_vote", time.perf_counter() - t0)
+                return votes
+        return self._vote_db(hashes, observe)
+
+    def meta_for(self, track_id: str):
+        """Canonical meta, with LRC/background borrowed from duplicate folders if missing."""
+        meta = self.meta_by_id.get(track_id)
+        if not meta:
+            return None
+        for alias_id in self.aliases_of.get(track_id, []):
+            alt = self.meta_by_id.get(alias_id) or {}
+            if not meta.get("lrc_file") and alt.get("lrc_file"):
+                meta = dict(meta, lrc_file=alt["lrc_file"], lrc_track_id=alias_id)
+            if not (meta.get("background") or {}).get("path") and (alt.get("background") or {}).get("path"):
+                meta = dict(meta, background=alt["background"])
+        return meta
+
+    def lrc_for(self, meta: dict) -> Optional[LRC]:
+        return self.lrc_by_id.get(meta.get("lrc_track_id") or meta.get("id"))
+
+
+# Query frames of tempo variant k are shifted by k * TEMPO_STRIDE so one vote
+# keeps them apart; tracks must be shorter than TEMPO_STRIDE / 2 frames (~6.7 h)
+TEMPO_STRIDE = 1 << 22
+TEMPO_MAX_HASHES = 30000
+TEMPO_MARGIN = 2.0
+
+
+def tempo_ratios(cfg: dict) -> list:
+    """
+    Playback ratios other than 1.0 to try, from tempo.max_percent and
+    tempo.step_percent, nearest first. Hashes only survive about half a
+    percent of speed change, so the step must stay that fine.
+    """
+    tempo_cfg = cfg.get("tempo") or {}
+    max_pct = float(tempo_cfg.get("max_percent", 0.0))
+    step = float(tempo_cfg.get("step_percent", 0.5))
+    if max_pct <= 0 or step <= 0:
+        return []
+    n = int(max_pct / step + 1e-9)
+    out = []
+    for k in range(1, n + 1):
+        out += [1.0 + k * step / 100.0, 1.0 - k * step / 100.0]
+    return out
+
+
+class InputChannel:
+    """
+    One monitored input (a device, or one channel of it): its own ring
+    buffer, locked track and drift model. All inputs share the index.
+    """
+
+    def __init__(self, name: str, channel: int, buf_n: int, priority: int = 0):
+        self.name = name
+        self.channel = channel
+        self.priority = priority
+
+        self.buf_n = buf_n
+        self.buf = np.zeros(buf_n, dtype=np.float32)
+        self.buf_pos = 0
+        # Clock time the newest buffered sample arrived; match offsets refer to it
+        self.buf_time = None
+
+        self.track_id = None
+        self.conf = 0
+        self.meta = None
+        self.candidates = []
+        self.wall_t0 = None
+        self.drift = DriftModel()
+        self.lrc = None
+        # Smoothed confidence of the locked track, used to pick the dominant input
+        self.score = 0.0
+        self.last_confident = None
+        self.next_match = 0.0
+        # Playback ratio of the last confident match, tried first next window
+        self.tempo = 1.0
+
+    def append(self, x: np.ndarray, now: float):
+        self.buf_time = now
+        n = x.shape[0]
+        if n >= self.buf_n:
+            self.buf[:] = x[-self.buf_n :]
+            self.buf_pos = 0
+            return
+        end = self.buf_pos + n
+        if end <= self.buf_n:
+            self.buf[self.buf_pos : end] = x
+        else:
+            k = self.buf_n - self.buf_pos
+            self.buf[self.buf_pos :] = x[:k]
+            self.buf[: end - self.buf_n] = x[k:]
+        self.buf_pos = (self.buf_pos + n) % self.buf_n
+
+    def ordered(self) -> np.ndarray:
+        return np.concatenate([self.buf[self.buf_pos :], self.buf[: self.buf_pos]])
+
+    def track_time(self, now: float):
+        if self.wall_t0 is None:
+            return None
+        return max(0.0, float(self.drift.predict(now - self.wall_t0)))
 
 
 class LiveMatcher:
-    def __init__(self, cfg: dict, db):
+    RUNNER_UPS = 3
+    # An input whose last confident match is older than this cannot be shown
+    INPUT_STALE_SECONDS = 5.0
+    # A dominant input must beat the shown one by this factor to take over
+    DOMINANCE_MARGIN = 1.25
+
+    def __init__(self, cfg: dict, db, source=None):
+        """
+        source feeds audio (see djapp.audioio.MicSource / FileSource) and
+        supplies the clock all matcher timestamps are taken from; the
+        configured input device(s) are used when omitted.
+
+        audio.inputs, if set, lists several inputs to monitor at once, each
+        {name, device, channel, priority}. Inputs on the same device share
+        one stream; with an explicit source, channel indexes its blocks.
+        audio.select picks the input the state follows: "dominant" (best
+        recent confidence) or "priority" (lowest priority among locked inputs).
+        """
         self.cfg = cfg
         self.db = db
-        self.meta_by_id = db.all_tracks_meta()
 
-        fp_cfg = cfg["fingerprinting"]
         audio_cfg = cfg["audio"]
 
         self.sample_rate = int(audio_cfg["sample_rate"])
@@ -25,167 +227,438 @@ class LiveMatcher:
         self.listen_seconds = float(audio_cfg["listen_seconds"])
         self.match_every = float(audio_cfg["match_every_seconds"])
         self.min_conf = int(audio_cfg["min_confidence"])
-        self.device = resolve_input_device(audio_cfg.get("device"))
-
-        self.fp = Fingerprinter(
-            sample_rate=self.sample_rate,
-            fft_size=int(fp_cfg["fft_size"]),
-            hop_size=int(fp_cfg["hop_size"]),
-            peak_neighborhood=tuple(fp_cfg["peak_neighborhood"]),
-            max_peaks_per_frame=int(fp_cfg["max_peaks_per_frame"]),
-            fanout=int(fp_cfg["fanout"]),
-            min_dt=int(fp_cfg["min_dt"]),
-            max_dt=int(fp_cfg["max_dt"]),
-        )
+        self.select = str(audio_cfg.get("select") or "dominant")
+
+        self.buf_n = int(self.listen_seconds * self.sample_rate)
+        input_cfgs = audio_cfg.get("inputs") or [{"name": "main", "device": audio_cfg.get("device"), "channel": 0}]
+        self.inputs = []
+        routes = {}  # device -> [(input, channel)]
+        for i, icfg in enumerate(input_cfgs):
+            inp = InputChannel(
+                str(icfg.get("name") or f"input {i + 1}"),
+                int(icfg.get("channel") or 0),
+                self.buf_n,
+                int(icfg.get("priority", i)),
+            )
+            self.inputs.append(inp)
+            routes.setdefault(None if source is not None else icfg.get("device"), []).append(inp)
+
+        if source is not None:
+            self.sources = [(source, routes[None])]
+        else:
+            block_n = int(self.block_seconds * self.sample_rate)
+            self.sources = []
+            for device, inps in routes.items():
+                channels = max(self.channels, max(p.channel for p in inps) + 1)
+                src = MicSource(resolve_input_device(device), channels, self.sample_rate, block_n)
+                self.sources.append((src, inps))
+        self.source = self.sources[0][0]
+        self.clock = self.source.clock
+
+        self.fp = fingerprinter_from_config(cfg)
+        self.tempo_ratios = tempo_ratios(cfg)
+        self.tempo_step = min((abs(r - 1.0) for r in self.tempo_ratios), default=0.0)
+        tempo_cfg = cfg.get("tempo") or {}
+        self.tempo_pitch = bool(tempo_cfg.get("pitch", True))
+        self.tempo_max_hashes = int(tempo_cfg.get("max_hashes", TEMPO_MAX_HASHES))
+
+        # index.shards: 1 (or missing) = query SQLite from the matcher thread,
+        # 0 = one shard worker per core once the index is large, N = N shard workers
+        self.shards_cfg = (cfg.get("index") or {}).get("shards")
+        self.n_shards = self._shard_count(db)
+        self.snapshot = IndexSnapshot(db, self.n_shards)
+        self._pending_snapshot = None
+        self._reload_thread = None
 
         self._lock = threading.Lock()
         self._running = False
+        self.shown = self.inputs[0]
 
-        self.current_track_id = None
-        self.current_conf = 0
-        self.current_wall_t0 = None
-        self.drift = DriftModel()
-        self.lrc = None
+        self._thread = None
+        self._pool = None
+        self._listeners = []
+        self.metrics = Metrics()
+        # on_window(result_or_None, seconds_spent) at the end of every match cycle
+        self.on_window = None
 
-        self.buf_n = int(self.listen_seconds * self.sample_rate)
-        self.buf = np.zeros(self.buf_n, dtype=np.float32)
-        self.buf_pos = 0
+    def add_listener(self, fn):
+        """
+        fn(state) is called from the matcher thread whenever the published
+        state changes (track switch, drift update, index swap, shown input).
+        state is the same dict get_state() returns; listeners must not block.
+        """
+        self._listeners.append(fn)
 
-        self._thread = None
+    def remove_listener(self, fn):
+        if fn in self._listeners:
+            self._listeners.remove(fn)
+
+    def _publish(self):
+        if not self._listeners:
+            return
+        st = self.get_state()
+        for fn in list(self._listeners):
+            try:
+                fn(st)
+            except Exception:
+                pass
+
+    def get_metrics(self) -> dict:
+        """
+        Stage timing histograms (ms) and counters since start. Matcher stages:
+        buffer_copy, stft, peaks, hashing, db_query + voting (or shard_vote),
+        drift and match (one input's cycle); audio_callback and the
+        audio_overflow / audio_status counters come from the input streams;
+        the presentation adds its ui_* stages.
+        """
+        return self.metrics.snapshot()
 
     def start(self):
         if self._running:
             return
         self._running = True
-        self._thread = threading.Thread(target=self._run, daemon=True)
+        self.snapshot.start()
+        if len(self.inputs) > 1:
+            self._pool = ThreadPoolExecutor(
+                max_workers=min(len(self.inputs), os.cpu_count() or 1), thread_name_prefix="match"
+            )
+        self._thread = threading.Thread(target=self._run, name="matcher", daemon=True)
         self._thread.start()
 
+    def join(self, timeout=None):
+        """Wait for the matcher thread, e.g. until a file source runs out."""
+        if self._thread:
+            self._thread.join(timeout)
+
     def stop(self):
         self._running = False
         if self._thread:
             self._thread.join(timeout=2.0)
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+        if self._reload_thread:
+            self._reload_thread.join(timeout=5.0)
+        self.snapshot.close()
+        with self._lock:
+            pending, self._pending_snapshot = self._pending_snapshot, None
+        if pending is not None:
+            pending.close()
+
+    def reload_index(self, db=None):
+        """
+        Load the current DB contents into a fresh snapshot in the background.
+
+        The running snapshot keeps serving matches until the new one is fully
+        loaded; _run then swaps it in between two match cycles.
+        """
+        if db is not None:
+            self.db = db
+        t = threading.Thread(target=self._load_snapshot, args=(self.db,), daemon=True)
+        self._reload_thread = t
+        t.start()
+
+    def _shard_count(self, db) -> int:
+        if self.shards_cfg is None or int(self.shards_cfg) != 0:
+            return resolve_shard_count(self.shards_cfg)
+        # The count stored by mark_index_ready; an index without one stays in-process
+        try:
+            n_hashes = int(db.get_meta().get("n_hashes", 0))
+        except ValueError:
+            n_hashes = 0
+        return resolve_shard_count(0, n_hashes)
+
+    def _load_snapshot(self, db):
+        n_shards = self._shard_count(db)
+        snap = IndexSnapshot(db, n_shards)
+        try:
+            snap.start()
+            snap.wait_ready()
+        except IndexShardError as e:
+            snap.close()
+            print(f"{e}; keeping the current index", file=sys.stderr, flush=True)
+            return
+        self.n_shards = n_shards
+        if not self._running:
+            snap.close()
+            return
+        with self._lock:
+            old, self._pending_snapshot = self._pending_snapshot, snap
+        if old is not None:
+            old.close()
+
+    def _swap_pending_snapshot(self):
+        with self._lock:
+            snap, self._pending_snapshot = self._pending_snapshot, None
+            if snap is None:
+                return
+            old, self.snapshot = self.snapshot, snap
+            # Keep each input's track (and its drift/LRC) if it survived the rebuild
+            for inp in self.inputs:
+                if inp.track_id is not None:
+                    meta = snap.meta_for(inp.track_id)
+                    if meta is not None:
+                        inp.meta = meta
+                        inp.lrc = snap.lrc_for(meta) or inp.lrc
+        old.close()
+        self._publish()
 
     def get_state(self):
         with self._lock:
+            inp = self.shown
+            now = self.clock.monotonic()
             return {
-                "track_id": self.current_track_id,
-                "confidence": self.current_conf,
-                "meta": self.meta_by_id.get(self.current_track_id) if self.current_track_id else None,
-                "track_time": self._current_track_time_locked(),
-                "lrc": self.lrc,
+                "track_id": inp.track_id,
+                "confidence": inp.conf,
+                "meta": inp.meta,
+                "track_time": inp.track_time(now),
+                "lrc": inp.lrc,
+                "candidates": inp.candidates,
+                # Time model so consumers can extrapolate without polling:
+                # track_time(now) = alpha + beta * (time.monotonic() - wall_t0)
+                "wall_t0": inp.wall_t0,
+                "alpha": inp.drift.alpha,
+                "beta": inp.drift.beta,
+                "stamp": now,
+                "input": inp.name,
+                "inputs": [
+                    {"name": i.name, "track_id": i.track_id, "confidence": i.conf, "score": i.score}
+                    for i in self.inputs
+                ],
             }
 
-    def _current_track_time_locked(self):
-        if self.current_wall_t0 is None:
-            return None
-        wall_now = time.monotonic()
-        wall_rel = wall_now - self.current_wall_t0
-        return max(0.0, float(self.drift.predict(wall_rel)))
+    def _router(self, inputs):
+        """Audio callback for one source: mono blocks feed channel 0, multichannel blocks are split."""
 
-    def _append_audio(self, x: np.ndarray):
-        n = x.shape[0]
-        if n >= self.buf_n:
-            self.buf[:] = x[-self.buf_n :]
-            self.buf_pos = 0
-            return
-        end = self.buf_pos + n
-        if end <= self.buf_n:
-            self.buf[self.buf_pos : end] = x
-        else:
-            k = self.buf_n - self.buf_pos
-            self.buf[self.buf_pos :] = x[:k]
-            self.buf[: end - self.buf_n] = x[k:]
-        self.buf_pos = (self.buf_pos + n) % self.buf_n
+        def on_audio(x: np.ndarray):
+            t0 = time.perf_counter()
+            now = self.clock.monotonic()
+            for inp in inputs:
+                if x.ndim == 1:
+                    if inp.channel == 0:
+                        inp.append(x, now)
+                elif inp.channel < x.shape[1]:
+                    inp.append(x[:, inp.channel], now)
+            self.metrics.observe("audio_callback", time.perf_counter() - t0)
 
-    def _get_buffer_ordered(self):
-        return np.concatenate([self.buf[self.buf_pos :], self.buf[: self.buf_pos]])
+        return on_audio
 
-    def _match_segment(self, audio_segment: np.ndarray):
-        hashes = self.fp.fingerprint_audio(audio_segment)
+    def _on_audio_status(self, status):
+        if getattr(status, "input_overflow", False):
+            self.metrics.incr("audio_overflow")
+        else:
+            self.metrics.incr("audio_status")
+
+    def _match_segment(self, audio_segment: np.ndarray, tempo_hint: float = 1.0):
+        """
+        Best match for one window. Tempo-shifted playback is tried when the
+        straight lookup is not confident: first the input's last ratio
+        alongside the straight hashes, then a sweep over the configured
+        ratios within the tempo.max_hashes budget and a refinement around
+        the winner; each batch is a single vote, so the cost is bounded.
+        """
+        observe = self.metrics.observe
+        peaks = self.fp.audio_peaks(audio_segment, observe)
+        hashes = self.fp.hash_peaks(peaks, observe)
         if not hashes:
             return None
 
-        hash32_vals = [h for (h, _t) in hashes]
-        rows = self.db.query_hashes(hash32_vals)
-        if not rows:
-            return None
+        ratios = [1.0]
+        if tempo_hint != 1.0 and self.tempo_ratios:
+            ratios.append(tempo_hint)
+        res = self._vote_variants(peaks, hashes, ratios, 0, observe)
+        if (res and res["confidence"] >= self.min_conf) or not self.tempo_ratios:
+            return res
 
-        live_t_by_hash = {}
-        for h, t in hashes:
-            live_t_by_hash.setdefault(int(h), []).append(int(t))
+        # Coarse sweep on thinned hashes finds the ratio, then all hashes at
+        # that ratio and half a step either side give the real confidence
+        t0 = time.perf_counter()
+        sweep = [r for r in self.tempo_ratios if r not in ratios]
+        alt = self._vote_variants(peaks, None, sweep, self.tempo_max_hashes)
+        if alt:
+            r = alt["tempo"]
+            half = self.tempo_step / 2.0
+            fine = self._vote_variants(peaks, None, [r, r - half, r + half])
+            if fine and fine["confidence"] >= alt["confidence"]:
+                alt = fine
+        observe("tempo_sweep", time.perf_counter() - t0)
+        # Many ratios give chance hits many chances: a shifted match must also
+        # stand clear of every other track
+        if (
+            alt
+            and alt["confidence"] > (res["confidence"] if res else 0)
+            and alt["confidence"] >= TEMPO_MARGIN * alt["runner_up_confidence"]
+        ):
+            return alt
+        return res
 
-        votes = {}
-        for h, track_id, db_t in rows:
-            h = int(h)
-            db_t = int(db_t)
-            for live_t in live_t_by_hash.get(h, []):
-                off = db_t - int(live_t)
-                d = votes.setdefault(track_id, {})
-                d[off] = d.get(off, 0) + 1
+    def _vote_variants(self, peaks: np.ndarray, hashes, ratios, budget: int = 0, observe=None):
+        """
+        Vote hashes for every playback ratio in one lookup. Variant k's query
+        frames are shifted down by k * TEMPO_STRIDE, so its votes land in a
+        separate offset band of the same histogram; budget caps the total
+        number of query hashes by thinning each variant evenly.
+        """
+        if ratios == [1.0]:
+            query = hashes
+        else:
+            per = budget // len(ratios) if budget else 0
+            query = []
+            for k, r in enumerate(ratios):
+                if r == 1.0 and hashes is not None:
+                    h = np.fromiter((x[0] for x in hashes), np.int64, len(hashes))
+                    t = np.fromiter((x[1] for x in hashes), np.int64, len(hashes))
+                else:
+                    h, t = self.fp.tempo_hashes(peaks, r, self.tempo_pitch)
+                if per and h.size > per:
+                    keep = np.linspace(0, h.size - 1, per).astype(np.int64)
+                    h, t = h[keep], t[keep]
+                query.extend(zip(h.tolist(), (t.astype(np.int64) - k * TEMPO_STRIDE).tolist()))
+        if not query:
+            return None
+
+        votes = self.snapshot.vote(query, observe)
+        if not votes:
+            return None
 
         best_track = None
         best_conf = 0
         best_off = 0
+        best_k = 0
+        peaks_by_track = []
+        half = TEMPO_STRIDE // 2
         for track_id, offs in votes.items():
             off, conf = max(offs.items(), key=lambda kv: kv[1])
+            peaks_by_track.append((conf, track_id))
             if conf > best_conf:
                 best_conf = conf
                 best_track = track_id
-                best_off = off
+                best_k = (off + half) // TEMPO_STRIDE
+                best_off = off - best_k * TEMPO_STRIDE
 
         if best_track is None:
             return None
 
+        # Tracks that came close: likely next in the mix, worth prefetching assets for
+        floor = max(3, self.min_conf // 2)
+        peaks_by_track.sort(reverse=True)
+        runner_ups = [tid for conf, tid in peaks_by_track if tid != best_track and conf >= floor][: self.RUNNER_UPS]
+        second = next((conf for conf, tid in peaks_by_track if tid != best_track), 0)
+
+        ratio = ratios[best_k]
         hop = self.fp.hop_size
         off_sec = (best_off * hop) / self.sample_rate
-        #return {"track_id": best_track, "confidence": int(best_conf), "offset_sec": float(off_sec)}
         # off_sec refers to the start of the audio_segment (the window)
-        # Convert to "now" by adding the window duration
-        now_sec = float(off_sec + self.listen_seconds)
-        return {"track_id": best_track, "confidence": int(best_conf), "offset_sec": float(now_sec)}
+        # Convert to "now" by adding the window duration, played at ratio
+        now_sec = float(off_sec + self.listen_seconds * ratio)
+        return {
+            "track_id": best_track,
+            "confidence": int(best_conf),
+            "offset_sec": float(now_sec),
+            "runner_ups": runner_ups,
+            "runner_up_confidence": int(second),
+            "tempo": ratio,
+        }
 
-    def _switch_track(self, track_id: str, offset_sec: float, confidence: int):
-        meta = self.meta_by_id.get(track_id)
+    def _switch_track(
+        self, inp: InputChannel, track_id: str, offset_sec: float, confidence: int, tempo: float = 1.0, at=None
+    ):
+        meta = self.snapshot.meta_for(track_id)
         if not meta:
             return
-        wall_now = time.monotonic()
-        self.current_wall_t0 = wall_now
-        self.drift.reset(initial_track_time=max(0.0, offset_sec), initial_wall_time=0.0)
-        self.lrc = load_lrc(meta.get("lrc_file")) if meta.get("lrc_file") else None
-        self.current_track_id = track_id
-        self.current_conf = confidence
+        inp.wall_t0 = self.clock.monotonic() if at is None else at
+        inp.drift.reset(initial_track_time=max(0.0, offset_sec), initial_wall_time=0.0)
+        inp.drift.beta = tempo
+        inp.lrc = self.snapshot.lrc_for(meta)
+        inp.track_id = track_id
+        inp.meta = meta
+        inp.conf = confidence
+        inp.score = 0.0
+
+    def _update_drift(self, inp: InputChannel, observed_track_time: float, at=None):
+        wall_rel = (self.clock.monotonic() if at is None else at) - inp.wall_t0
+        inp.drift.update(wall_time=wall_rel, track_time=observed_track_time)
 
-    def _update_drift(self, observed_track_time: float):
-        wall_rel = time.monotonic() - self.current_wall_t0
-        self.drift.update(wall_time=wall_rel, track_time=observed_track_time)
+    def _match_input(self, inp: InputChannel):
+        """One match cycle for one input; runs on the matcher thread or a pool worker."""
+        t0 = time.perf_counter()
+        audio_seg = inp.ordered()
+        buf_time = inp.buf_time
+        self.metrics.observe("buffer_copy", time.perf_counter() - t0)
+        res = self._match_segment(audio_seg, inp.tempo)
+        spent = time.perf_counter() - t0
+        self.metrics.observe("match", spent)
+        confident = bool(res and res["confidence"] >= self.min_conf)
+        with self._lock:
+            if res:
+                inp.candidates = [m for m in (self.snapshot.meta_for(t) for t in res["runner_ups"]) if m]
+            if confident:
+                t1 = time.perf_counter()
+                if inp.track_id != res["track_id"]:
+                    self._switch_track(
+                        inp, res["track_id"], res["offset_sec"], res["confidence"], res["tempo"], at=buf_time
+                    )
+                else:
+                    inp.conf = res["confidence"]
+                    self._update_drift(inp, observed_track_time=max(0.0, res["offset_sec"]), at=buf_time)
+                inp.last_confident = self.clock.monotonic()
+                inp.tempo = res["tempo"]
+                self.metrics.observe("drift", time.perf_counter() - t1)
+            hit = res["confidence"] if confident and res["track_id"] == inp.track_id else 0
+            inp.score = 0.5 * inp.score + 0.5 * hit
+        return res, spent, confident
+
+    def _select_input_locked(self) -> bool:
+        """Point self.shown at the dominant / highest-priority live input; True if it changed."""
+        if len(self.inputs) == 1:
+            return False
+        now = self.clock.monotonic()
+        live = [
+            i
+            for i in self.inputs
+            if i.track_id is not None
+            and i.last_confident is not None
+            and now - i.last_confident <= self.INPUT_STALE_SECONDS
+        ]
+        if not live:
+            return False  # keep showing the last input until another locks
+        if self.select == "priority":
+            best = min(live, key=lambda i: (i.priority, -i.score))
+        else:
+            best = max(live, key=lambda i: i.score)
+            if self.shown in live and best.score < self.shown.score * self.DOMINANCE_MARGIN:
+                best = self.shown
+        changed = best is not self.shown
+        self.shown = best
+        return changed
 
     def _run(self):
-        block_n = int(self.block_seconds * self.sample_rate)
-
-        def callback(indata, frames, time_info, status):
-            x = indata[:, 0].astype(np.float32)
-            self._append_audio(x)
-
-        with sd.InputStream(
-            device=self.device,
-            channels=self.channels,
-            samplerate=self.sample_rate,
-            blocksize=block_n,
-            dtype="float32",
-            callback=callback,
-        ):
-            last_match = 0.0
-            while self._running:
-                now = time.monotonic()
-                if now - last_match >= self.match_every:
-                    last_match = now
-                    audio_seg = self._get_buffer_ordered()
-                    res = self._match_segment(audio_seg)
-                    if res and res["confidence"] >= self.min_conf:
-                        with self._lock:
-                            if self.current_track_id != res["track_id"]:
-                                self._switch_track(res["track_id"], res["offset_sec"], res["confidence"])
-                            else:
-                                self.current_conf = res["confidence"]
-                                self._update_drift(observed_track_time=max(0.0, res["offset_sec"]))
-                time.sleep(0.02)
+        clock = self.clock
+        with ExitStack() as stack:
+            for src, inputs in self.sources:
+                stack.enter_context(src.open(self._router(inputs), self._on_audio_status))
+            # Stagger the inputs so their match cycles spread over match_every
+            start = clock.monotonic()
+            for k, inp in enumerate(self.inputs):
+                inp.next_match = start + k * self.match_every / len(self.inputs)
+            while self._running and not all(src.finished for src, _inputs in self.sources):
+                now = clock.monotonic()
+                due = [inp for inp in self.inputs if now >= inp.next_match]
+                if due:
+                    self._swap_pending_snapshot()
+                    for inp in due:
+                        inp.next_match += self.match_every
+                        if inp.next_match <= now:
+                            inp.next_match = now + self.match_every
+                    if self._pool is not None and len(due) > 1:
+                        results = list(self._pool.map(self._match_input, due))
+                    else:
+                        results = [self._match_input(inp) for inp in due]
+                    with self._lock:
+                        switched = self._select_input_locked()
+                    if switched or any(confident for _res, _spent, confident in results):
+                        self._publish()
+                    if self.on_window is not None:
+                        for res, spent, _confident in results:
+                            self.on_window(res, spent)
+                clock.sleep(0.02)
@@ -0,0 +1,154 @@
+from __future__ import annotations
+import os
+import json
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+# Histogram bucket upper bounds in milliseconds; the last bucket is open-ended
+BUCKETS_MS = [0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500]
+METRICS_DUMP_SECONDS = 60.0
+
+
+class StageStats:
+    __slots__ = ("count", "total", "max", "last", "hist")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.last = 0.0
+        self.hist = [0] * (len(BUCKETS_MS) + 1)
+
+    def add(self, ms: float):
+        self.count += 1
+        self.total += ms
+        self.last = ms
+        if ms > self.max:
+            self.max = ms
+        self.hist[bisect.bisect_left(BUCKETS_MS, ms)] += 1
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile (max for the open bucket)."""
+        if not self.count:
+            return 0.0
+        want = q * self.count
+        seen = 0
+        for i, n in enumerate(self.hist):
+            seen += n
+            if seen >= want:
+                return min(BUCKETS_MS[i], self.max) if i < len(BUCKETS_MS) else self.max
+        return self.max
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "mean_ms": self.total / self.count if self.count else 0.0,
+            "p50_ms": self.quantile(0.50),
+            "p95_ms": self.quantile(0.95),
+            "max_ms": self.max,
+            "last_ms": self.last,
+            "hist": list(self.hist),
+        }
+
+
+class Metrics:
+    """
+    Thread-safe timing histograms per named stage plus plain counters.
+    Recording is a lock, a bisect and a few adds, cheap enough for the
+    audio callback.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages: Dict[str, StageStats] = {}
+        self._counters: Dict[str, int] = {}
+        self._t0 = time.monotonic()
+
+    def observe(self, stage: str, seconds: float):
+        ms = seconds * 1000.0
+        with self._lock:
+            st = self._stages.get(stage)
+            if st is None:
+                st = self._stages[stage] = StageStats()
+            st.add(ms)
+
+    @contextmanager
+    def timer(self, stage: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - t0)
+
+    def incr(self, counter: str, n: int = 1):
+        with self._lock:
+            self._counters[counter] = self._counters.get(counter, 0) + n
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "uptime_s": time.monotonic() - self._t0,
+                "stages": {name: st.summary() for name, st in self._stages.items()},
+                "counters": dict(self._counters),
+            }
+
+
+def format_metrics(m: dict, stages: Optional[List[str]] = None) -> str:
+    """Compact text table for the on-screen overlay."""
+    lines = [f"{'stage':<14}{'last':>8}{'p50':>8}{'p95':>8}{'max':>8}{'n':>7}"]
+    names = stages or sorted(m["stages"])
+    for name in names:
+        s = m["stages"].get(name)
+        if not s:
+            continue
+        lines.append(
+            f"{name:<14}{s['last_ms']:>8.1f}{s['p50_ms']:>8.1f}{s['p95_ms']:>8.1f}{s['max_ms']:>8.1f}{s['count']:>7}"
+        )
+    if m["counters"]:
+        lines.append("  ".join(f"{k}={v}" for k, v in sorted(m["counters"].items())))
+    return "\n".join(lines)
+
+
+class MetricsDumper:
+    """Appends get_metrics() as one JSON line every interval seconds, and once more on stop()."""
+
+    def __init__(self, get_metrics: Callable[[], dict], path: str, interval: float = METRICS_DUMP_SECONDS):
+        self.get_metrics = get_metrics
+        self.path = path
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None or self.interval <= 0:
+            return
+        self._thread = threading.Thread(target=self._run, name="metrics-dump", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout=2.0)
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._dump()
+        self._dump()
+
+    def _dump(self):
+        try:
+            line = json.dumps(dict(self.get_metrics(), wall_time=time.time()))
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+        except (OSError, ValueError, TypeError):
+            pass
+
+
+def metrics_dump_path(music_root: str) -> str:
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    return os.path.join(os.path.abspath(music_root), f".djvisuallyrics.metrics-{stamp}.jsonl")
@@ -0,0 +1,92 @@
+from __future__ import annotations
+import os
+import sys
+import time
+import threading
+from collections import Counter
+from typing import Callable, Optional
+
+PROFILE_SECONDS = 20.0
+PROFILE_INTERVAL_MS = 5.0
+
+
+def profiler_from_config(cfg: dict):
+    """(SamplingProfiler, seconds) from the optional profiler section."""
+    pcfg = (cfg or {}).get("profiler") or {}
+    interval = float(pcfg.get("interval_ms", PROFILE_INTERVAL_MS)) / 1000.0
+    return SamplingProfiler(interval), float(pcfg.get("seconds", PROFILE_SECONDS))
+
+
+def profile_path(music_root: str) -> str:
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    return os.path.join(os.path.abspath(music_root), f".djvisuallyrics.profile-{stamp}.collapsed")
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler for a running show: a daemon thread snapshots the
+    stack of every other Python thread (GUI, matcher, loaders) every
+    interval and counts identical stacks. Nothing is hooked into the
+    profiled code, so overhead is a stack walk per thread per sample.
+
+    Output is collapsed-stack text ("thread;outer;...;inner count" per
+    line), which flamegraph.pl, speedscope and similar tools read directly.
+    """
+
+    def __init__(self, interval: float = PROFILE_INTERVAL_MS / 1000.0):
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, seconds: float, path: str, on_done: Optional[Callable[[str, int], None]] = None) -> bool:
+        """Sample for up to seconds, then write path; on_done(path, samples) runs on the sampler thread."""
+        if self.running:
+            return False
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, args=(seconds, path, on_done), name="sampling-profiler", daemon=True
+        )
+        self._thread.start()
+        return True
+
+    def stop(self):
+        """End sampling early; the profile is still written."""
+        self._stop.set()
+
+    def _run(self, seconds: float, path: str, on_done):
+        me = threading.get_ident()
+        stacks: Counter = Counter()
+        samples = 0
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline and not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for tid, frame in sys._current_frames().items():
+                if tid == me:
+                    continue
+                parts = []
+                while frame is not None:
+                    parts.append(_frame_label(frame))
+                    frame = frame.f_back
+                parts.append(names.get(tid, f"thread-{tid}"))
+                stacks[";".join(reversed(parts))] += 1
+            samples += 1
+
+        try:
+            tmp = path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                for stack, n in stacks.most_common():
+                    f.write(f"{stack} {n}\n")
+            os.replace(tmp, path)
+        except OSError:
+            path = ""
+        if on_done:
+            on_done(path, samples)
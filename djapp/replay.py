@@ -0,0 +1,265 @@
+"""
+Replay recorded sets through LiveMatcher and score it against a tracklist.
+
+    python -m djapp.replay MUSIC_ROOT set.wav --truth set.csv [--realtime] [--json out.json]
+
+The tracklist is CSV with a header row: start,track[,offset[,rate]]. start
+is when the track becomes audible in the recording and offset the track
+position at that moment (both seconds or m:ss). track is a track id, song
+folder name, audio file name or title from the library config. rate is the
+playback speed (default 1). A seek or tempo change is a new row for the
+same track.
+"""
+from __future__ import annotations
+import os
+import sys
+import csv
+import json
+import argparse
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from djapp.audioio import FileSource
+from djapp.db import FingerprintDB
+from djapp.matcher import LiveMatcher
+from djapp.scanlib import default_config_path, load_config
+
+# Predicted track time is "settled" once it stays within this of the truth
+SETTLE_MS = 100.0
+
+
+@dataclass
+class TruthSegment:
+    start: float
+    end: float
+    track_id: str
+    offset: float = 0.0
+    rate: float = 1.0
+
+    def track_time(self, t: float) -> float:
+        return self.offset + self.rate * (t - self.start)
+
+
+@dataclass
+class Window:
+    t: float  # recording time at the end of the match cycle
+    latency: float  # seconds spent fingerprinting and voting
+    matched: Optional[str]  # best candidate this window, confident or not
+    confidence: int
+    track_id: Optional[str]  # what the presentation would show
+    track_time: Optional[float]
+
+
+def parse_time(s: str) -> float:
+    parts = [float(p) for p in str(s).strip().split(":")]
+    out = 0.0
+    for p in parts:
+        out = out * 60.0 + p
+    return out
+
+
+def _track_lookup(cfg: dict, aliases: Dict[str, str]) -> Dict[str, str]:
+    """Every name a tracklist may use for a track -> canonical track id."""
+    out: Dict[str, str] = {}
+    for t in cfg.get("tracks") or []:
+        tid = aliases.get(t["id"], t["id"])
+        audio = t.get("audio_file") or ""
+        for key in (
+            t["id"],
+            os.path.basename(os.path.dirname(audio)),
+            os.path.basename(audio),
+            os.path.splitext(os.path.basename(audio))[0],
+            t.get("title") or "",
+        ):
+            if key:
+                out.setdefault(key.lower(), tid)
+    return out
+
+
+def load_tracklist(path: str, cfg: dict, aliases: Dict[str, str], duration: float) -> List[TruthSegment]:
+    lookup = _track_lookup(cfg, aliases)
+    rows = []
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            name = (row.get("track") or "").strip()
+            tid = lookup.get(name.lower())
+            if tid is None:
+                raise ValueError(f"Tracklist entry not in library: {name}")
+            rate = float(row.get("rate") or 1.0)
+            rows.append((parse_time(row["start"]), tid, parse_time(row.get("offset") or 0), rate))
+    rows.sort()
+    out = []
+    for i, (start, tid, offset, rate) in enumerate(rows):
+        end = rows[i + 1][0] if i + 1 < len(rows) else duration
+        out.append(TruthSegment(start=start, end=end, track_id=tid, offset=offset, rate=rate))
+    return out
+
+
+def replay(cfg: dict, db: FingerprintDB, recording: str, realtime: bool = False) -> Tuple[List[Window], float]:
+    """Run the full matcher over one recording; returns per-window records and its duration."""
+    sr = int(cfg["audio"]["sample_rate"])
+    block_n = int(float(cfg["audio"]["block_seconds"]) * sr)
+    source = FileSource.from_file(recording, sr, block_n, realtime=realtime)
+    matcher = LiveMatcher(cfg, db, source=source)
+    windows: List[Window] = []
+
+    def on_window(res, spent):
+        st = matcher.get_state()
+        windows.append(
+            Window(
+                t=source.audio_time(matcher.clock.monotonic()),
+                latency=spent,
+                matched=res["track_id"] if res else None,
+                confidence=res["confidence"] if res else 0,
+                track_id=st["track_id"],
+                track_time=st["track_time"],
+            )
+        )
+
+    matcher.on_window = on_window
+    # Shard workers load before the clock starts, as they would before a gig
+    matcher.snapshot.start()
+    matcher.snapshot.wait_ready()
+    matcher.start()
+    try:
+        matcher.join()
+    finally:
+        matcher.stop()
+    return windows, source.duration
+
+
+def _pct(values: List[float], q: float) -> Optional[float]:
+    return float(np.percentile(values, q)) if values else None
+
+
+def evaluate(windows: List[Window], truth: Optional[List[TruthSegment]] = None) -> dict:
+    lat = [w.latency * 1000.0 for w in windows]
+    report: dict = {
+        "windows": len(windows),
+        "latency_ms": {"p50": _pct(lat, 50), "p95": _pct(lat, 95), "max": max(lat) if lat else None},
+    }
+    if not truth:
+        return report
+
+    def segment_at(t: float) -> Optional[TruthSegment]:
+        for seg in truth:
+            if seg.start <= t < seg.end:
+                return seg
+        return None
+
+    shown = wrong = 0
+    drift_err = []
+    lock: Dict[int, Optional[float]] = {i: None for i in range(len(truth))}
+    # Seconds into each segment from which the predicted track time stayed within SETTLE_MS
+    settled: Dict[int, Optional[float]] = {i: None for i in range(len(truth))}
+    for w in windows:
+        seg = segment_at(w.t)
+        if seg is None:
+            continue
+        i = truth.index(seg)
+        err = None
+        if w.track_id == seg.track_id and w.track_time is not None:
+            err = abs(w.track_time - seg.track_time(w.t)) * 1000.0
+        if err is None or err > SETTLE_MS:
+            settled[i] = None
+        elif settled[i] is None:
+            settled[i] = w.t - seg.start
+        if w.track_id is None:
+            continue
+        shown += 1
+        if w.track_id != seg.track_id:
+            wrong += 1
+            continue
+        if lock[i] is None:
+            lock[i] = w.t - seg.start
+        if err is not None:
+            drift_err.append(err)
+
+    report["tracks"] = [
+        {
+            "start": seg.start,
+            "track_id": seg.track_id,
+            "time_to_lock": lock[i],
+            "time_to_settle": settled[i],
+        }
+        for i, seg in enumerate(truth)
+    ]
+    settle = [v for v in settled.values() if v is not None]
+    report["time_to_settle_s"] = {"p50": _pct(settle, 50), "max": max(settle) if settle else None}
+    locked = [v for v in lock.values() if v is not None]
+    report["time_to_lock_s"] = {"p50": _pct(locked, 50), "max": max(locked) if locked else None}
+    report["missed_tracks"] = sum(1 for v in lock.values() if v is None)
+    report["wrong_track_rate"] = wrong / shown if shown else None
+    report["drift_error_ms"] = {"mean": float(np.mean(drift_err)) if drift_err else None, "p95": _pct(drift_err, 95)}
+    return report
+
+
+def _fmt(v, unit: str = "") -> str:
+    if v is None:
+        return "-"
+    return f"{v:.3f}{unit}" if isinstance(v, float) else f"{v}{unit}"
+
+
+def format_report(name: str, report: dict) -> str:
+    lat = report["latency_ms"]
+    lines = [
+        f"{name}: {report['windows']} windows",
+        f"  latency ms   p50 {_fmt(lat['p50'])}  p95 {_fmt(lat['p95'])}  max {_fmt(lat['max'])}",
+    ]
+    if "tracks" in report:
+        ttl = report["time_to_lock_s"]
+        drift = report["drift_error_ms"]
+        settle = report["time_to_settle_s"]
+        lines += [
+            f"  time to lock p50 {_fmt(ttl['p50'], ' s')}  max {_fmt(ttl['max'], ' s')}"
+            f"  missed {report['missed_tracks']}/{len(report['tracks'])}",
+            f"  wrong track  {_fmt(report['wrong_track_rate'])}",
+            f"  drift ms     mean {_fmt(drift['mean'])}  p95 {_fmt(drift['p95'])}",
+            f"  settle       p50 {_fmt(settle['p50'], ' s')}  max {_fmt(settle['max'], ' s')}",
+        ]
+        for tr in report["tracks"]:
+            lines.append(
+                f"    {tr['start']:8.1f}  {tr['track_id']}  lock {_fmt(tr['time_to_lock'], ' s')}"
+                f"  settle {_fmt(tr['time_to_settle'], ' s')}"
+            )
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m djapp.replay", description=__doc__.split("\n\n")[0].strip())
+    ap.add_argument("music_root")
+    ap.add_argument("recordings", nargs="+")
+    ap.add_argument("--truth", action="append", default=[], help="tracklist CSV, one per recording, in order")
+    ap.add_argument("--realtime", action="store_true", help="pace audio in real time instead of a simulated clock")
+    ap.add_argument("--shards", type=int, default=None, help="override index.shards")
+    ap.add_argument("--json", help="write per-recording reports and windows here")
+    args = ap.parse_args(argv)
+
+    if args.truth and len(args.truth) != len(args.recordings):
+        ap.error("give one --truth per recording")
+
+    cfg = load_config(default_config_path(args.music_root))
+    if args.shards is not None:
+        cfg = dict(cfg, index=dict(cfg.get("index") or {}, shards=args.shards))
+    db = FingerprintDB(cfg["database"]["path"])
+    db.init_schema()
+    aliases = db.aliases()
+
+    results = []
+    for i, rec in enumerate(args.recordings):
+        windows, duration = replay(cfg, db, rec, realtime=args.realtime)
+        truth = load_tracklist(args.truth[i], cfg, aliases, duration) if args.truth else None
+        report = evaluate(windows, truth)
+        print(format_report(os.path.basename(rec), report))
+        results.append({"recording": rec, "report": report, "windows": [asdict(w) for w in windows]})
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=1)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,255 @@
+"""
+Synthetic large-library generator and end-to-end scale harness.
+
+    python -m djapp.scaletest generate ROOT --tracks 10000 [--seconds 90]
+    python -m djapp.scaletest run ROOT [--queries 300] [--shards N] [--json out.json]
+
+generate writes song folders in the layout scan_music_root expects (one
+mp3 with ID3 tags plus an .lrc per folder), from procedural audio; it
+skips folders that already exist, so a library can be grown in steps.
+run scans and indexes the library, then identifies random excerpts of
+random tracks under noise, EQ and level changes.
+"""
+from __future__ import annotations
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import resource
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from djapp.audioio import FileSource
+from djapp.db import FingerprintDB
+from djapp.fingerprint import load_audio
+from djapp.indexer import rebuild_db
+from djapp.scanlib import default_config_path, load_config, scan_music_root, write_config
+from djapp.synth import degrade, synth_audio
+
+SAMPLE_RATE = 22050
+# name -> degrade() keyword arguments
+CONDITIONS: Dict[str, dict] = {
+    "clean": {},
+    "noise_10db": {"snr_db": 10.0},
+    "noise_0db": {"snr_db": 0.0},
+    "eq_dark": {"tilt_db": -12.0},
+    "eq_bright": {"tilt_db": 12.0},
+    "level_-20db": {"gain_db": -20.0},
+    "level_+12db": {"gain_db": 12.0},
+    "room": {"snr_db": 5.0, "tilt_db": -6.0, "gain_db": 6.0},
+}
+
+
+def _folder_name(i: int) -> str:
+    return f"synth_{i:06d}"
+
+
+def _lrc_text(seconds: float, seed: int) -> str:
+    rng = random.Random(seed)
+    words = ["light", "night", "move", "sound", "river", "fire", "dream", "city", "wave", "echo", "heart", "run"]
+    lines = []
+    t = rng.uniform(2.0, 8.0)
+    while t < seconds - 2.0:
+        m, s = divmod(t, 60.0)
+        lines.append(f"[{int(m):02d}:{s:05.2f}]" + " ".join(rng.choice(words) for _ in range(rng.randint(3, 7))))
+        t += rng.uniform(2.0, 5.0)
+    return "\n".join(lines) + "\n"
+
+
+def _write_song(root: str, i: int, seconds: float, seed: int) -> bool:
+    import soundfile as sf
+    from mutagen.id3 import ID3, TALB, TIT2, TPE1
+
+    name = _folder_name(i)
+    d = os.path.join(root, name)
+    mp3 = os.path.join(d, f"{name}.mp3")
+    if os.path.exists(mp3):
+        return False
+    os.makedirs(d, exist_ok=True)
+    track_seed = seed * 1_000_003 + i
+    tmp = mp3 + ".part"
+    sf.write(tmp, synth_audio(track_seed, seconds, SAMPLE_RATE), SAMPLE_RATE, format="MP3")
+    tags = ID3()
+    tags.add(TIT2(encoding=3, text=f"Synthetic {i}"))
+    tags.add(TPE1(encoding=3, text=f"Generator {i % 97}"))
+    tags.add(TALB(encoding=3, text=f"Scale Test {i // 12}"))
+    tags.save(tmp)
+    with open(os.path.join(d, f"{name}.lrc"), "w", encoding="utf-8") as f:
+        f.write(_lrc_text(seconds, track_seed))
+    os.replace(tmp, mp3)
+    return True
+
+
+def generate_library(root: str, n_tracks: int, seconds: float = 90.0, seed: int = 0, workers: int = 0) -> int:
+    """Create n_tracks song folders under root; returns how many were new."""
+    os.makedirs(root, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    made = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futs = [pool.submit(_write_song, root, i, seconds, seed) for i in range(n_tracks)]
+        for k, fut in enumerate(futs):
+            made += bool(fut.result())
+            if (k + 1) % 500 == 0:
+                print(f"  generated {k + 1}/{n_tracks}", file=sys.stderr, flush=True)
+    return made
+
+
+def _peak_rss_mb() -> float:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return rss / (1024.0 * 1024.0) if sys.platform == "darwin" else rss / 1024.0
+
+
+def _pct(values: List[float], q: float) -> Optional[float]:
+    return float(np.percentile(values, q)) if values else None
+
+
+def build(root: str) -> dict:
+    """Scan and index from scratch; returns timings and sizes."""
+    t0 = time.perf_counter()
+    tracks = scan_music_root(root, use_manifest=False, proxy_sizes=[])
+    t_scan = time.perf_counter() - t0
+
+    cfg = write_config(root, tracks, default_config_path(root), proxy_sizes=[])
+
+    def progress(i, n):
+        if i % 500 == 0 or i == n:
+            print(f"  indexed {i}/{n}", file=sys.stderr, flush=True)
+
+    t0 = time.perf_counter()
+    aliases = rebuild_db(cfg, progress)
+    t_index = time.perf_counter() - t0
+
+    db_path = cfg["database"]["path"]
+    return {
+        "tracks": len(tracks),
+        "aliases": len(aliases),
+        "scan_s": t_scan,
+        "index_s": t_index,
+        "db_bytes": os.path.getsize(db_path),
+        "hashes": FingerprintDB(db_path).count_hashes(),
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def query(root: str, n_queries: int, shards: Optional[int] = None, seed: int = 0) -> dict:
+    """Identify random excerpts of random tracks under every condition in CONDITIONS."""
+    from djapp.matcher import LiveMatcher
+
+    cfg = load_config(default_config_path(root))
+    if shards is not None:
+        cfg = dict(cfg, index=dict(cfg.get("index") or {}, shards=shards))
+    sr = int(cfg["audio"]["sample_rate"])
+    listen = float(cfg["audio"]["listen_seconds"])
+    db = FingerprintDB(cfg["database"]["path"])
+    aliases = db.aliases()
+
+    t0 = time.perf_counter()
+    matcher = LiveMatcher(cfg, db, source=FileSource(np.zeros(1, np.float32), sr, sr))
+    matcher.snapshot.start()
+    matcher.snapshot.wait_ready()
+    t_load = time.perf_counter() - t0
+
+    rng = random.Random(seed)
+    tracks = cfg.get("tracks") or []
+    picks = [rng.choice(tracks) for _ in range(n_queries)]
+    latency: Dict[str, List[float]] = {name: [] for name in CONDITIONS}
+    correct: Dict[str, int] = {name: 0 for name in CONDITIONS}
+    try:
+        for q, t in enumerate(picks):
+            audio = load_audio(t["audio_file"], sr)
+            n = int(listen * sr)
+            start = rng.randint(0, max(0, audio.shape[0] - n))
+            excerpt = audio[start : start + n]
+            want = aliases.get(t["id"], t["id"])
+            for name, kw in CONDITIONS.items():
+                x = degrade(excerpt, sr, seed=seed + q, **kw)
+                t1 = time.perf_counter()
+                res = matcher._match_segment(x)
+                latency[name].append((time.perf_counter() - t1) * 1000.0)
+                if res and res["track_id"] == want and res["confidence"] >= matcher.min_conf:
+                    correct[name] += 1
+    finally:
+        matcher.stop()
+
+    per_condition = {
+        name: {
+            "accuracy": correct[name] / n_queries if n_queries else None,
+            "latency_ms": {q: _pct(latency[name], p) for q, p in (("p50", 50), ("p95", 95), ("p99", 99))},
+        }
+        for name in CONDITIONS
+    }
+    return {
+        "queries": n_queries,
+        "shards": matcher.n_shards,
+        "index_load_s": t_load,
+        "peak_rss_mb": _peak_rss_mb(),
+        "conditions": per_condition,
+    }
+
+
+def format_report(report: dict) -> str:
+    lines = []
+    b = report.get("build")
+    if b:
+        lines += [
+            f"library: {b['tracks']} tracks, {b['hashes']:,} hashes, DB {b['db_bytes'] / 1e6:.1f} MB",
+            f"  scan {b['scan_s']:.1f} s, index {b['index_s']:.1f} s, peak RSS {b['peak_rss_mb']:.0f} MB",
+        ]
+    q = report["query"]
+    lines.append(
+        f"queries: {q['queries']} x {len(q['conditions'])} conditions, {q['shards']} shard(s), "
+        f"index load {q['index_load_s']:.1f} s, peak RSS {q['peak_rss_mb']:.0f} MB"
+    )
+    lines.append(f"  {'condition':<14}{'accuracy':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for name, c in q["conditions"].items():
+        lat = c["latency_ms"]
+        lines.append(
+            f"  {name:<14}{(c['accuracy'] or 0) * 100:>8.1f}%{lat['p50'] or 0:>9.1f}{lat['p95'] or 0:>9.1f}"
+            f"{lat['p99'] or 0:>9.1f}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m djapp.scaletest", description=__doc__.split("\n\n")[0].strip())
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    g = sub.add_parser("generate", help="write a synthetic library")
+    g.add_argument("root")
+    g.add_argument("--tracks", type=int, required=True)
+    g.add_argument("--seconds", type=float, default=90.0)
+    g.add_argument("--seed", type=int, default=0)
+    g.add_argument("--workers", type=int, default=0)
+
+    r = sub.add_parser("run", help="index the library and measure it")
+    r.add_argument("root")
+    r.add_argument("--queries", type=int, default=300)
+    r.add_argument("--shards", type=int, default=None, help="override index.shards")
+    r.add_argument("--skip-build", action="store_true", help="reuse the existing config and DB")
+    r.add_argument("--seed", type=int, default=0)
+    r.add_argument("--json", help="write the report here")
+
+    args = ap.parse_args(argv)
+    if args.cmd == "generate":
+        made = generate_library(args.root, args.tracks, args.seconds, args.seed, args.workers)
+        print(f"{made} new song folders in {args.root}")
+        return 0
+
+    report = {}
+    if not args.skip_build:
+        report["build"] = build(args.root)
+    report["query"] = query(args.root, args.queries, args.shards, args.seed)
+    print(format_report(report))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=1)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
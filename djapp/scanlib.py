@@ -1,15 +1,23 @@
 from __future__ import annotations
 import os
-import glob
+import json
 import hashlib
-from dataclasses import dataclass
-from typing import List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, asdict, field
+from typing import Dict, List, Optional, Sequence
 import yaml
 
 from djapp.id3lib import read_id3_tags, extract_embedded_art
 
 CONFIG_FILENAME = ".djvisuallyrics.yaml"
+DB_FILENAME = ".djvisuallyrics.sqlite"
 FPCACHE_EXT = ".djfp.npz"
+MANIFEST_FILENAME = ".djvisuallyrics.manifest.json"
+MANIFEST_VERSION = 1
+SCAN_WORKERS = 8
+# Screen-resolution copies of large background images, one per target display
+DEFAULT_PROXY_SIZES = [[1920, 1080]]
+PROXY_PREFIX = ".djproxy."
 
 
 @dataclass
@@ -24,13 +32,30 @@ class TrackInfo:
     artist: str
     album: str
     fp_cache_path: str
+    bg_proxies: Dict[str, str] = field(default_factory=dict)  # "WxH" -> path
 
 
-def _first_or_none(patterns: List[str]) -> Optional[str]:
-    for p in patterns:
-        matches = glob.glob(p)
-        if matches:
-            return sorted(matches)[0]
+def _list_by_ext(song_dir: str) -> Dict[str, List[str]]:
+    """One directory read: extension -> sorted file paths (hidden files skipped, like glob)."""
+    out: Dict[str, List[str]] = {}
+    with os.scandir(song_dir) as it:
+        for e in it:
+            if e.name.startswith(".") or "." not in e.name:
+                continue
+            if not e.is_file():
+                continue
+            ext = e.name.rsplit(".", 1)[1]
+            out.setdefault(ext, []).append(e.path)
+    for paths in out.values():
+        paths.sort()
+    return out
+
+
+def _first_or_none(by_ext: Dict[str, List[str]], exts: List[str]) -> Optional[str]:
+    for ext in exts:
+        paths = by_ext.get(ext)
+        if paths:
+            return paths[0]
     return None
 
 def find_default_background(music_root: str) -> str:
@@ -58,79 +83,301 @@ def _write_embedded_art_if_needed(mp3_path: str, target_jpg: str) -> Optional[st
         return None
 
 
-def scan_music_root(root: str) -> List[TrackInfo]:
-    root = os.path.abspath(root)
-    if not os.path.isdir(root):
-        raise ValueError(f"Not a directory: {root}")
+def proxy_key(w: int, h: int) -> str:
+    return f"{int(w)}x{int(h)}"
 
-    tracks: List[TrackInfo] = []
 
-    for entry in sorted(os.listdir(root)):
-        song_dir = os.path.join(root, entry)
-        if not os.path.isdir(song_dir):
-            continue
+def proxy_sizes_from_config(cfg: Optional[dict]) -> List[List[int]]:
+    """Target display sizes for background proxies; [] turns them off."""
+    sizes = ((cfg or {}).get("display") or {}).get("proxy_sizes")
+    if sizes is None:
+        return [list(s) for s in DEFAULT_PROXY_SIZES]
+    return [[int(w), int(h)] for w, h in sizes]
+
+
+def _make_proxies(src: str, song_dir: str, sizes: Sequence[Sequence[int]]) -> Dict[str, str]:
+    """
+    Write downscaled JPEG copies of src for each target size it exceeds.
 
-        mp3 = _first_or_none([os.path.join(song_dir, "*.mp3")])
-        if not mp3:
+    Proxies are dotfiles, so they are never picked up as a folder's own
+    background, and they are regenerated whenever src is newer.
+    """
+    if not sizes:
+        return {}
+    from PyQt6.QtCore import QSize
+    from PyQt6.QtGui import QImage, QImageReader, QPainter, QColor
+    from djapp.assets import decode_scaled
+
+    try:
+        src_mtime = os.path.getmtime(src)
+    except OSError:
+        return {}
+    src_size = QImageReader(src).size()
+
+    out: Dict[str, str] = {}
+    for w, h in sizes:
+        if src_size.isValid() and src_size.width() <= w and src_size.height() <= h:
+            continue  # already small enough; the original is the proxy
+        key = proxy_key(w, h)
+        dst = os.path.join(song_dir, f"{PROXY_PREFIX}{key}.jpg")
+        if os.path.exists(dst) and os.path.getmtime(dst) >= src_mtime:
+            out[key] = dst
+            continue
+        img = decode_scaled(src, QSize(int(w), int(h)))
+        if img.isNull():
             continue
+        if img.hasAlphaChannel():
+            # Backgrounds are letterboxed on black; flatten before JPEG
+            flat = QImage(img.size(), QImage.Format.Format_RGB32)
+            flat.fill(QColor("black"))
+            p = QPainter(flat)
+            p.drawImage(0, 0, img)
+            p.end()
+            img = flat
+        if img.save(dst, "JPG", 90):
+            out[key] = dst
 
-        lrc = _first_or_none([os.path.join(song_dir, "*.lrc")])
+    # Drop proxies for sizes no longer configured
+    keep = set(out.values())
+    for name in os.listdir(song_dir):
+        p = os.path.join(song_dir, name)
+        if name.startswith(PROXY_PREFIX) and p not in keep:
+            try:
+                os.remove(p)
+            except OSError:
+                pass
+    return out
 
-        mp4 = _first_or_none([os.path.join(song_dir, "*.mp4")])
-        img = _first_or_none(
-            [
-                os.path.join(song_dir, "*.png"),
-                os.path.join(song_dir, "*.jpg"),
-                os.path.join(song_dir, "*.jpeg"),
-            ]
-        )
 
-        if mp4:
-            bg_type, bg_path = "video", mp4
-        elif img:
-            bg_type, bg_path = "image", img
+def scan_song_folder(song_dir: str, proxy_sizes: Sequence[Sequence[int]] = ()) -> Optional[TrackInfo]:
+    """Scan one song folder; None if it holds no mp3."""
+    try:
+        by_ext = _list_by_ext(song_dir)
+    except OSError:
+        return None
+
+    mp3 = _first_or_none(by_ext, ["mp3"])
+    if not mp3:
+        return None
+
+    lrc = _first_or_none(by_ext, ["lrc"])
+    mp4 = _first_or_none(by_ext, ["mp4"])
+    img = _first_or_none(by_ext, ["png", "jpg", "jpeg"])
+
+    if mp4:
+        bg_type, bg_path = "video", mp4
+    elif img:
+        bg_type, bg_path = "image", img
+    else:
+        embedded_path = os.path.join(song_dir, "_embedded_art.jpg")
+        if not os.path.exists(embedded_path):
+            _write_embedded_art_if_needed(mp3, embedded_path)
+        if os.path.exists(embedded_path):
+            bg_type, bg_path = "image", embedded_path
         else:
-            embedded_path = os.path.join(song_dir, "_embedded_art.jpg")
-            if not os.path.exists(embedded_path):
-                _write_embedded_art_if_needed(mp3, embedded_path)
-            if os.path.exists(embedded_path):
-                bg_type, bg_path = "image", embedded_path
-            else:
-                bg_type, bg_path = "image", ""
-
-        tags = read_id3_tags(mp3)
-        track_id = _make_track_id(mp3)
-
-        fp_cache = os.path.join(song_dir, os.path.basename(mp3).rsplit(".", 1)[0] + FPCACHE_EXT)
-
-        tracks.append(
-            TrackInfo(
-                track_id=track_id,
-                folder=song_dir,
-                mp3_path=mp3,
-                lrc_path=lrc,
-                bg_type=bg_type,
-                bg_path=bg_path,
-                title=tags.title,
-                artist=tags.artist,
-                album=tags.album,
-                fp_cache_path=fp_cache,
-            )
+            bg_type, bg_path = "image", ""
+
+    proxies = _make_proxies(bg_path, song_dir, proxy_sizes) if bg_type == "image" and bg_path else {}
+
+    tags = read_id3_tags(mp3)
+    track_id = _make_track_id(mp3)
+
+    fp_cache = os.path.join(song_dir, os.path.basename(mp3).rsplit(".", 1)[0] + FPCACHE_EXT)
+
+    return TrackInfo(
+        track_id=track_id,
+        folder=song_dir,
+        mp3_path=mp3,
+        lrc_path=lrc,
+        bg_type=bg_type,
+        bg_path=bg_path,
+        title=tags.title,
+        artist=tags.artist,
+        album=tags.album,
+        fp_cache_path=fp_cache,
+        bg_proxies=proxies,
+    )
+
+
+def manifest_path(music_root: str) -> str:
+    return os.path.join(os.path.abspath(music_root), MANIFEST_FILENAME)
+
+
+def _folder_stamp(song_dir: str, mp3_path: Optional[str]) -> Optional[list]:
+    """
+    Directory mtime catches added/removed/renamed files; the mp3's own
+    mtime and size catch in-place retagging.
+    """
+    try:
+        d = os.stat(song_dir).st_mtime_ns
+        if not mp3_path:
+            return [d]
+        st = os.stat(mp3_path)
+        return [d, st.st_mtime_ns, st.st_size]
+    except OSError:
+        return None
+
+
+def _proxies_fresh(track: Optional[dict]) -> bool:
+    """False if a background was replaced in place since its proxies were made."""
+    if not track or not track.get("bg_proxies"):
+        return True
+    try:
+        src = os.path.getmtime(track["bg_path"])
+        return all(os.path.getmtime(p) >= src for p in track["bg_proxies"].values())
+    except OSError:
+        return False
+
+
+def _load_manifest_data(music_root: str) -> dict:
+    try:
+        with open(manifest_path(music_root), "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except Exception:
+        return {}
+    if data.get("version") != MANIFEST_VERSION:
+        return {}
+    return data
+
+
+def load_manifest(music_root: str, proxy_sizes: Optional[Sequence[Sequence[int]]] = None) -> Dict[str, dict]:
+    """Folder entries; empty if the manifest was made for other proxy sizes."""
+    data = _load_manifest_data(music_root)
+    if proxy_sizes is not None and data.get("proxy_sizes") != [list(s) for s in proxy_sizes]:
+        return {}
+    return data.get("folders") or {}
+
+
+def save_manifest(
+    music_root: str, folders: Dict[str, dict], proxy_sizes: Optional[Sequence[Sequence[int]]] = None
+) -> None:
+    if proxy_sizes is None:
+        proxy_sizes = _load_manifest_data(music_root).get("proxy_sizes") or []
+    p = manifest_path(music_root)
+    tmp = p + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(
+            {"version": MANIFEST_VERSION, "proxy_sizes": [list(s) for s in proxy_sizes], "folders": folders},
+            f,
+            ensure_ascii=False,
         )
+    os.replace(tmp, p)
+
+
+def refresh_manifest(music_root: str) -> None:
+    """
+    Re-stamp folders after indexing wrote fingerprint caches into them, so
+    the next rescan does not mistake our own files for user changes.
+    """
+    root = os.path.abspath(music_root)
+    folders = load_manifest(root)
+    for name, ent in folders.items():
+        track = ent.get("track")
+        ent["stamp"] = _folder_stamp(os.path.join(root, name), track["mp3_path"] if track else None)
+    save_manifest(root, folders)
+
+
+def _scan_with_stamp(song_dir: str, proxy_sizes: Sequence[Sequence[int]]):
+    t = scan_song_folder(song_dir, proxy_sizes)
+    # Stamp after scanning: extracting embedded art touches the folder
+    return t, _folder_stamp(song_dir, t.mp3_path if t else None)
+
+
+def scan_music_root(
+    root: str,
+    use_manifest: bool = True,
+    workers: int = SCAN_WORKERS,
+    proxy_sizes: Sequence[Sequence[int]] = DEFAULT_PROXY_SIZES,
+) -> List[TrackInfo]:
+    """
+    Scan every song folder under root.
+
+    Folders whose stamp matches the persisted manifest are reused without
+    being opened; the rest are scanned on a thread pool, since the work is
+    dominated by directory reads and tag/art I/O.
+    """
+    root = os.path.abspath(root)
+    if not os.path.isdir(root):
+        raise ValueError(f"Not a directory: {root}")
+
+    old = load_manifest(root, proxy_sizes) if use_manifest else {}
+    folders: Dict[str, dict] = {}
+    results: Dict[str, Optional[TrackInfo]] = {}
+    to_scan: List[str] = []
+
+    with os.scandir(root) as it:
+        names = sorted(e.name for e in it if e.is_dir() and not e.name.startswith("."))
+
+    for name in names:
+        ent = old.get(name)
+        if ent:
+            track = ent.get("track")
+            stamp = _folder_stamp(os.path.join(root, name), track["mp3_path"] if track else None)
+            if stamp is not None and stamp == ent.get("stamp") and _proxies_fresh(track):
+                results[name] = TrackInfo(**track) if track else None
+                folders[name] = ent
+                continue
+        to_scan.append(name)
+
+    if to_scan:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            scanned = pool.map(
+                _scan_with_stamp,
+                [os.path.join(root, n) for n in to_scan],
+                [proxy_sizes] * len(to_scan),
+            )
+            for name, (t, stamp) in zip(to_scan, scanned):
+                results[name] = t
+                folders[name] = {"stamp": stamp, "track": asdict(t) if t else None}
+
+    if use_manifest:
+        try:
+            save_manifest(root, folders, proxy_sizes)
+        except OSError:
+            pass
 
-    return tracks
+    return [results[n] for n in names if results.get(n) is not None]
 
 
 def default_config_path(music_root: str) -> str:
     return os.path.join(os.path.abspath(music_root), CONFIG_FILENAME)
 
 
-def write_config(root: str, tracks: List[TrackInfo], config_path: str) -> dict:
+def default_db_path(music_root: str) -> str:
+    return os.path.join(os.path.abspath(music_root), DB_FILENAME)
+
+
+def config_stamp(config_path: str) -> str:
+    """Cheap identity of the YAML file; changes whenever it is rewritten or edited."""
+    try:
+        st = os.stat(config_path)
+    except OSError:
+        return ""
+    return f"{st.st_mtime_ns}:{st.st_size}"
+
+
+def load_config(config_path: str) -> dict:
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    with open(config_path, "r", encoding="utf-8") as f:
+        return yaml.load(f, Loader=loader) or {}
+
+
+def write_config(
+    root: str,
+    tracks: List[TrackInfo],
+    config_path: str,
+    proxy_sizes: Sequence[Sequence[int]] = DEFAULT_PROXY_SIZES,
+) -> dict:
     cfg = {
         "version": 2,
         "default_background": find_default_background(root),
         "music_root": os.path.abspath(root),
-        "database": {"path": os.path.join(os.path.abspath(root), ".djvisuallyrics.sqlite")},
+        "database": {"path": default_db_path(root)},
+        "index": {"shards": 0},
+        "dedup": {"enabled": True, "min_match_ratio": 0.25},
+        "watch": {"enabled": True, "poll_seconds": 10, "settle_seconds": 5},
+        "metrics": {"dump_seconds": 60},
+        "profiler": {"seconds": 20, "interval_ms": 5},
         "audio": {
             "sample_rate": 22050,
             "channels": 1,
@@ -140,6 +387,7 @@ def write_config(root: str, tracks: List[TrackInfo], config_path: str) -> dict:
             "match_every_seconds": 1.0,
             "min_confidence": 20,
         },
+        "tempo": {"max_percent": 8, "step_percent": 0.5, "pitch": True, "max_hashes": 30000},
         "fingerprinting": {
             "fft_size": 4096,
             "hop_size": 512,
@@ -160,25 +408,33 @@ def write_config(root: str, tracks: List[TrackInfo], config_path: str) -> dict:
                 "box_padding": 18,
             },
             "meta": {"font_family": "Helvetica", "font_size": 22, "margin_left": 26, "margin_bottom": 22},
+            "proxy_sizes": [list(s) for s in proxy_sizes],
         },
         "tracks": [],
     }
 
     for t in tracks:
-        cfg["tracks"].append(
-            {
-                "id": t.track_id,
-                "title": t.title,
-                "album": t.album,
-                "artist": t.artist,
-                "audio_file": t.mp3_path,
-                "lrc_file": t.lrc_path,
-                "fingerprint_cache": t.fp_cache_path,
-                "background": {"type": t.bg_type, "path": t.bg_path},
-            }
-        )
-
-    with open(config_path, "w", encoding="utf-8") as f:
-        yaml.safe_dump(cfg, f, sort_keys=False, allow_unicode=True)
+        cfg["tracks"].append(track_entry(t))
 
+    save_config(cfg, config_path)
     return cfg
+
+
+def track_entry(t: TrackInfo) -> dict:
+    return {
+        "id": t.track_id,
+        "title": t.title,
+        "album": t.album,
+        "artist": t.artist,
+        "audio_file": t.mp3_path,
+        "lrc_file": t.lrc_path,
+        "fingerprint_cache": t.fp_cache_path,
+        "background": {"type": t.bg_type, "path": t.bg_path, "proxies": dict(t.bg_proxies)},
+    }
+
+
+def save_config(cfg: dict, config_path: str) -> None:
+    tmp = config_path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        yaml.safe_dump(cfg, f, sort_keys=False, allow_unicode=True)
+    os.replace(tmp, config_path)
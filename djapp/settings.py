@@ -1,11 +1,17 @@
 from __future__ import annotations
 import os
+import atexit
+import threading
+from typing import Dict, Optional
+
 import yaml
 
 APP_NAME = "LyricConductor"
 LYRICS_OFFSET_MIN_MS = -3000
 LYRICS_OFFSET_MAX_MS = 3000
 LYRICS_OFFSET_DEFAULT_MS = -1500 # 1500 ms before the music
+# Coalesce bursts of changes (spinbox drags, repeated +/- presses) into one write
+WRITE_DELAY_SECONDS = 0.5
 
 
 def _clamp_int(value, lo: int, hi: int, default: int) -> int:
@@ -20,43 +26,161 @@ def _clamp_int(value, lo: int, hi: int, default: int) -> int:
     return v
 
 
+def clamp_offset_ms(value, default: int = LYRICS_OFFSET_DEFAULT_MS) -> int:
+    return _clamp_int(value, LYRICS_OFFSET_MIN_MS, LYRICS_OFFSET_MAX_MS, default)
+
+
+def _settings_dir() -> str:
+    return os.path.expanduser(f"~/Library/Application Support/{APP_NAME}")
+
+
 def _settings_path() -> str:
-    base = os.path.expanduser(f"~/Library/Application Support/{APP_NAME}")
-    os.makedirs(base, exist_ok=True)
-    return os.path.join(base, "settings.yaml")
+    return os.path.join(_settings_dir(), "settings.yaml")
 
 
-def load_settings() -> dict:
-    p = _settings_path()
-    if not os.path.exists(p):
-        data: dict = {}
+def _normalize(data: dict) -> dict:
+    data = dict(data)
+    data["lyrics_offset_ms"] = clamp_offset_ms(data.get("lyrics_offset_ms", LYRICS_OFFSET_DEFAULT_MS))
+    tracks = data.get("track_offsets_ms")
+    if isinstance(tracks, dict):
+        # Per-track values are adjustments on top of the global offset
+        span = LYRICS_OFFSET_MAX_MS - LYRICS_OFFSET_MIN_MS
+        data["track_offsets_ms"] = {str(k): _clamp_int(v, -span, span, 0) for k, v in tracks.items() if v}
     else:
+        data.pop("track_offsets_ms", None)
+    return data
+
+
+class SettingsStore:
+    """
+    Process-wide settings, read from disk once and kept in memory.
+
+    Setters only touch the in-memory copy and wake a writer thread, which
+    waits WRITE_DELAY_SECONDS for further changes before writing the file
+    (temp file + os.replace). The UI thread never waits on the disk.
+    """
+
+    def __init__(self, path: Optional[str] = None, delay: float = WRITE_DELAY_SECONDS):
+        self.path = path or _settings_path()
+        self.delay = delay
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        self._io_lock = threading.Lock()
+        self._data = self._read()
+        # Bumped on every change; the file holds _saved_version
+        self._version = 0
+        self._saved_version = 0
+        self._writer = None
+
+    def _read(self) -> dict:
         try:
-            with open(p, "r", encoding="utf-8") as f:
+            with open(self.path, "r", encoding="utf-8") as f:
                 data = yaml.safe_load(f) or {}
         except Exception:
             data = {}
+        return _normalize(data if isinstance(data, dict) else {})
 
-    # Normalize lyrics offset
-    data["lyrics_offset_ms"] = _clamp_int(
-        data.get("lyrics_offset_ms", LYRICS_OFFSET_DEFAULT_MS),
-        LYRICS_OFFSET_MIN_MS,
-        LYRICS_OFFSET_MAX_MS,
-        LYRICS_OFFSET_DEFAULT_MS,
-    )
+    def snapshot(self) -> dict:
+        with self._lock:
+            return dict(self._data)
 
-    return data
+    def get(self, key: str, default=None):
+        with self._lock:
+            return self._data.get(key, default)
+
+    def update(self, values: dict):
+        with self._lock:
+            data = _normalize(dict(self._data, **values))
+            if data == self._data:
+                return
+            self._data = data
+            self._changed()
+
+    def set(self, key: str, value):
+        self.update({key: value})
+
+    def lyrics_offset_ms(self, track_id: Optional[str] = None) -> int:
+        """Global offset plus the track's own adjustment, clamped to the allowed range."""
+        with self._lock:
+            v = self._data["lyrics_offset_ms"]
+            if track_id:
+                v += (self._data.get("track_offsets_ms") or {}).get(str(track_id), 0)
+        return clamp_offset_ms(v)
+
+    def track_offset_ms(self, track_id: str) -> int:
+        with self._lock:
+            return (self._data.get("track_offsets_ms") or {}).get(str(track_id), 0)
+
+    def set_track_offset_ms(self, track_id: str, value: int):
+        with self._lock:
+            tracks: Dict[str, int] = dict(self._data.get("track_offsets_ms") or {})
+            tracks[str(track_id)] = int(value)
+            self._data = _normalize(dict(self._data, track_offsets_ms=tracks))
+            self._changed()
+
+    def _changed(self):
+        # Caller holds the lock
+        self._version += 1
+        if self._writer is None:
+            self._writer = threading.Thread(target=self._write_loop, name="settings-writer", daemon=True)
+            self._writer.start()
+        self._wake.notify()
+
+    def _write_loop(self):
+        while True:
+            with self._lock:
+                while self._version == self._saved_version:
+                    self._wake.wait()
+                # Debounce: wait until changes stop arriving for `delay`
+                seen = -1
+                while seen != self._version:
+                    seen = self._version
+                    self._wake.wait(self.delay)
+                data, version = dict(self._data), self._version
+            self._write(data, version)
+
+    def _write(self, data: dict, version: int):
+        with self._io_lock:
+            with self._lock:
+                if version <= self._saved_version:
+                    return
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                tmp = self.path + ".tmp"
+                with open(tmp, "w", encoding="utf-8") as f:
+                    yaml.safe_dump(data, f, sort_keys=False, allow_unicode=True)
+                os.replace(tmp, self.path)
+            except OSError:
+                # Keep the change in memory; retried after another delay or at flush
+                return
+            with self._lock:
+                self._saved_version = max(self._saved_version, version)
+
+    def flush(self):
+        """Write pending changes now, on the calling thread (used at exit)."""
+        with self._lock:
+            if self._version == self._saved_version:
+                return
+            data, version = dict(self._data), self._version
+        self._write(data, version)
+
+
+_store: Optional[SettingsStore] = None
+_store_lock = threading.Lock()
+
+
+def settings_store() -> SettingsStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = SettingsStore()
+            atexit.register(_store.flush)
+        return _store
+
+
+def load_settings() -> dict:
+    return settings_store().snapshot()
 
 
 def save_settings(data: dict) -> None:
-    # Make sure we never save an invalid offset
-    data = dict(data)
-    data["lyrics_offset_ms"] = _clamp_int(
-        data.get("lyrics_offset_ms", LYRICS_OFFSET_DEFAULT_MS),
-        LYRICS_OFFSET_MIN_MS,
-        LYRICS_OFFSET_MAX_MS,
-        LYRICS_OFFSET_DEFAULT_MS,
-    )
-    p = _settings_path()
-    with open(p, "w", encoding="utf-8") as f:
-        yaml.safe_dump(data, f, sort_keys=False, allow_unicode=True)
+    settings_store().update(data)
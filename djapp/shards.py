@@ -0,0 +1,245 @@
+from __future__ import annotations
+import os
+import sqlite3
+import threading
+import multiprocessing as mp
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+Votes = Dict[str, Dict[int, int]]  # track_id -> {offset_frames: count}
+
+HASH_SPACE = 1 << 32
+# Below this many hashes SQLite answers a window faster than worker processes pay off
+AUTO_SHARD_MIN_HASHES = 5_000_000
+
+
+class IndexShardError(RuntimeError):
+    """A shard worker failed to load or died; the index can no longer answer."""
+
+
+def resolve_shard_count(n_shards, n_hashes: int = 0) -> int:
+    """
+    None / missing means 1 (query SQLite in-process). 0 means one shard per
+    CPU core, but only for an index of at least AUTO_SHARD_MIN_HASHES hashes.
+    """
+    if n_shards is None:
+        return 1
+    n = int(n_shards)
+    if n <= 0:
+        n = (os.cpu_count() or 1) if n_hashes >= AUTO_SHARD_MIN_HASHES else 1
+    return max(1, n)
+
+
+def shard_bounds(n_shards: int) -> List[Tuple[int, int]]:
+    """Split the 32-bit hash space into n contiguous [lo, hi) ranges."""
+    edges = [(HASH_SPACE * i) // n_shards for i in range(n_shards + 1)]
+    return [(edges[i], edges[i + 1]) for i in range(n_shards)]
+
+
+def shard_of(hash32: np.ndarray, n_shards: int) -> np.ndarray:
+    """Vectorized shard number for each hash; matches shard_bounds()."""
+    h = np.asarray(hash32, dtype=np.uint64)
+    return ((h * np.uint64(n_shards)) >> np.uint64(32)).astype(np.int64)
+
+
+class ShardTable:
+    """
+    In-memory, hash-sorted slice of the `hashes` table.
+
+    Rows are kept as three parallel arrays sorted by hash so that a batch of
+    query hashes can be resolved with two searchsorted calls.
+    """
+
+    def __init__(self, track_ids: List[str], h: np.ndarray, tid: np.ndarray, t: np.ndarray):
+        order = np.argsort(h, kind="stable")
+        self.track_ids = track_ids
+        self.h = h[order]
+        self.tid = tid[order]
+        self.t = t[order]
+
+    @classmethod
+    def from_db(cls, db_path: str, lo: int, hi: int) -> "ShardTable":
+        track_ids: List[str] = []
+        tid_of: Dict[str, int] = {}
+        hs: List[int] = []
+        tids: List[int] = []
+        ts: List[int] = []
+        conn = sqlite3.connect(db_path, timeout=5.0)
+        try:
+            cur = conn.execute(
+                "SELECT hash32, track_id, t_frame FROM hashes WHERE hash32 >= ? AND hash32 < ?",
+                (lo, hi),
+            )
+            for h, track_id, t in cur:
+                i = tid_of.get(track_id)
+                if i is None:
+                    i = len(track_ids)
+                    tid_of[track_id] = i
+                    track_ids.append(track_id)
+                hs.append(h)
+                tids.append(i)
+                ts.append(t)
+        finally:
+            conn.close()
+        return cls(
+            track_ids,
+            np.asarray(hs, dtype=np.uint32),
+            np.asarray(tids, dtype=np.int32),
+            np.asarray(ts, dtype=np.int32),
+        )
+
+    def partial_votes(self, qh: np.ndarray, qt: np.ndarray):
+        """
+        Look up query hashes (qh, live frame qt) and histogram the matches.
+
+        Returns (tid, offset, count) arrays, one entry per (track, offset) bin.
+        """
+        empty = (np.zeros(0, np.int32), np.zeros(0, np.int64), np.zeros(0, np.int64))
+        if qh.size == 0 or self.h.size == 0:
+            return empty
+
+        left = np.searchsorted(self.h, qh, side="left")
+        right = np.searchsorted(self.h, qh, side="right")
+        n_hits = right - left
+        total = int(n_hits.sum())
+        if total == 0:
+            return empty
+
+        # Expand every query into the run of rows it hit
+        q_idx = np.repeat(np.arange(qh.size), n_hits)
+        run_start = np.repeat(left - np.cumsum(n_hits) + n_hits, n_hits)
+        rows = run_start + np.arange(total)
+
+        off = self.t[rows].astype(np.int64) - qt[q_idx].astype(np.int64)
+        key = (self.tid[rows].astype(np.int64) << 32) | (off + (1 << 31))
+        uniq, counts = np.unique(key, return_counts=True)
+        return (
+            (uniq >> 32).astype(np.int32),
+            (uniq & 0xFFFFFFFF) - (1 << 31),
+            counts.astype(np.int64),
+        )
+
+
+def _shard_worker(conn, db_path: str, lo: int, hi: int):
+    try:
+        table = ShardTable.from_db(db_path, lo, hi)
+        conn.send(("ready", table.track_ids))
+    except Exception as e:
+        conn.send(("error", str(e)))
+        return
+
+    while True:
+        try:
+            msg = conn.recv()
+        except (EOFError, OSError):
+            return
+        if msg is None:
+            return
+        qh, qt = msg
+        conn.send(table.partial_votes(qh, qt))
+
+
+class ShardedIndex:
+    """
+    Fingerprint index split by hash range across worker processes.
+
+    Each worker owns one contiguous slice of the hash space, keeps it in
+    memory and answers lookups with a partial (track, offset) histogram.
+    Because the slices are disjoint, summing the partial histograms gives
+    exactly the votes a single-table query would produce.
+    """
+
+    def __init__(self, db_path: str, n_shards: int = 0):
+        self.db_path = db_path
+        # 0: one worker per core
+        self.n_shards = max(1, int(n_shards)) if n_shards else (os.cpu_count() or 1)
+        self._procs: List[mp.Process] = []
+        self._conns = []
+        self._track_ids: List[Optional[List[str]]] = []
+        self._ready = False
+        # Set once a worker has died; vote() then raises without touching the pipes
+        self.failed = False
+        # One query in flight at a time: replies on the pipes are not tagged
+        self._query_lock = threading.Lock()
+
+    def start(self):
+        """Spawn workers; they load their slices in parallel."""
+        if self._procs:
+            return
+        for lo, hi in shard_bounds(self.n_shards):
+            parent, child = mp.Pipe()
+            p = mp.Process(target=_shard_worker, args=(child, self.db_path, lo, hi), daemon=True)
+            p.start()
+            child.close()
+            self._procs.append(p)
+            self._conns.append(parent)
+            self._track_ids.append(None)
+
+    def wait_ready(self):
+        if self._ready:
+            return
+        self.start()
+        for i, conn in enumerate(self._conns):
+            if self._track_ids[i] is not None:
+                continue
+            try:
+                status, payload = conn.recv()
+            except (EOFError, OSError) as e:
+                status, payload = "error", f"worker exited ({e!r})"
+            if status != "ready":
+                self.failed = True
+                raise IndexShardError(f"Index shard {i} failed to load: {payload}")
+            self._track_ids[i] = payload
+        self._ready = True
+
+    def vote(self, hashes) -> Votes:
+        """Fan the query out to every shard and merge the partial histograms."""
+        if not hashes:
+            return {}
+        if self.failed:
+            raise IndexShardError("Index shard worker died")
+        self.wait_ready()
+
+        arr = np.asarray(hashes, dtype=np.int64)
+        qh = arr[:, 0].astype(np.uint32)
+        qt = arr[:, 1].astype(np.int32)
+        sid = shard_of(qh, self.n_shards)
+
+        with self._query_lock:
+            sent = []
+            try:
+                for i, conn in enumerate(self._conns):
+                    m = sid == i
+                    if not np.any(m):
+                        continue
+                    conn.send((qh[m], qt[m]))
+                    sent.append(i)
+                partials = [(i, self._conns[i].recv()) for i in sent]
+            except (EOFError, OSError) as e:
+                # A worker was killed (OOM, signal); the other pipes may hold stale replies
+                self.failed = True
+                raise IndexShardError(f"Index shard worker died: {e!r}") from e
+
+        votes: Votes = {}
+        for i, (tids, offs, counts) in partials:
+            names = self._track_ids[i]
+            for tid, off, cnt in zip(tids.tolist(), offs.tolist(), counts.tolist()):
+                d = votes.setdefault(names[tid], {})
+                d[off] = d.get(off, 0) + cnt
+        return votes
+
+    def close(self):
+        for conn in self._conns:
+            try:
+                conn.send(None)
+                conn.close()
+            except Exception:
+                pass
+        for p in self._procs:
+            p.join(timeout=2.0)
+            if p.is_alive():
+                p.terminate()
+        self._procs = []
+        self._conns = []
+        self._track_ids = []
+        self._ready = False
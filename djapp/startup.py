@@ -0,0 +1,74 @@
+from __future__ import annotations
+import os
+import sys
+import time
+import threading
+import importlib
+from typing import Callable, List, Optional, Tuple
+
+# Imported first thing by app.py, so this is close to process start
+_T0 = time.perf_counter()
+_lock = threading.Lock()
+_marks: List[Tuple[float, str, Optional[float]]] = []
+
+# Modules only needed for scanning or presenting; loaded on first use, or
+# warmed up in the background once the control window is on screen.
+WARM_MODULES = [
+    "scipy.signal",
+    "scipy.ndimage",
+    "soundfile",
+    "sounddevice",
+    "mutagen.mp3",
+    "mutagen.id3",
+]
+
+
+def report_enabled() -> bool:
+    return "--startup-report" in sys.argv or bool(os.environ.get("LYRICCONDUCTOR_STARTUP_REPORT"))
+
+
+def mark(label: str, duration: Optional[float] = None):
+    """Record a launch milestone (seconds since process start), optionally with its own duration."""
+    with _lock:
+        _marks.append((time.perf_counter() - _T0, label, duration))
+
+
+def timed_import(name: str):
+    t = time.perf_counter()
+    mod = importlib.import_module(name)
+    mark(f"import {name}", time.perf_counter() - t)
+    return mod
+
+
+def warm_up(modules: List[str] = WARM_MODULES, done: Optional[Callable[[], None]] = None):
+    """Import heavy modules on a daemon thread; failures are left for first use to report."""
+
+    def run():
+        for name in modules:
+            try:
+                timed_import(name)
+            except Exception:
+                mark(f"import {name} failed")
+        mark("warm-up done")
+        if done:
+            done()
+
+    t = threading.Thread(target=run, name="warm-up", daemon=True)
+    t.start()
+    return t
+
+
+def format_report() -> str:
+    with _lock:
+        marks = sorted(_marks)
+    lines = ["Startup timing (seconds since launch):"]
+    for at, label, dur in marks:
+        if dur is None:
+            lines.append(f"  {at:8.3f}  {label}")
+        else:
+            lines.append(f"  {at:8.3f}  {label} ({dur * 1000:.0f} ms)")
+    return "\n".join(lines)
+
+
+def print_report():
+    print(format_report(), file=sys.stderr, flush=True)
@@ -0,0 +1,89 @@
+"""
+Procedural test audio: deterministic, music-like signals built from note
+sequences with harmonics, chirps and noise bursts, so benchmarks and scale
+tests need no real recordings.
+"""
+from __future__ import annotations
+from typing import Optional
+
+import numpy as np
+
+
+def synth_audio(seed: int, seconds: float, sample_rate: int = 22050, bpm: float = 0.0) -> np.ndarray:
+    """Mono float32 in [-1, 1]; the same seed always gives the same signal."""
+    rng = np.random.default_rng(seed)
+    n = int(seconds * sample_rate)
+    t = np.arange(n, dtype=np.float64) / sample_rate
+    x = np.zeros(n, dtype=np.float64)
+
+    # Chord/note sequence on a beat grid, each note with a few harmonics
+    bpm = bpm or float(rng.uniform(90, 140))
+    step = max(1, int(sample_rate * 60.0 / bpm / 2))
+    decay = np.exp(-np.arange(step) / (0.35 * step))
+    for a in range(0, n, step):
+        b = min(n, a + step)
+        for _ in range(int(rng.integers(1, 4))):
+            f0 = 110.0 * 2 ** (int(rng.integers(0, 36)) / 12.0)
+            for k, amp in ((1, 1.0), (2, 0.5), (3, 0.25)):
+                x[a:b] += amp * decay[: b - a] * np.sin(2 * np.pi * f0 * k * t[a:b])
+
+    # Occasional chirps
+    for _ in range(max(1, int(seconds // 8))):
+        a = int(rng.integers(0, max(1, n - sample_rate)))
+        b = min(n, a + int(sample_rate * rng.uniform(0.3, 1.0)))
+        f_lo, f_hi = rng.uniform(300, 1500), rng.uniform(1500, 6000)
+        tt = t[a:b] - t[a]
+        dur = max(tt[-1], 1e-3) if tt.size else 1.0
+        x[a:b] += 0.4 * np.sin(2 * np.pi * (f_lo * tt + (f_hi - f_lo) * tt * tt / (2 * dur)))
+
+    # Percussive noise bursts on the beat
+    burst = int(0.03 * sample_rate)
+    env = np.exp(-np.arange(burst) / (burst / 4))
+    for a in range(0, n, step * 2):
+        b = min(n, a + burst)
+        x[a:b] += 0.3 * env[: b - a] * rng.standard_normal(b - a)
+
+    peak = np.max(np.abs(x)) or 1.0
+    return (0.8 * x / peak).astype(np.float32)
+
+
+def degrade(
+    x: np.ndarray,
+    sample_rate: int,
+    snr_db: Optional[float] = None,
+    tilt_db: float = 0.0,
+    gain_db: float = 0.0,
+    seed: int = 0,
+    reverb_seconds: float = 0.0,
+) -> np.ndarray:
+    """
+    Simulate a room/PA capture: a spectral tilt of tilt_db between 100 Hz
+    and 8 kHz (positive = brighter), reverberation decaying 60 dB over
+    reverb_seconds, a level change with clipping, and white noise at snr_db
+    relative to the signal.
+    """
+    y = x.astype(np.float64)
+    if tilt_db:
+        spec = np.fft.rfft(y)
+        f = np.fft.rfftfreq(y.shape[0], 1.0 / sample_rate)
+        pos = np.log2(np.clip(f, 100.0, 8000.0) / 100.0) / np.log2(80.0)  # 0..1 across the band
+        spec *= 10 ** ((pos - 0.5) * tilt_db / 20.0)
+        y = np.fft.irfft(spec, n=y.shape[0])
+    if reverb_seconds > 0:
+        from scipy.signal import fftconvolve
+
+        # Exponentially decaying noise tail after the direct sound
+        n_ir = max(1, int(reverb_seconds * sample_rate))
+        rng = np.random.default_rng(seed + 1)
+        ir = rng.standard_normal(n_ir) * 10 ** (-3.0 * np.arange(n_ir) / n_ir)
+        ir *= 0.5 / (np.sqrt(np.sum(ir * ir)) or 1.0)
+        ir[0] += 1.0
+        wet = fftconvolve(y, ir)[: y.shape[0]]
+        y = wet * (np.max(np.abs(y)) / (np.max(np.abs(wet)) or 1.0))
+    if gain_db:
+        y = np.clip(y * 10 ** (gain_db / 20.0), -1.0, 1.0)
+    if snr_db is not None:
+        p = float(np.mean(y * y)) or 1e-12
+        rng = np.random.default_rng(seed)
+        y = y + rng.standard_normal(y.shape[0]) * np.sqrt(p / 10 ** (snr_db / 10.0))
+    return y.astype(np.float32)
@@ -0,0 +1,205 @@
+"""
+Identify every track in recorded sets, offline.
+
+    python -m djapp.tracklist MUSIC_ROOT set1.wav [set2.flac ...] [--format csv|json] [-o out]
+
+Each recording is streamed from disk and fingerprinted once (one STFT pass,
+peaks picked per listen-length chunk as live), then the matcher's voting
+runs over a window sliding along the whole recording. Runs of confident
+windows become tracklist entries with start/end times in the recording,
+the track position at the start and the best vote count. Recordings are
+processed in parallel, one per core.
+"""
+from __future__ import annotations
+import os
+import sys
+import csv
+import json
+import argparse
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, asdict
+from typing import List, Optional
+
+import numpy as np
+
+from djapp.db import FingerprintDB
+from djapp.fingerprint import fingerprinter_from_config, stream_audio
+from djapp.scanlib import default_config_path, load_config
+from djapp.shards import HASH_SPACE, ShardTable
+
+STEP_SECONDS = 2.0
+FIELDS = ["recording", "start", "end", "track_id", "title", "artist", "offset", "confidence", "windows"]
+
+# Whole index, loaded once per process; forked workers inherit the parent's copy
+_TABLE: Optional[ShardTable] = None
+
+
+@dataclass
+class Entry:
+    recording: str
+    start: float  # seconds into the recording
+    end: float
+    track_id: str
+    title: str
+    artist: str
+    offset: float  # track position at start, seconds
+    confidence: int  # best window vote count
+    windows: int  # confident windows supporting the entry
+
+
+def _load_table(db_path: str):
+    global _TABLE
+    if _TABLE is None:
+        _TABLE = ShardTable.from_db(db_path, 0, HASH_SPACE)
+
+
+def window_votes(h: np.ndarray, t: np.ndarray, win_frames: int, step_frames: int, n_frames: int):
+    """Best (start_frame, track index, offset, votes) per window; hashes must be sorted by t."""
+    out = []
+    last = max(0, n_frames - win_frames)
+    for w in range(0, last + 1, step_frames):
+        a, b = np.searchsorted(t, [w, w + win_frames])
+        tid, off, count = _TABLE.partial_votes(h[a:b], t[a:b])
+        if count.size == 0:
+            out.append((w, -1, 0, 0))
+            continue
+        i = int(np.argmax(count))
+        out.append((w, int(tid[i]), int(off[i]), int(count[i])))
+    return out
+
+
+def segment(windows, min_conf: int, win_frames: int, n_frames: int):
+    """
+    Collapse per-window winners into (track index, start frame, end frame,
+    best window, window count) entries. A track needs two confident windows in a row, or one
+    twice as strong, so a stray window between two tracks is not listed;
+    consecutive runs of the same track are merged.
+    """
+    runs = []
+    cur = None
+    for w in windows:
+        ok = w[1] >= 0 and w[3] >= min_conf
+        if cur is not None and ok and w[1] == cur[0]:
+            cur[2].append(w)
+            continue
+        if cur is not None:
+            runs.append(cur)
+            cur = None
+        if ok:
+            cur = [w[1], w, [w]]
+    if cur is not None:
+        runs.append(cur)
+
+    kept = [r for r in runs if len(r[2]) >= 2 or r[1][3] >= 2 * min_conf]
+    merged = []
+    for r in kept:
+        if merged and merged[-1][0] == r[0]:
+            merged[-1][2].extend(r[2])
+        else:
+            merged.append(r)
+
+    out = []
+    for i, (tid, _first, ws) in enumerate(merged):
+        best = max(ws, key=lambda w: w[3])
+        end = merged[i + 1][2][0][0] if i + 1 < len(merged) else min(n_frames, ws[-1][0] + win_frames)
+        out.append((tid, ws[0][0], end, best, len(ws)))
+    return out
+
+
+def identify(recording: str, cfg: dict, step_seconds: float = STEP_SECONDS) -> List[Entry]:
+    _load_table(cfg["database"]["path"])
+    fp = fingerprinter_from_config(cfg)
+    sr = fp.sample_rate
+    hop = fp.hop_size
+    win_frames = max(1, int(float(cfg["audio"]["listen_seconds"]) * sr / hop))
+    step_frames = max(1, int(step_seconds * sr / hop))
+    min_conf = int(cfg["audio"]["min_confidence"])
+
+    h, t = fp.fingerprint_stream(stream_audio(recording, sr), win_frames)
+    order = np.argsort(t, kind="stable")
+    h, t = h[order], t[order]
+    n_frames = int(t[-1]) + 1 if t.size else 0
+
+    meta = FingerprintDB(cfg["database"]["path"]).all_tracks_meta()
+    entries = []
+    windows = window_votes(h, t, win_frames, step_frames, n_frames)
+    for tid, start, end, best, n in segment(windows, min_conf, win_frames, n_frames):
+        track_id = _TABLE.track_ids[tid]
+        m = meta.get(track_id) or {}
+        entries.append(
+            Entry(
+                recording=recording,
+                start=round(start * hop / sr, 2),
+                end=round(end * hop / sr, 2),
+                track_id=track_id,
+                title=m.get("title") or "",
+                artist=m.get("artist") or "",
+                # the best window's offset maps any recording frame to a track frame
+                offset=round(max(0, start + best[2]) * hop / sr, 2),
+                confidence=best[3],
+                windows=n,
+            )
+        )
+    return entries
+
+
+def identify_all(recordings: List[str], cfg: dict, step_seconds: float = STEP_SECONDS, workers: int = 0):
+    """{recording: entries}; recordings run in parallel processes sharing one loaded index."""
+    db_path = cfg["database"]["path"]
+    _load_table(db_path)
+    workers = min(len(recordings), workers or os.cpu_count() or 1)
+    if workers <= 1:
+        return {rec: identify(rec, cfg, step_seconds) for rec in recordings}
+
+    methods = mp.get_all_start_methods()
+    ctx = mp.get_context("fork" if "fork" in methods else None)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=_load_table, initargs=(db_path,)) as pool:
+        futs = {rec: pool.submit(identify, rec, cfg, step_seconds) for rec in recordings}
+        return {rec: fut.result() for rec, fut in futs.items()}
+
+
+def _fmt_time(s: float) -> str:
+    m, sec = divmod(s, 60.0)
+    return f"{int(m)}:{sec:05.2f}"
+
+
+def write_csv(f, entries: List[Entry]):
+    w = csv.DictWriter(f, fieldnames=FIELDS)
+    w.writeheader()
+    for e in entries:
+        row = asdict(e)
+        row["start"] = _fmt_time(e.start)
+        row["end"] = _fmt_time(e.end)
+        w.writerow(row)
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m djapp.tracklist", description=__doc__.split("\n\n")[0].strip())
+    ap.add_argument("music_root")
+    ap.add_argument("recordings", nargs="+")
+    ap.add_argument("--format", choices=("csv", "json"), default="csv")
+    ap.add_argument("-o", "--output", help="write here instead of stdout")
+    ap.add_argument("--step", type=float, default=STEP_SECONDS, help="seconds between match windows")
+    ap.add_argument("--workers", type=int, default=0)
+    args = ap.parse_args(argv)
+
+    cfg = load_config(default_config_path(args.music_root))
+    results = identify_all(args.recordings, cfg, args.step, args.workers)
+    entries = [e for rec in args.recordings for e in results[rec]]
+
+    f = open(args.output, "w", encoding="utf-8", newline="") if args.output else sys.stdout
+    try:
+        if args.format == "json":
+            json.dump([asdict(e) for e in entries], f, indent=1)
+            f.write("\n")
+        else:
+            write_csv(f, entries)
+    finally:
+        if f is not sys.stdout:
+            f.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,7 @@
 from __future__ import annotations
 import os
 import sys
-from djapp.settings import load_settings, save_settings
-import yaml
+from djapp.settings import LYRICS_OFFSET_MAX_MS, LYRICS_OFFSET_MIN_MS, clamp_offset_ms, settings_store
 
 from PyQt6.QtWidgets import (
     QApplication,
@@ -16,16 +15,33 @@ from PyQt6.QtWidgets import (
     QMessageBox,
     QSpinBox,
 )
-
-from djapp.scanlib import scan_music_root, write_config, default_config_path
+from PyQt6.QtCore import QTimer, pyqtSignal
+
+from djapp import startup
+from djapp.scanlib import (
+    scan_music_root,
+    write_config,
+    default_config_path,
+    load_config,
+    proxy_sizes_from_config,
+    refresh_manifest,
+)
 from djapp.audioio import list_input_devices
 from djapp.db import FingerprintDB
-from djapp.matcher import LiveMatcher
-from djapp.visuals import PresentationWindow
-from djapp.fingerprint import Fingerprinter, load_fp_cache, save_fp_cache
+from djapp.indexer import load_ready_config, mark_index_ready, rebuild_db
+from djapp.metrics import METRICS_DUMP_SECONDS, MetricsDumper, metrics_dump_path
+from djapp.profiler import profile_path, profiler_from_config
+from djapp.watcher import LibraryWatcher
 
 
 class ControlWindow(QWidget):
+    # Emitted from the library watcher thread with the updated config
+    library_updated = pyqtSignal(dict)
+    # Emitted from the warm-up thread with [(index, name), ...]
+    devices_loaded = pyqtSignal(list)
+    # Emitted from the profiler thread with (path, samples)
+    profile_done = pyqtSignal(str, int)
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("LyricConductor")
@@ -34,6 +50,13 @@ class ControlWindow(QWidget):
         self.config = None
         self._presentation_win = None
         self._matcher = None
+        self._watcher = None
+        self._metrics_dumper = None
+        self.library_updated.connect(self._on_library_updated)
+        self.devices_loaded.connect(self._fill_devices)
+        self.profile_done.connect(self._on_profile_done)
+        # One profiler for both windows, so P in the presentation and this button agree
+        self.profiler, self.profile_seconds = profiler_from_config({})
 
         self.root_label = QLabel("Music root: not selected")
         self.scan_label = QLabel("Scan: not run")
@@ -46,13 +69,18 @@ class ControlWindow(QWidget):
         self.btn_refresh_dev = QPushButton("Refresh Devices")
         self.btn_start = QPushButton("Start Presentation")
         self.btn_start.setEnabled(False)
+        self.btn_profile = QPushButton(f"Profile {self.profile_seconds:.0f} s")
+        self.btn_profile.setEnabled(False)
+        self.profile_label = QLabel("")
 
         self.btn_pick.clicked.connect(self.pick_root)
         self.btn_scan.clicked.connect(self.scan_and_build)
         self.btn_refresh_dev.clicked.connect(self.refresh_devices)
         self.btn_start.clicked.connect(self.start_presentation)
+        self.btn_profile.clicked.connect(self.toggle_profiler)
 
-        self.refresh_devices()
+        # PortAudio is initialized by the warm-up thread, not before first paint
+        self.device_combo.addItem("Loading devices…", userData=None)
 
         lay = QVBoxLayout(self)
         lay.addWidget(self.root_label)
@@ -71,30 +99,21 @@ class ControlWindow(QWidget):
 
         # Lyrics timing offset (ms): negative = earlier, positive = later
         self.offset_spin = QSpinBox()
-        self.offset_spin.setRange(-3000, 3000)
+        self.offset_spin.setRange(LYRICS_OFFSET_MIN_MS, LYRICS_OFFSET_MAX_MS)
         self.offset_spin.setSingleStep(50)
 
-        st2 = load_settings()
-        cur_off = int(st2.get("lyrics_offset_ms", -1500))
-        if cur_off < -3000:
-            cur_off = -3000
-        if cur_off > 3000:
-            cur_off = 3000
+        settings = settings_store()
+        cur_off = settings.lyrics_offset_ms()
         self.offset_spin.setValue(cur_off)
 
         self.offset_hint = QLabel("")
         self._update_offset_hint(cur_off)
 
         def _on_off_change(v: int):
-            v = int(v)
-            if v < -3000:
-                v = -3000
-            if v > 3000:
-                v = 3000
+            v = clamp_offset_ms(v)
             self._update_offset_hint(v)
-            stx = load_settings()
-            stx["lyrics_offset_ms"] = v
-            save_settings(stx)
+            # In-memory only; the store writes the file once the spinbox settles
+            settings.set("lyrics_offset_ms", v)
 
         self.offset_spin.valueChanged.connect(_on_off_change)
 
@@ -105,15 +124,20 @@ class ControlWindow(QWidget):
         lay.addLayout(row3)
 
         lay.addWidget(self.btn_start)
+
+        row4 = QHBoxLayout()
+        row4.addWidget(self.btn_profile)
+        row4.addWidget(self.profile_label, 1)
+        lay.addLayout(row4)
         self.setMinimumWidth(700)
 
         # Load last music root after UI exists
-        st = load_settings()
-        last = st.get("music_root")
+        last = settings.get("music_root")
         if last and os.path.isdir(last):
             self.music_root = last
             self.root_label.setText(f"Music root: {last}")
             self.btn_scan.setEnabled(True)
+            self.btn_profile.setEnabled(True)
 
             # Try to use cached config immediately
             if not self._try_load_existing_config():
@@ -129,8 +153,13 @@ class ControlWindow(QWidget):
             return False
 
         try:
-            with open(cfg_path, "r", encoding="utf-8") as f:
-                cfg = yaml.safe_load(f) or {}
+            # Fast path: DB carries a ready marker and a copy of the config
+            cfg = load_ready_config(self.music_root)
+            if cfg and cfg.get("tracks"):
+                self._set_ready_config(cfg, f"Scan: OK (cached), {len(cfg['tracks'])} tracks")
+                return True
+
+            cfg = load_config(cfg_path)
 
             tracks = cfg.get("tracks") or []
             if not tracks:
@@ -147,38 +176,72 @@ class ControlWindow(QWidget):
             if not db_path:
                 return False
 
-            db_exists = os.path.exists(db_path)
-
-            db = FingerprintDB(db_path)
-            db.init_schema()
-
             # If DB exists and already has hashes, do not rebuild on startup
-            if db_exists:
+            if os.path.exists(db_path):
+                db = FingerprintDB(db_path)
+                db.init_schema()
                 try:
-                    with db._conn() as c:
-                        row = c.execute("SELECT COUNT(*) FROM hashes").fetchone()
-                        if row and int(row[0]) > 0:
-                            self.config = cfg
-                            self.scan_label.setText(f"Scan: OK (cached), {len(tracks)} tracks")
-                            self.btn_start.setEnabled(True)
-                            return True
+                    n_hashes = db.count_hashes()
+                    if n_hashes > 0:
+                        # Older DB without a ready marker: add one for next launch
+                        mark_index_ready(db, cfg, n_hashes=n_hashes)
+                        self._set_ready_config(cfg, f"Scan: OK (cached), {len(tracks)} tracks")
+                        return True
                 except Exception:
                     # fall through to rebuild
                     pass
 
-            for t in tracks:
-                db.upsert_track(track_id=t["id"], meta=t)
-                hashes = load_fp_cache(t["fingerprint_cache"])
-                db.replace_hashes(track_id=t["id"], hashes=hashes)
-
-            self.config = cfg
-            self.scan_label.setText(f"Scan: OK (cached), {len(tracks)} tracks")
-            self.btn_start.setEnabled(True)
+            rebuild_db(cfg)
+            self._set_ready_config(cfg, f"Scan: OK (cached), {len(tracks)} tracks")
             return True
 
         except Exception:
             return False
 
+    def _set_ready_config(self, cfg: dict, status: str):
+        self.config = cfg
+        if not self.profiler.running:
+            self.profiler, self.profile_seconds = profiler_from_config(cfg)
+        self.btn_profile.setText(f"Profile {self.profile_seconds:.0f} s")
+        self.scan_label.setText(status)
+        self.btn_start.setEnabled(True)
+        self._start_watcher()
+
+    def _start_watcher(self):
+        if self._watcher is not None:
+            self._watcher.stop()
+            self._watcher = None
+        if not self.config or not (self.config.get("watch") or {}).get("enabled", False):
+            return
+        self._watcher = LibraryWatcher(
+            self.config,
+            default_config_path(self.music_root),
+            on_update=self.library_updated.emit,
+        )
+        self._watcher.start()
+
+    def _on_library_updated(self, cfg: dict):
+        self.config = dict(cfg, audio=self.config["audio"]) if self.config else cfg
+        self.scan_label.setText(f"Scan: OK (watching), {len(cfg['tracks'])} tracks")
+        if self._matcher is not None:
+            self._matcher.reload_index()
+
+    def toggle_profiler(self):
+        if self.profiler.running:
+            self.profiler.stop()
+            return
+        path = profile_path(self.music_root)
+        if self.profiler.start(self.profile_seconds, path, on_done=self.profile_done.emit):
+            self.btn_profile.setText("Stop Profiling")
+            self.profile_label.setText(f"Sampling all threads for {self.profile_seconds:.0f} s…")
+
+    def _on_profile_done(self, path: str, samples: int):
+        self.btn_profile.setText(f"Profile {self.profile_seconds:.0f} s")
+        if path:
+            self.profile_label.setText(f"Profile: {path} ({samples} samples)")
+        else:
+            self.profile_label.setText("Profile could not be written")
+
     def _update_offset_hint(self, v: int):
         if v < 0:
             self.offset_hint.setText(f"{abs(v)} ms early")
@@ -193,13 +256,14 @@ class ControlWindow(QWidget):
         if not d:
             return
         self.music_root = d
+        self.config = None
+        self._start_watcher()
 
-        st = load_settings()
-        st["music_root"] = d
-        save_settings(st)
+        settings_store().set("music_root", d)
 
         self.root_label.setText(f"Music root: {d}")
         self.btn_scan.setEnabled(True)
+        self.btn_profile.setEnabled(True)
 
         # Try cached config first
         if not self._try_load_existing_config():
@@ -208,62 +272,92 @@ class ControlWindow(QWidget):
 
 
     def refresh_devices(self):
+        self._fill_devices(list_input_devices())
+
+    def _fill_devices(self, devices: list):
         self.device_combo.clear()
-        for idx, name in list_input_devices():
+        for idx, name in devices:
             self.device_combo.addItem(f"[{idx}] {name}", userData=idx)
 
+    def deferred_init(self):
+        """Runs once the window is on screen: warm up heavy modules and list devices."""
+
+        def done():
+            try:
+                devices = list_input_devices()
+            except Exception:
+                devices = []
+            startup.mark("audio devices listed")
+            self.devices_loaded.emit(devices)
+            if startup.report_enabled():
+                startup.print_report()
+
+        startup.warm_up(done=done)
+
+        # Qt modules must be loaded on the GUI thread; do it after the first paint
+        QTimer.singleShot(250, lambda: startup.timed_import("djapp.visuals"))
+
     def scan_and_build(self):
         if not self.music_root:
             return
+        if self._watcher is not None:
+            self._watcher.stop()
+            self._watcher = None
         try:
-            tracks = scan_music_root(self.music_root)
+            proxy_sizes = self._proxy_sizes()
+            tracks = scan_music_root(self.music_root, proxy_sizes=proxy_sizes)
             if not tracks:
                 QMessageBox.warning(self, "No tracks", "No valid song folders found.")
                 return
 
             cfg_path = default_config_path(self.music_root)
-            cfg = write_config(self.music_root, tracks, cfg_path)
-
-            db = FingerprintDB(cfg["database"]["path"])
-            db.init_schema()
-
-            fp_cfg = cfg["fingerprinting"]
-            audio_cfg = cfg["audio"]
-            finger = Fingerprinter(
-                sample_rate=int(audio_cfg["sample_rate"]),
-                fft_size=int(fp_cfg["fft_size"]),
-                hop_size=int(fp_cfg["hop_size"]),
-                peak_neighborhood=tuple(fp_cfg["peak_neighborhood"]),
-                max_peaks_per_frame=int(fp_cfg["max_peaks_per_frame"]),
-                fanout=int(fp_cfg["fanout"]),
-                min_dt=int(fp_cfg["min_dt"]),
-                max_dt=int(fp_cfg["max_dt"]),
-            )
-
-            for t in cfg["tracks"]:
-                db.upsert_track(track_id=t["id"], meta=t)
-                cache_path = t.get("fingerprint_cache")
-                if cache_path and os.path.exists(cache_path):
-                    hashes = load_fp_cache(cache_path)
-                else:
-                    hashes = finger.fingerprint_file(t["audio_file"])
-                    if cache_path:
-                        save_fp_cache(cache_path, hashes)
-                db.replace_hashes(track_id=t["id"], hashes=hashes)
+            cfg = write_config(self.music_root, tracks, cfg_path, proxy_sizes=proxy_sizes)
+
+            aliases = rebuild_db(cfg)
+            refresh_manifest(self.music_root)
 
             self.config = cfg
-            self.scan_label.setText(f"Scan: OK, found {len(cfg['tracks'])} tracks")
+            msg = f"Scan: OK, found {len(cfg['tracks'])} tracks"
+            if aliases:
+                msg += f" ({len(aliases)} duplicates)"
+            self.scan_label.setText(msg)
             self.btn_start.setEnabled(True)
+            self._start_watcher()
+
+            # A running presentation picks the new index up without a restart
+            if self._matcher is not None:
+                self._matcher.reload_index()
 
         except Exception as e:
             QMessageBox.critical(self, "Error", str(e))
 
 
 
+    def _proxy_sizes(self) -> list:
+        """Sizes from the existing config, else the presentation screen's pixel size."""
+        cfg = self.config
+        if cfg is None:
+            try:
+                cfg = load_config(default_config_path(self.music_root))
+            except Exception:
+                cfg = None
+        if cfg and "proxy_sizes" in (cfg.get("display") or {}):
+            return proxy_sizes_from_config(cfg)
+        screens = QApplication.instance().screens()
+        idx = int(((cfg or {}).get("display") or {}).get("screen_index", 0))
+        if not 0 <= idx < len(screens):
+            return proxy_sizes_from_config(None)
+        geo = screens[idx].geometry()
+        dpr = screens[idx].devicePixelRatio()
+        return [[round(geo.width() * dpr), round(geo.height() * dpr)]]
+
     def start_presentation(self):
         if not self.config:
             return
 
+        from djapp.matcher import LiveMatcher
+        from djapp.visuals import PresentationWindow
+
         dev_idx = self.device_combo.currentData()
         self.config["audio"]["device"] = int(dev_idx) if dev_idx is not None else None
 
@@ -272,10 +366,15 @@ class ControlWindow(QWidget):
         self._matcher = LiveMatcher(cfg=self.config, db=db)
         self._matcher.start()
 
+        # Stage timings appended to a dotfile in the music root for after the show
+        dump_s = float((self.config.get("metrics") or {}).get("dump_seconds", METRICS_DUMP_SECONDS))
+        self._metrics_dumper = MetricsDumper(self._matcher.get_metrics, metrics_dump_path(self.music_root), dump_s)
+        self._metrics_dumper.start()
+
         self.hide()
 
         # Keep references on self, otherwise the window can get garbage collected
-        self._presentation_win = PresentationWindow(self.config, self._matcher)
+        self._presentation_win = PresentationWindow(self.config, self._matcher, profiler=self.profiler)
 
         app = QApplication.instance()
         screens = app.screens()
@@ -285,11 +384,15 @@ class ControlWindow(QWidget):
 
         def on_closed():
             try:
+                self._metrics_dumper.stop()
                 self._matcher.stop()
             finally:
+                # The presentation may have moved the global offset with +/-
+                self.offset_spin.setValue(settings_store().lyrics_offset_ms())
                 self.show()
                 self._presentation_win = None
                 self._matcher = None
+                self._metrics_dumper = None
 
         # When user hits Esc, PresentationWindow.close() is called, this triggers destroyed
         self._presentation_win.closed.connect(on_closed)
@@ -303,6 +406,15 @@ class ControlWindow(QWidget):
 
 def main():
     app = QApplication(sys.argv)
+    startup.mark("QApplication created")
     w = ControlWindow()
+    startup.mark("control window built")
     w.show()
+    startup.mark("control window shown")
+
+    def first_idle():
+        startup.mark("event loop running")
+        w.deferred_init()
+
+    QTimer.singleShot(0, first_idle)
     sys.exit(app.exec())
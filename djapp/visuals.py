@@ -1,16 +1,23 @@
 from __future__ import annotations
 from PyQt6.QtGui import QPainter, QImage
 from PyQt6.QtMultimedia import QVideoSink
-from PyQt6.QtCore import Qt, QTimer, QUrl, pyqtSignal
-from PyQt6.QtGui import QFont, QPixmap, QPalette, QColor
+from PyQt6.QtCore import Qt, QTimer, QUrl, QRect, QSize, pyqtSignal
+from PyQt6.QtGui import QFont, QFontMetrics, QPixmap, QPalette, QColor
 from PyQt6.QtWidgets import QWidget, QLabel, QVBoxLayout, QHBoxLayout, QStackedLayout
 
 from PyQt6.QtMultimedia import QMediaPlayer, QAudioOutput
 
-from djapp.settings import load_settings, save_settings
+from djapp.settings import clamp_offset_ms, settings_store
+from djapp.assets import BackgroundLoader, image_path
+from djapp.metrics import format_metrics
+from djapp.profiler import profile_path, profiler_from_config
 
+import os
 import sys
+import math
+import time
 import subprocess
+from collections import OrderedDict
 
 _IS_MACOS = sys.platform == "darwin"
 _caffeinate_proc = None
@@ -39,39 +46,94 @@ def prevent_sleep_stop():
 
 
 class VideoCanvas(QWidget):
+    """
+    Letterboxed video surface.
+
+    Decoded frames are only stored when they arrive; conversion and scaling
+    happen in paintEvent, once per frame that actually gets painted. Frames
+    arriving faster than the display repaints replace each other unconverted,
+    and repaints without a new frame (overlay updates) reuse the scaled image.
+    """
+
     def __init__(self):
         super().__init__()
-        self._img: QImage | None = None
+        self._frame = None  # latest QVideoFrame not yet converted
+        self._img: QImage | None = None  # last frame, already at target size
+        self._src_size = None
+        self._target = QRect()
+        self.observe = None  # optional observe(stage, seconds) for paint timing
         self.setStyleSheet("background-color: black;")
 
-    def set_frame(self, img: QImage):
-        self._img = img
+    def set_frame(self, frame):
+        self._frame = frame
         self.update()
 
+    def clear(self):
+        self._frame = None
+        self._img = None
+        self.update()
+
+    def _target_rect(self, iw: int, ih: int) -> QRect:
+        # Recomputed only when the widget or the video size changes
+        if self._src_size != (iw, ih, self.width(), self.height()):
+            self._src_size = (iw, ih, self.width(), self.height())
+            w = self.width()
+            h = self.height()
+            scale = min(w / iw, h / ih)
+            tw = int(iw * scale)
+            th = int(ih * scale)
+            self._target = QRect((w - tw) // 2, (h - th) // 2, tw, th)
+        return self._target
+
+    def _convert_pending(self):
+        frame, self._frame = self._frame, None
+        if frame is None:
+            return
+        size = frame.size()
+        iw, ih = size.width(), size.height()
+        if iw <= 0 or ih <= 0:
+            return
+        target = self._target_rect(iw, ih)
+        if target.isEmpty():
+            return
+        img = frame.toImage()
+        if img.isNull():
+            return
+        if img.width() != target.width() or img.height() != target.height():
+            img = img.scaled(
+                target.width(),
+                target.height(),
+                Qt.AspectRatioMode.IgnoreAspectRatio,
+                Qt.TransformationMode.SmoothTransformation,
+            )
+        self._img = img
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        # Cached image is at the old size; rescale it once so a paused video still fits
+        if self._img is not None and not self._img.isNull() and self._src_size:
+            iw, ih = self._src_size[0], self._src_size[1]
+            target = self._target_rect(iw, ih)
+            if not target.isEmpty():
+                self._img = self._img.scaled(
+                    target.width(),
+                    target.height(),
+                    Qt.AspectRatioMode.IgnoreAspectRatio,
+                    Qt.TransformationMode.SmoothTransformation,
+                )
+
     def paintEvent(self, event):
+        t0 = time.perf_counter()
         super().paintEvent(event)
+        self._convert_pending()
         if self._img is None or self._img.isNull():
             return
 
         p = QPainter(self)
-        p.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform, True)
-
-        # Letterbox scaling
-        w = self.width()
-        h = self.height()
-        iw = self._img.width()
-        ih = self._img.height()
-        if iw <= 0 or ih <= 0:
-            return
-
-        scale = min(w / iw, h / ih)
-        tw = int(iw * scale)
-        th = int(ih * scale)
-        x = (w - tw) // 2
-        y = (h - th) // 2
-
-        p.drawImage(x, y, self._img.scaled(tw, th, Qt.AspectRatioMode.IgnoreAspectRatio, Qt.TransformationMode.SmoothTransformation))
+        p.drawImage(self._target.topLeft(), self._img)
         p.end()
+        if self.observe:
+            self.observe("ui_video_paint", time.perf_counter() - t0)
 
 
 
@@ -90,6 +152,10 @@ class LetterboxImage(QWidget):
         self._pix = QPixmap(path) if path else QPixmap()
         self._apply()
 
+    def set_pixmap(self, pix: QPixmap):
+        self._pix = pix
+        self._apply()
+
     def resizeEvent(self, event):
         super().resizeEvent(event)
         self._apply()
@@ -98,14 +164,108 @@ class LetterboxImage(QWidget):
         if self._pix is None or self._pix.isNull():
             self.label.setPixmap(QPixmap())
             return
+        # Fit in device pixels, so HiDPI screens get a full-resolution picture
+        dpr = self.devicePixelRatioF()
+        target = QSize(round(self.label.width() * dpr), round(self.label.height() * dpr))
+        fitted = self._pix.size().scaled(target, Qt.AspectRatioMode.KeepAspectRatio)
+        if fitted == self._pix.size() and self._pix.devicePixelRatio() == dpr:
+            # Already pre-scaled for this size by the background loader
+            self.label.setPixmap(self._pix)
+            return
         scaled = self._pix.scaled(
-            self.label.size(),
+            target,
             Qt.AspectRatioMode.KeepAspectRatio,
             Qt.TransformationMode.SmoothTransformation,
         )
+        scaled.setDevicePixelRatio(dpr)
         self.label.setPixmap(scaled)
 
 
+class LyricsView(QWidget):
+    """
+    Lyrics box drawn from pre-rendered pixmaps.
+
+    Each line is word-wrapped and rendered once per widget width into a
+    pixmap (box background included); showing a line is then a single
+    drawPixmap. prefetch() renders upcoming lines ahead of their boundary.
+    """
+
+    CACHE_SIZE = 24
+
+    def __init__(self, parent, font: QFont, box_alpha: int, padding: int):
+        super().__init__(parent)
+        self.setAttribute(Qt.WidgetAttribute.WA_TransparentForMouseEvents, True)
+        self._font = font
+        self._box = QColor(0, 0, 0, box_alpha)
+        self._pad = padding
+        self._text = ""
+        self._cache: "OrderedDict[str, QPixmap]" = OrderedDict()
+        self._shown_h = 0
+        self.observe = None  # optional observe(stage, seconds) for paint timing
+
+    def set_text(self, text: str):
+        if text == self._text:
+            return
+        old_h = self._shown_h
+        self._text = text
+        pm = self._pixmap(text) if text else None
+        self._shown_h = int(pm.height() / pm.devicePixelRatio()) if pm else 0
+        # Only the box area needs repainting
+        self.update(QRect(0, 0, self.width(), max(old_h, self._shown_h)))
+
+    def prefetch(self, texts):
+        for t in texts:
+            if t:
+                self._pixmap(t)
+
+    def _pixmap(self, text: str) -> QPixmap:
+        pm = self._cache.get(text)
+        if pm is not None:
+            self._cache.move_to_end(text)
+            return pm
+        pm = self._render(text)
+        self._cache[text] = pm
+        while len(self._cache) > self.CACHE_SIZE:
+            self._cache.popitem(last=False)
+        return pm
+
+    def _render(self, text: str) -> QPixmap:
+        w = max(1, self.width())
+        inner_w = max(1, w - 2 * self._pad)
+        flags = Qt.AlignmentFlag.AlignHCenter | Qt.AlignmentFlag.AlignTop | Qt.TextFlag.TextWordWrap
+        text_h = QFontMetrics(self._font).boundingRect(QRect(0, 0, inner_w, 100000), flags, text).height()
+        h = text_h + 2 * self._pad
+
+        dpr = self.devicePixelRatioF()
+        pm = QPixmap(int(w * dpr), int(h * dpr))
+        pm.setDevicePixelRatio(dpr)
+        pm.fill(Qt.GlobalColor.transparent)
+        p = QPainter(pm)
+        p.fillRect(0, 0, w, h, self._box)
+        p.setFont(self._font)
+        p.setPen(QColor("white"))
+        p.drawText(QRect(self._pad, self._pad, inner_w, text_h), flags, text)
+        p.end()
+        return pm
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        if event.oldSize().width() != event.size().width():
+            self._cache.clear()
+            text, self._text = self._text, ""
+            self.set_text(text)
+
+    def paintEvent(self, event):
+        if not self._text:
+            return
+        t0 = time.perf_counter()
+        p = QPainter(self)
+        p.drawPixmap(0, 0, self._pixmap(self._text))
+        p.end()
+        if self.observe:
+            self.observe("ui_lyrics_paint", time.perf_counter() - t0)
+
+
 class LoopingVideo(QWidget):
     def __init__(self):
         super().__init__()
@@ -129,10 +289,21 @@ class LoopingVideo(QWidget):
     def set_video(self, path: str):
         if not path:
             return
-        self._url = QUrl.fromLocalFile(path)
+        url = QUrl.fromLocalFile(path)
+        if url == self._url and self.player.playbackState() == QMediaPlayer.PlaybackState.PlayingState:
+            return
+        self._url = url
         self.player.setSource(self._url)
         self.player.play()
 
+    def stop(self):
+        """Stop decoding while another background is shown."""
+        if self._url is None:
+            return
+        self._url = None
+        self.player.stop()
+        self.canvas.clear()
+
     def _status(self, status):
         if status == QMediaPlayer.MediaStatus.EndOfMedia and self._url is not None:
             self.player.setPosition(0)
@@ -141,29 +312,34 @@ class LoopingVideo(QWidget):
     def _on_frame(self, frame):
         if frame is None or not frame.isValid():
             return
-        img = frame.toImage()
-        if img.isNull():
+        if not self.canvas.isVisible():
             return
-        self.canvas.set_frame(img)
+        self.canvas.set_frame(frame)
 
 
 class PresentationWindow(QWidget):
     closed = pyqtSignal()
+    # Matcher state pushed from the matcher thread; delivered queued on the GUI thread
+    matcher_state = pyqtSignal(dict)
+    # (path, samples) from the profiler thread when a profile has been written
+    profile_done = pyqtSignal(str, int)
+
+    PREFETCH_LINES = 3
 
-    def __init__(self, cfg: dict, matcher):
+    def __init__(self, cfg: dict, matcher, profiler=None):
         super().__init__()
         self.cfg = cfg
         self.matcher = matcher
+        own_profiler, self.profile_seconds = profiler_from_config(cfg)
+        self.profiler = profiler or own_profiler
+        self.profile_done.connect(self._on_profile_done)
         self._last_track_id = None
         self.fallback_mode = False
         self.default_bg = cfg.get("default_background", "")
 
-        st = load_settings()
-        self.lyrics_offset_ms = int(st.get("lyrics_offset_ms", -1500))
-        if self.lyrics_offset_ms < -3000:
-            self.lyrics_offset_ms = -3000
-        if self.lyrics_offset_ms > 3000:
-            self.lyrics_offset_ms = 3000
+        # Effective offset for the current track (global + per-track adjustment)
+        self.settings = settings_store()
+        self.lyrics_offset_ms = self.settings.lyrics_offset_ms()
         self._toast_timer = QTimer(self)
         self._toast_timer.setSingleShot(True)
 
@@ -178,6 +354,12 @@ class PresentationWindow(QWidget):
         self.bg_stack.addWidget(self.bg_img)
         self.bg_stack.addWidget(self.bg_vid)
 
+        # Images are decoded off the GUI thread; the window shows the new one when ready
+        self.bg_loader = BackgroundLoader(self)
+        self.bg_loader.ready.connect(self._on_bg_ready)
+        self._wanted_bg = None
+        self._bg_spec: dict = {}
+
         root = QVBoxLayout(self)
         root.setContentsMargins(0, 0, 0, 0)
         bg_host = QWidget()
@@ -206,16 +388,17 @@ class PresentationWindow(QWidget):
         self._toast_timer.timeout.connect(self.offset_toast.hide)
 
         lyr_cfg = cfg["display"]["lyrics"]
-        self.lyrics_label = QLabel("")
-        self.lyrics_label.setWordWrap(True)
-        self.lyrics_label.setAlignment(Qt.AlignmentFlag.AlignTop | Qt.AlignmentFlag.AlignHCenter)
-        self.lyrics_label.setStyleSheet(
-            f"color: white; background-color: rgba(0,0,0,{int(255*float(lyr_cfg['box_opacity']))});"
-            f" padding: {int(lyr_cfg['box_padding'])}px;"
-        )
         lf = QFont(lyr_cfg["font_family"], int(lyr_cfg["font_size"]))
         lf.setBold(True)
-        self.lyrics_label.setFont(lf)
+        self.lyrics_margin_top = int(lyr_cfg["margin_top"])
+        # Positioned by resizeEvent rather than the layout, so a line change
+        # never triggers a relayout of the overlay
+        self.lyrics_view = LyricsView(
+            self.overlay,
+            lf,
+            box_alpha=int(255 * float(lyr_cfg["box_opacity"])),
+            padding=int(lyr_cfg["box_padding"]),
+        )
 
         meta_cfg = cfg["display"]["meta"]
         self.meta_label = QLabel("")
@@ -228,12 +411,6 @@ class PresentationWindow(QWidget):
         QTimer.singleShot(2500, self.hint_label.hide)
         ov.setContentsMargins(0, 0, 0, 0)
 
-        top_wrap = QWidget()
-        top_l = QVBoxLayout(top_wrap)
-        top_l.setContentsMargins(0, int(lyr_cfg["margin_top"]), 0, 0)
-        top_l.addWidget(self.lyrics_label, 0, Qt.AlignmentFlag.AlignTop)
-        ov.addWidget(top_wrap, 0)
-
         ov.addStretch(1)
 
         # transient offset change display (bottom center)
@@ -246,17 +423,52 @@ class PresentationWindow(QWidget):
         bl.addStretch(1)
         ov.addWidget(bottom, 0)
 
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self._tick)
-        self.timer.start(33)
+        # Debug overlay (D): live matcher/UI timings, refreshed while visible
+        self.metrics = matcher.metrics
+        self.lyrics_view.observe = self.metrics.observe
+        self.bg_vid.canvas.observe = self.metrics.observe
+        self.debug_label = QLabel("", self.overlay)
+        self.debug_label.setStyleSheet("color: #9f9; background-color: rgba(0,0,0,200); padding: 8px;")
+        df = QFont("Menlo", 12)
+        df.setStyleHint(QFont.StyleHint.TypeWriter)
+        self.debug_label.setFont(df)
+        self.debug_label.hide()
+        self._debug_timer = QTimer(self)
+        self._debug_timer.timeout.connect(self._update_debug)
+
+        self._state = None
+        self._lyric_text = None
+
+        # Fires exactly at the next LRC line boundary; rescheduled on every state change
+        self._line_timer = QTimer(self)
+        self._line_timer.setSingleShot(True)
+        self._line_timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self._line_timer.timeout.connect(self._refresh_lyrics)
+
+        self.matcher_state.connect(self._on_state)
+        # Keep one bound callable: each attribute access makes a new one
+        self._state_listener = self.matcher_state.emit
+        self.matcher.add_listener(self._state_listener)
+        QTimer.singleShot(0, lambda: self._on_state(self.matcher.get_state()))
 
     def closeEvent(self, event):
+        self.matcher.remove_listener(self._state_listener)
+        self._line_timer.stop()
+        self._debug_timer.stop()
+        self.bg_loader.shutdown()
         self.closed.emit()
         super().closeEvent(event)
 
     def resizeEvent(self, event):
         super().resizeEvent(event)
         self.overlay.setGeometry(0, 0, self.width(), self.height())
+        self.lyrics_view.setGeometry(0, self.lyrics_margin_top, self.width(), self.height() - self.lyrics_margin_top)
+        self.hint_label.raise_()
+        if self._wanted_bg:
+            # A different proxy may suit the new size
+            self._show_image(image_path(self._bg_spec, self._bg_size()))
+        if self.default_bg:
+            self.bg_loader.request(self.default_bg, self._bg_size())
 
     def keyPressEvent(self, event):
         if event.key() == Qt.Key.Key_Escape:
@@ -265,13 +477,22 @@ class PresentationWindow(QWidget):
 
         k = event.key()
 
-        # Offset adjust during presentation: + and -
+        # Offset adjust during presentation: + and -; with Alt/Option only for this track
+        per_track = bool(event.modifiers() & Qt.KeyboardModifier.AltModifier)
         if k in (Qt.Key.Key_Plus, Qt.Key.Key_Equal):
-            self._adjust_offset(+50)
+            self._adjust_offset(+50, per_track)
             event.accept()
             return
         if k in (Qt.Key.Key_Minus, Qt.Key.Key_Underscore):
-            self._adjust_offset(-50)
+            self._adjust_offset(-50, per_track)
+            event.accept()
+            return
+        if k == Qt.Key.Key_D:
+            self._toggle_debug()
+            event.accept()
+            return
+        if k == Qt.Key.Key_P:
+            self._toggle_profiler()
             event.accept()
             return
 
@@ -281,76 +502,199 @@ class PresentationWindow(QWidget):
 
         if self.fallback_mode:
             # Show default background, hide lyrics/meta immediately
+            self._line_timer.stop()
             if self.default_bg:
+                self.bg_vid.stop()
                 self.bg_stack.setCurrentWidget(self.bg_img)
-                self.bg_img.set_image(self.default_bg)
-            self.lyrics_label.setText("")
+                self._bg_spec = {"path": self.default_bg}
+                self._show_image(self.default_bg)
+            self._set_lyrics("")
             self.meta_label.setText("")
+        elif self._state is not None:
+            self._on_state(self._state)
         event.accept()
 
-    def _save_offset(self):
-        st = load_settings()
-        st["lyrics_offset_ms"] = int(self.lyrics_offset_ms)
-        save_settings(st)
-
     def _offset_label(self) -> str:
         v = int(self.lyrics_offset_ms)
         if v < 0:
-            return f"Lyrics: {abs(v)} ms early"
-        if v > 0:
-            return f"Lyrics: {v} ms late"
-        return "Lyrics: 0 ms"
+            text = f"Lyrics: {abs(v)} ms early"
+        elif v > 0:
+            text = f"Lyrics: {v} ms late"
+        else:
+            text = "Lyrics: 0 ms"
+        if self._last_track_id and self.settings.track_offset_ms(self._last_track_id):
+            text += " (this track)"
+        return text
 
     def _show_offset_toast(self):
-        self.offset_toast.setText(self._offset_label())
+        self._show_toast(self._offset_label())
+
+    def _show_toast(self, text: str, ms: int = 1200):
+        self.offset_toast.setText(text)
         self.offset_toast.show()
-        # Hide after ~1.2s
-        self._toast_timer.start(1200)
-
-    def _adjust_offset(self, delta_ms: int):
-        v = int(self.lyrics_offset_ms) + int(delta_ms)
-        if v < -3000:
-            v = -3000
-        if v > 3000:
-            v = 3000
-        self.lyrics_offset_ms = v
-        self._save_offset()
+        self._toast_timer.start(ms)
+
+    def _toggle_profiler(self):
+        if self.profiler.running:
+            self.profiler.stop()
+            self._show_toast("Profiler: stopping…")
+            return
+        path = profile_path(self.cfg["music_root"])
+        if self.profiler.start(self.profile_seconds, path, on_done=self.profile_done.emit):
+            self._show_toast(f"Profiling for {self.profile_seconds:.0f} s (P to stop)", 2500)
+
+    def _on_profile_done(self, path: str, samples: int):
+        if path:
+            self._show_toast(f"Profile saved: {os.path.basename(path)} ({samples} samples)", 4000)
+        else:
+            self._show_toast("Profile could not be written", 4000)
+
+    def _adjust_offset(self, delta_ms: int, per_track: bool = False):
+        # Only the in-memory store changes here; it writes the file in the background
+        tid = self._last_track_id
+        if per_track and tid:
+            # Keep the adjustment within what the clamped effective offset can show
+            glob = self.settings.lyrics_offset_ms()
+            eff = clamp_offset_ms(self.settings.lyrics_offset_ms(tid) + int(delta_ms))
+            self.settings.set_track_offset_ms(tid, eff - glob)
+        else:
+            glob = self.settings.lyrics_offset_ms()
+            self.settings.set("lyrics_offset_ms", clamp_offset_ms(glob + int(delta_ms)))
+        self.lyrics_offset_ms = self.settings.lyrics_offset_ms(tid)
         self._show_offset_toast()
+        self._refresh_lyrics()
+
+
+    def _toggle_debug(self):
+        if self.debug_label.isVisible():
+            self._debug_timer.stop()
+            self.debug_label.hide()
+        else:
+            self._update_debug()
+            self.debug_label.show()
+            self.debug_label.raise_()
+            self._debug_timer.start(500)
 
+    def _update_debug(self):
+        text = format_metrics(self.matcher.get_metrics())
+        st = self.matcher.get_state()
+        inputs = st.get("inputs") or []
+        if len(inputs) > 1:
+            shown = st["input"]
+            text += "\n" + "\n".join(
+                f"{'>' if i['name'] == shown else ' '} {i['name']:<12}{i['track_id'] or '-':<16}{i['score']:>6.1f}"
+                for i in inputs
+            )
+        self.debug_label.setText(text)
+        self.debug_label.adjustSize()
+        self.debug_label.move(self.width() - self.debug_label.width() - 12, 12)
 
     def _apply_background(self, meta: dict):
         bg = (meta or {}).get("background") or {}
         btype = bg.get("type", "image")
         path = bg.get("path", "")
+        self._bg_spec = bg
 
         if btype == "video" and path:
+            self._wanted_bg = None
             self.bg_stack.setCurrentWidget(self.bg_vid)
             self.bg_vid.set_video(path)
         else:
+            self.bg_vid.stop()
             self.bg_stack.setCurrentWidget(self.bg_img)
-            self.bg_img.set_image(path)
+            self._show_image(image_path(bg, self._bg_size()))
 
-    def _tick(self):
+    def _show_image(self, path: str):
+        self._wanted_bg = path
+        if not path:
+            self.bg_img.set_pixmap(QPixmap())
+            return
+        pm = self.bg_loader.get(path, self._bg_size())
+        if pm is not None:
+            self.bg_img.set_pixmap(pm)
+        else:
+            # Keep the previous picture up until the decode lands
+            self.bg_loader.request(path, self._bg_size())
+
+    def _bg_size(self) -> QSize:
+        """Window size in device pixels, which proxies and decoded backgrounds are sized in."""
+        dpr = self.devicePixelRatioF()
+        self.bg_loader.device_pixel_ratio = dpr
+        return QSize(round(self.width() * dpr), round(self.height() * dpr))
+
+    def _on_bg_ready(self, path: str, w: int, h: int):
+        size = self._bg_size()
+        if path == self._wanted_bg and (w, h) == (size.width(), size.height()):
+            pm = self.bg_loader.get(path, size)
+            if pm is not None:
+                self.bg_img.set_pixmap(pm)
+
+    def _set_lyrics(self, text: str):
+        # setText on a word-wrapped label forces relayout; skip when unchanged
+        if text != self._lyric_text:
+            self._lyric_text = text
+            self.lyrics_view.set_text(text)
+
+    @staticmethod
+    def _track_time_now(st: dict):
+        if st.get("wall_t0") is None:
+            return None
+        return max(0.0, float(st["alpha"]) + float(st["beta"]) * (time.monotonic() - st["wall_t0"]))
+
+    def _on_state(self, st: dict):
+        with self.metrics.timer("ui_state"):
+            self._apply_state(st)
+
+    def _apply_state(self, st: dict):
+        self._state = st
         if self.fallback_mode:
             return
-        st = self.matcher.get_state()
         meta = st["meta"]
         track_id = st["track_id"]
-        track_time = st["track_time"]
-        lrc = st["lrc"]
 
         if track_id != self._last_track_id:
             self._last_track_id = track_id
+            self.lyrics_offset_ms = self.settings.lyrics_offset_ms(track_id)
             if meta:
                 self._apply_background(meta)
                 self.meta_label.setText(f"{meta.get('title','')}\n{meta.get('album','')}\n{meta.get('artist','')}")
             else:
                 self.meta_label.setText("")
-                self.lyrics_label.setText("")
+                self._set_lyrics("")
 
-        if lrc and track_time is not None:
-            effective_t = float(track_time) + (float(self.lyrics_offset_ms) / 1000.0)
-            cur, nxt = lrc.current_line(effective_t)
-            self.lyrics_label.setText(cur or nxt or "")
-        else:
-            self.lyrics_label.setText("")
+        self._refresh_lyrics()
+
+        for cand in st.get("candidates") or []:
+            self.bg_loader.prefetch_meta(cand, self._bg_size())
+
+    def _refresh_lyrics(self):
+        with self.metrics.timer("ui_tick"):
+            self._update_lyrics()
+
+    def _update_lyrics(self):
+        self._line_timer.stop()
+        st = self._state
+        if self.fallback_mode or st is None:
+            return
+        lrc = st["lrc"]
+        track_time = self._track_time_now(st)
+        if not lrc or track_time is None:
+            self._set_lyrics("")
+            return
+
+        effective_t = track_time + (float(self.lyrics_offset_ms) / 1000.0)
+        cur, nxt = lrc.current_line(effective_t)
+        self._set_lyrics(cur or nxt or "")
+
+        # Render the next few lines now, while nothing is due, so the
+        # boundary itself is just a blit
+        idx = lrc.line_index(effective_t)
+        upcoming = [ln.text for ln in lrc.lines[idx + 1 : idx + 1 + self.PREFETCH_LINES]]
+        QTimer.singleShot(0, lambda: self.lyrics_view.prefetch(upcoming))
+
+        # Sleep until the next line starts, in wall-clock time at the current tempo
+        next_t = lrc.next_time(effective_t)
+        if next_t is not None:
+            beta = float(st["beta"]) or 1.0
+            delay_ms = int(math.ceil((next_t - effective_t) / beta * 1000.0))
+            self._line_timer.start(max(1, delay_ms))
@@ -0,0 +1,325 @@
+from __future__ import annotations
+import os
+import sys
+import time
+import ctypes
+import ctypes.util
+import select
+import struct
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from djapp.db import FingerprintDB
+from djapp.fingerprint import fingerprinter_from_config, load_fp_cache, save_fp_cache
+from djapp.indexer import INDEX_LOCK, index_track, load_or_fingerprint, mark_index_ready, remove_track
+from djapp.scanlib import proxy_sizes_from_config, scan_song_folder, track_entry, save_config
+
+# inotify(7) constants
+_IN_ATTRIB = 0x00000004
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_WATCH_MASK = (
+    _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE | _IN_DELETE_SELF | _IN_ATTRIB
+)
+_EVENT_HDR = struct.Struct("iIII")
+
+
+class _Inotify:
+    """Minimal ctypes binding; only used to wake the poller early on Linux."""
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._libc = libc
+        self.fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._names: Dict[int, Optional[str]] = {}
+
+    def add_watch(self, path: str, name: Optional[str]) -> bool:
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), _WATCH_MASK)
+        if wd < 0:
+            return False
+        self._names[wd] = name
+        return True
+
+    def wait(self, timeout: float) -> List[str]:
+        """Block up to timeout; return song folder names that saw events."""
+        r, _w, _x = select.select([self.fd], [], [], timeout)
+        if not r:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        out = []
+        pos = 0
+        while pos + _EVENT_HDR.size <= len(data):
+            wd, _mask, _cookie, n = _EVENT_HDR.unpack_from(data, pos)
+            raw = data[pos + _EVENT_HDR.size : pos + _EVENT_HDR.size + n]
+            pos += _EVENT_HDR.size + n
+            folder = self._names.get(wd)
+            if folder is None:
+                # Event on the music root itself: the entry name is the folder
+                name = raw.rstrip(b"\0").decode("utf-8", "surrogateescape")
+                if name:
+                    out.append(name)
+            else:
+                out.append(folder)
+        return out
+
+    def close(self):
+        try:
+            os.close(self.fd)
+        except OSError:
+            pass
+
+
+def _open_inotify() -> Optional[_Inotify]:
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        return _Inotify()
+    except Exception:
+        return None
+
+
+def folder_signature(song_dir: str) -> Optional[Tuple]:
+    """(name, size, mtime_ns) of every file; changes while a copy is in progress."""
+    out = []
+    try:
+        with os.scandir(song_dir) as it:
+            for e in it:
+                if e.is_file():
+                    st = e.stat()
+                    out.append((e.name, st.st_size, st.st_mtime_ns))
+    except OSError:
+        return None
+    return tuple(sorted(out))
+
+
+def _lower_priority():
+    try:
+        os.nice(10)
+    except Exception:
+        pass
+
+
+def _fingerprint_in_worker(cfg: dict, audio_file: str) -> list:
+    return fingerprinter_from_config(cfg).fingerprint_file(audio_file)
+
+
+class LibraryWatcher:
+    """
+    Keep the index in step with the music root while the app runs.
+
+    A cheap poll of song folder mtimes (or inotify events on Linux) marks
+    folders dirty; once a dirty folder has stopped changing for
+    settle_seconds it is rescanned on its own, fingerprinted in a niced
+    worker process, and written to the DB and config incrementally.
+    Removed folders have their track and hashes deleted.
+
+    on_update(cfg) is called from the watcher thread after each batch.
+    """
+
+    def __init__(self, cfg: dict, config_path: str, on_update: Optional[Callable[[dict], None]] = None):
+        self.cfg = cfg
+        self.config_path = config_path
+        self.on_update = on_update
+        self.root = cfg["music_root"]
+
+        watch_cfg = cfg.get("watch") or {}
+        self.poll_seconds = float(watch_cfg.get("poll_seconds", 10))
+        self.settle_seconds = float(watch_cfg.get("settle_seconds", 5))
+
+        self._running = False
+        self._stop_evt = threading.Event()
+        self._thread = None
+        self._inotify: Optional[_Inotify] = None
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+        self._seen: Dict[str, int] = {}
+        self._dirty: Dict[str, Tuple[Optional[Tuple], float]] = {}
+        # Signature right after we indexed a folder, so our own writes
+        # (fingerprint cache, extracted art) do not trigger another pass
+        self._applied: Dict[str, Optional[Tuple]] = {}
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._stop_evt.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Does not wait: a batch in flight notices and skips its writes."""
+        self._running = False
+        self._stop_evt.set()
+        if self._pool:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def _folders_in_config(self) -> Dict[str, List[dict]]:
+        out: Dict[str, List[dict]] = {}
+        for t in self.cfg.get("tracks") or []:
+            name = os.path.basename(os.path.dirname(t["audio_file"]))
+            out.setdefault(name, []).append(t)
+        return out
+
+    def _dir_mtimes(self) -> Dict[str, int]:
+        out = {}
+        try:
+            with os.scandir(self.root) as it:
+                for e in it:
+                    if e.is_dir() and not e.name.startswith("."):
+                        out[e.name] = e.stat().st_mtime_ns
+        except OSError:
+            pass
+        return out
+
+    def _run(self):
+        self._inotify = _open_inotify()
+        if self._inotify:
+            self._inotify.add_watch(self.root, None)
+
+        # Baseline: the index matches the config; anything on disk that the
+        # config does not know about (or vice versa) is dirty from the start.
+        self._seen = self._dir_mtimes()
+        known = self._folders_in_config()
+        for name in set(self._seen) ^ set(known):
+            self._mark_dirty(name)
+        if self._inotify:
+            for name in self._seen:
+                self._inotify.add_watch(os.path.join(self.root, name), name)
+
+        while self._running:
+            timeout = self.settle_seconds if self._dirty else self.poll_seconds
+            if self._inotify:
+                for name in self._inotify.wait(timeout):
+                    self._mark_dirty(name)
+            elif self._stop_evt.wait(timeout):
+                break
+            if not self._running:
+                break
+
+            now_mtimes = self._dir_mtimes()
+            for name, m in now_mtimes.items():
+                if self._seen.get(name) != m:
+                    self._mark_dirty(name)
+                    if self._inotify and name not in self._seen:
+                        self._inotify.add_watch(os.path.join(self.root, name), name)
+            for name in set(self._seen) - set(now_mtimes):
+                self._mark_dirty(name)
+            self._seen = now_mtimes
+
+            ready = self._settled()
+            if ready:
+                try:
+                    self._apply(ready)
+                except Exception:
+                    # Leave them dirty; the next poll retries
+                    for name in ready:
+                        self._mark_dirty(name)
+
+        if self._inotify:
+            self._inotify.close()
+            self._inotify = None
+
+    def _mark_dirty(self, name: str):
+        # Our own config/DB files live in the root as dotfiles
+        if name.startswith("."):
+            return
+        if name not in self._dirty:
+            self._dirty[name] = (None, time.monotonic())
+
+    def _settled(self) -> List[str]:
+        """Dirty folders whose contents have not changed for settle_seconds."""
+        now = time.monotonic()
+        ready = []
+        for name, (prev_sig, since) in list(self._dirty.items()):
+            sig = folder_signature(os.path.join(self.root, name))
+            if sig != prev_sig:
+                self._dirty[name] = (sig, now)
+            elif now - since >= self.settle_seconds:
+                del self._dirty[name]
+                if name in self._applied and self._applied[name] == sig:
+                    continue
+                ready.append(name)
+        return ready
+
+    def _fingerprint(self, t: dict) -> list:
+        cache = t.get("fingerprint_cache")
+        if cache and os.path.exists(cache) and os.path.getmtime(cache) >= os.path.getmtime(t["audio_file"]):
+            return load_fp_cache(cache)
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=1, initializer=_lower_priority)
+        fp_cfg = {"audio": self.cfg["audio"], "fingerprinting": self.cfg["fingerprinting"]}
+        hashes = self._pool.submit(_fingerprint_in_worker, fp_cfg, t["audio_file"]).result()
+        if cache:
+            save_fp_cache(cache, hashes)
+        return hashes
+
+    def _apply(self, names: List[str]):
+        known = self._folders_in_config()
+
+        # Scan and fingerprint outside the index lock; only DB/config writes hold it
+        scanned: Dict[str, Optional[Tuple[dict, list]]] = {}
+        proxy_sizes = proxy_sizes_from_config(self.cfg)
+        for name in names:
+            info = scan_song_folder(os.path.join(self.root, name), proxy_sizes)
+            if info is None:
+                scanned[name] = None
+                continue
+            entry = track_entry(info)
+            scanned[name] = (entry, self._fingerprint(entry))
+            if not self._running:
+                return
+
+        with INDEX_LOCK:
+            if not self._running:
+                return
+            db = FingerprintDB(self.cfg["database"]["path"])
+            db.init_schema()
+            finger = fingerprinter_from_config(self.cfg)
+            tracks = list(self.cfg.get("tracks") or [])
+
+            def load_hashes(track_id: str) -> Optional[list]:
+                for t in tracks:
+                    if t["id"] == track_id:
+                        return load_or_fingerprint(t, finger)
+                return None
+
+            changed = False
+            for name, res in scanned.items():
+                new_id = res[0]["id"] if res else None
+                for old in known.get(name, []):
+                    if old["id"] != new_id:
+                        tracks = [t for t in tracks if t["id"] != old["id"]]
+                        remove_track(self.cfg, db, old["id"], load_hashes)
+                        changed = True
+                if res:
+                    entry, hashes = res
+                    tracks = [t for t in tracks if t["id"] != entry["id"]]
+                    tracks.append(entry)
+                    index_track(self.cfg, db, entry, hashes, load_hashes)
+                    changed = True
+
+            for name in scanned:
+                self._applied[name] = folder_signature(os.path.join(self.root, name))
+            if not changed:
+                return
+            tracks.sort(key=lambda t: t["audio_file"])
+            self.cfg = dict(self.cfg, tracks=tracks)
+            save_config(self.cfg, self.config_path)
+            # Keep n_hashes current: index.shards: 0 decides on it
+            mark_index_ready(db, self.cfg, n_hashes=db.count_hashes())
+
+        if self.on_update:
+            self.on_update(self.cfg)